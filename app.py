@@ -3,18 +3,64 @@ import os
 import sys
 import time
 import random
-from typing import Dict, List
+import asyncio
+import atexit
+import bisect
+import contextvars
+import cProfile
+import io
+import heapq
+import itertools
+import logging
+import logging.handlers
+import multiprocessing
+import pstats
+import queue
+import socket
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+from typing import Callable, Dict, List, NamedTuple
 import hashlib
+import hmac
+import difflib
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime, timedelta, timezone
 from curl_cffi import requests
 from bs4 import BeautifulSoup	
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import firebase_admin
 from firebase_admin import credentials, firestore
 import re
+import gzip
 from requests.exceptions import HTTPError, RequestException
 
+# Opsiyonel hızlandırıcılar: kuruluysa kullanılır
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Opsiyonel tarayıcı katmanı (BROWSER_FALLBACK=1): engellenen host'lar için headless Chromium
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+try:
+    from playwright_stealth import Stealth
+except ImportError:
+    Stealth = None
+
 # Ortam değişkenlerini yükle (.env dosyasından)
 load_dotenv()
 
@@ -22,12 +68,86 @@ app = Flask(__name__)
 
 # Proxy ayarları
 PROXY_URL = os.getenv("PROXY_URL")
-# Proxy'yi requests kütüphanesinin anlayacağı formatta ayarla
-# PROXY_URL'in "user:pass@host:port" formatında olduğunu varsayıyoruz.
-PROXIES = {
-    "http": PROXY_URL,
-    "https": PROXY_URL,
-} if PROXY_URL else None
+# Birden fazla proxy virgülle ayrılarak PROXY_URLS ile verilebilir (yoksa ya da boşsa tek PROXY_URL kullanılır).
+# Her birinin "user:pass@host:port" formatında olduğunu varsayıyoruz.
+PROXY_URLS = ([p.strip() for p in os.getenv("PROXY_URLS", "").split(",") if p.strip()]
+              or ([PROXY_URL.strip()] if PROXY_URL and PROXY_URL.strip() else []))
+
+# Loglama ayarları
+# LOG_LEVEL=DEBUG verilmedikçe satır bazlı debug logları hiç formatlanmaz.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+log = logging.getLogger("json_api_server")
+cache_log = log.getChild("cache")
+scrape_log = log.getChild("scrape")
+store_log = log.getChild("firestore")
+api_log = log.getChild("api")
+
+_log_listener = None
+
+
+def redact_url(url: str | None) -> str | None:
+    """URL içindeki kullanıcı adı/şifreyi gizler (user:pass@host → ***@host)."""
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if not parts.username and not parts.password:
+            return url
+        host = parts.hostname or ""
+        if parts.port:
+            host = f"{host}:{parts.port}"
+        redacted = urlunsplit((parts.scheme, f"***@{host}", parts.path, parts.query, parts.fragment))
+        return redacted if "://" in url else redacted.split("://", 1)[1]
+    except ValueError:
+        return "***"
+
+
+class _RedactFilter(logging.Filter):
+    """Log mesajına yanlışlıkla düşen proxy kimlik bilgilerini maskeler."""
+
+    def __init__(self, secrets: list[str]):
+        super().__init__()
+        self.secrets = [s for s in secrets if s]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.secrets:
+            msg = record.getMessage()
+            for secret in self.secrets:
+                if secret in msg:
+                    msg = msg.replace(secret, redact_url(secret))
+            record.msg, record.args = msg, None
+        return True
+
+
+def setup_logging(level: str = LOG_LEVEL) -> logging.handlers.QueueListener:
+    """
+    Kuyruk tabanlı (non-blocking) loglamayı kurar.
+    İstek thread'leri sadece kuyruğa yazar; stderr'e yazma işi ayrı bir listener thread'inde yapılır.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    stream.addFilter(_RedactFilter([PROXY_URL, *PROXY_URLS]))
+
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(level)
+    log.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    return _log_listener
+
+
+setup_logging()
+
+# Parse havuzunun (PARSE_WORKERS) worker süreçleri: Firestore, değişiklik sink'leri ve havuzun kendisi kurulmaz
+IN_PARSE_WORKER = multiprocessing.parent_process() is not None
 
 # Firebase / Firestore başlatma
 def init_firestore():
@@ -55,19 +175,169 @@ def init_firestore():
     return firestore.client()
 
 
-try:
-    DB = init_firestore()
-except RuntimeError as e:
-    print(f"[HATA] Firebase Başlatılamadı: {e}", file=sys.stderr)
+if IN_PARSE_WORKER:
     DB = None
+else:
+    try:
+        DB = init_firestore()
+    except RuntimeError as e:
+        store_log.error("Firebase Başlatılamadı: %s", e)
+        DB = None
+
+# Cache politikası: bir verinin upstream'e hiç gidilmeden kullanılabileceği süre (TTL).
+# TTL dolunca sayfa çekilip hash ile doğrulanır; hash aynıysa yeniden parse edilmez.
+CACHE_POLICY_TTLS = json.loads(os.getenv("CACHE_POLICY_TTLS", "{}"))  # ör. {"injuries": 120}
+
+
+class CachePolicy:
+    """
+    Veri tipi, lig ve maça kalan süreye göre TTL (dakika) hesaplar.
+
+    Sıra: veri tipi tabanı -> lig katsayısı (katalogda leagues.<lig>.cache_factor) -> maç yakınlığı
+    bandı (maç öncesi kısa, maç sonrası puan/form kısa, maç çok uzaksa uzun). Bantlar katsayıdan
+    sonra uygulandığı için lig katsayısı maç öncesi üst sınırları uzatamaz. İstek override'ı
+    hepsinin önüne geçer. Her karar gerekçesiyle loglanır.
+    """
+
+    # Maç bilgisi yokken kullanılan taban TTL'ler (dakika)
+    BASE_TTLS = {
+        'squad': 1440,
+        'injuries': 360,
+        'suspensions': 360,
+        'suspensions_kader': 360,
+        'position': 360,
+        'form': 360,
+        'stats': 720,
+    }
+
+    # (maça kalan en fazla saat, {veri tipi: dakika}); ilk uyan bant kullanılır
+    PRE_MATCH_BANDS = [
+        (3, {'injuries': 15, 'suspensions': 15, 'suspensions_kader': 15, 'squad': 60}),
+        (24, {'injuries': 60, 'suspensions': 60, 'suspensions_kader': 60, 'squad': 360}),
+        (72, {'injuries': 180, 'suspensions': 180, 'suspensions_kader': 180}),
+    ]
+
+    # Maçtan sonraki POST_MATCH_HOURS saat içinde sonuçla değişen veriler
+    POST_MATCH_HOURS = 12
+    POST_MATCH_TTLS = {'position': 30, 'form': 30, 'stats': 120}
+
+    # Bilinen bir sonraki maç QUIET_HOURS'tan uzaksa TTL'ler QUIET_FACTOR ile uzatılır
+    QUIET_HOURS = 168
+    QUIET_FACTOR = 4
+
+    def __init__(self, base_ttls: dict | None = None):
+        self.base_ttls = dict(self.BASE_TTLS, **(base_ttls or {}))
+
+    def ttl(self, data_type: str, league_key: str | None = None, kickoff: datetime | None = None,
+            override: dict | None = None, now: datetime | None = None) -> tuple[float, str]:
+        """(TTL dakika, karar gerekçesi)"""
+        if override is not None:
+            value = override.get(data_type, override.get("*"))
+            if value is not None:
+                return float(value), "istek override"
+
+        ttl = float(self.base_ttls.get(data_type, 60))
+        reasons = [f"taban {ttl:g}"]
+
+        factor = float(LEAGUES.get((league_key or "").lower(), {}).get("cache_factor", 1))
+        if factor != 1:
+            ttl *= factor
+            reasons.append(f"lig {league_key} x{factor:g}")
+
+        if kickoff is not None:
+            hours = (kickoff - (now or datetime.now(timezone.utc))).total_seconds() / 3600
+            if hours < 0:
+                if -hours <= self.POST_MATCH_HOURS and data_type in self.POST_MATCH_TTLS:
+                    ttl = float(self.POST_MATCH_TTLS[data_type])
+                    reasons.append(f"maç sonrası {-hours:.1f}s")
+            elif hours > self.QUIET_HOURS:
+                ttl *= self.QUIET_FACTOR
+                reasons.append(f"maça {hours:.0f}s, x{self.QUIET_FACTOR}")
+            else:
+                for limit, band in self.PRE_MATCH_BANDS:
+                    if hours <= limit:
+                        if data_type in band:
+                            ttl = min(ttl, float(band[data_type]))
+                            reasons.append(f"maça {hours:.1f}s (≤{limit}s bandı)")
+                        break
+        return ttl, ", ".join(reasons)
+
+
+CACHE_POLICY = CachePolicy(CACHE_POLICY_TTLS)
+
+# İstek bazlı TTL override'ı ({veri tipi|"*": dakika}); Cache-Control başlığı veya gövdedeki cache_ttl
+_ttl_override = contextvars.ContextVar("ttl_override", default=None)
+
+
+class FixtureCalendar:
+    """İsteklerde gelen maç saatlerini (kickoff) takım başına tutar; CachePolicy maç yakınlığını buradan alır."""
+
+    def __init__(self):
+        self._kickoffs: Dict[str, List[datetime]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def note(self, team_doc: str, kickoff: str | datetime) -> None:
+        """Takımın maç saatini kaydeder (ISO string veya datetime; saat dilimi yoksa UTC)."""
+        if isinstance(kickoff, str):
+            kickoff = datetime.fromisoformat(kickoff)
+        if not isinstance(kickoff, datetime):
+            raise TypeError(f"kickoff ISO string veya datetime olmalı: {kickoff!r}")
+        if kickoff.tzinfo is None:
+            kickoff = kickoff.replace(tzinfo=timezone.utc)
+        horizon = datetime.now(timezone.utc) - timedelta(hours=CachePolicy.POST_MATCH_HOURS)
+        with self._lock:
+            kickoffs = [k for k in self._kickoffs[team_doc] if k >= horizon and k != kickoff]
+            self._kickoffs[team_doc] = sorted(kickoffs + [kickoff])
+
+    def next_kickoff(self, team_doc: str, now: datetime | None = None) -> datetime | None:
+        """Sıradaki (ya da POST_MATCH_HOURS içinde oynanmış) maçın saati."""
+        horizon = (now or datetime.now(timezone.utc)) - timedelta(hours=CachePolicy.POST_MATCH_HOURS)
+        with self._lock:
+            return next((k for k in self._kickoffs.get(team_doc, ()) if k >= horizon), None)
+
+
+FIXTURES = FixtureCalendar()
+
+
+def note_fixture(team_infos: List[dict], kickoff) -> None:
+    """İstekte kickoff verildiyse takımların maç saatini FIXTURES'a yazar; geçersiz değer loglanıp yok sayılır."""
+    if not kickoff:
+        return
+    if not isinstance(kickoff, (str, datetime)):
+        api_log.warning("Geçersiz kickoff yok sayıldı (%r): ISO tarih string'i olmalı", kickoff)
+        return
+    try:
+        for info in team_infos:
+            FIXTURES.note(info["name"].lower(), kickoff)
+    except (TypeError, ValueError) as e:
+        api_log.warning("Geçersiz kickoff yok sayıldı (%r): %s", kickoff, e)
+
+
+def requested_ttl_override() -> dict | None:
+    """
+    İsteğin TTL override'ı: Cache-Control: no-cache (veya max-age=N saniye) tüm veri tipleri için,
+    JSON gövdesindeki cache_ttl ({veri tipi: dakika}) tip bazında uygulanır.
+    """
+    override = {}
+    cache_control = request.cache_control
+    if cache_control.no_cache:
+        override["*"] = 0
+    elif cache_control.max_age is not None:
+        override["*"] = cache_control.max_age / 60
+    body = request.get_json(silent=True) if request.is_json else None
+    if isinstance(body, dict) and isinstance(body.get("cache_ttl"), dict):
+        override.update({k: v for k, v in body["cache_ttl"].items() if isinstance(v, (int, float))})
+    return override or None
+
 
 class CacheManager:
     """
     Her veri tipi için ayrı cache kontrolü yapan sınıf.
+    Veri CachePolicy TTL'i içindeyse upstream'e gidilmez (is_fresh); sonrasında
     HTML içeriğinden hash üretir ve değişiklik varsa scrape eder.
     """
     
-    # Her veri tipi için cache süresi (dakika cinsinden)
+    # Hash değişmese de yeniden scrape edilmeden önceki en uzun süre (dakika cinsinden)
     CACHE_DURATIONS = {
         'squad': 10080,         
         'injuries': 10080,        
@@ -78,8 +348,67 @@ class CacheManager:
         'stats': 4320,         
     }
     
-    def __init__(self, db):
+    def __init__(self, db, policy: CachePolicy | None = None):
         self.db = db
+        self.policy = policy or CACHE_POLICY
+        # Bu istek içinde çekilemeyen URL'ler (aynı URL'ye tekrar gidilmez)
+        self.failed_urls = set()
+        # Takım -> lig (bind_team) ve istek boyunca okunmuş cache_metadata dokümanları
+        self.leagues: Dict[str, str] = {}
+        self._metadata: Dict[str, dict] = {}
+    
+    def bind_team(self, team_name: str, league_key: str):
+        """TTL hesabında kullanılacak ligi takım için kaydeder."""
+        self.leagues[team_name] = league_key
+    
+    def get_metadata(self, team_name: str) -> dict:
+        """Takımın cache_metadata dokümanı (istek içinde bir kez okunur; yoksa boş dict)."""
+        if team_name not in self._metadata:
+            cache_doc = self.db.collection('cache_metadata').document(team_name).get()
+            self._metadata[team_name] = cache_doc.to_dict() if cache_doc.exists else {}
+        return self._metadata[team_name]
+    
+    def load_metadata(self, team_names: List[str]):
+        """Henüz okunmamış takımların cache_metadata dokümanlarını tek batch okumayla yükler."""
+        missing = [name for name in dict.fromkeys(team_names) if name not in self._metadata]
+        if not missing:
+            return
+        refs = [self.db.collection('cache_metadata').document(name) for name in missing]
+        found = {doc.id: doc.to_dict() for doc in self.db.get_all(refs) if doc.exists}
+        for name in missing:
+            self._metadata[name] = found.get(name) or {}
+    
+    def is_fresh(self, team_name: str, data_type: str) -> bool:
+        """
+        Veri CachePolicy TTL'i içinde doğrulanmışsa True (upstream'e hiç gidilmez, kayıtlı veri kullanılır).
+        """
+        try:
+            type_cache = self.get_metadata(team_name).get(data_type)
+            last_validated = type_cache and (type_cache.get('last_validated') or type_cache.get('last_update'))
+            if not last_validated:
+                return False
+            ttl, reason = self.policy.ttl(
+                data_type, self.leagues.get(team_name), FIXTURES.next_kickoff(team_name), _ttl_override.get())
+            age = (datetime.now(timezone.utc) - last_validated).total_seconds() / 60
+            fresh = age < ttl
+            cache_log.info("Politika %s/%s: TTL %.0f dk (%s), yaş %.0f dk -> %s",
+                           team_name, data_type, ttl, reason, age, "TAZE" if fresh else "doğrula")
+            return fresh
+        except Exception as e:
+            cache_log.error("Tazelik kontrolü başarısız (%s/%s): %s", team_name, data_type, e)
+            return False
+    
+    def _fetch(self, url: str) -> str:
+        """Sayfanın HTML'ini çeker; başarısız olursa URL'yi failed_urls'e işaretleyip hatayı yeniden fırlatır."""
+        try:
+            return fetch_html(url)
+        except Exception:
+            self.failed_urls.add(url)
+            raise
+    
+    def fetch_failed(self, url: str) -> bool:
+        """Bu URL bu istek içinde zaten çekilemediyse True."""
+        return url in self.failed_urls
     
     def get_content_hash(self, url: str, selector: str = None) -> str | None:
         """
@@ -93,27 +422,32 @@ class CacheManager:
             İçeriğin SHA256 hash'i veya hata durumunda None
         """
         try:
-            soup = get_soup(url)
-            
-            if selector:
-                content = soup.select_one(selector)
-                if not content:
-                    print(f"[CACHE] Seçici bulunamadı: {selector}", file=sys.stderr)
-                    return None
-                text = content.get_text(strip=True)
-            else:
-                text = soup.get_text(strip=True)
-            
-            # Whitespace'leri normalize et
-            normalized = re.sub(r'\s+', ' ', text).strip()
-            
-            # Hash oluştur
-            return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            return parse_html(self.content_hash, self._fetch(url), selector)
         
         except Exception as e:
-            print(f"[CACHE HATA] Hash oluşturulamadı ({url}): {e}", file=sys.stderr)
+            cache_log.error("Hash oluşturulamadı (%s): %s", url, e)
             return None
     
+    @staticmethod
+    def content_hash(html: str, selector: str = None) -> str | None:
+        """HTML metninin (selector verilirse sadece o bölümün) hash'i; parse havuzunda da çalışır."""
+        soup = BeautifulSoup(html, "lxml")
+        
+        if selector:
+            content = soup.select_one(selector)
+            if not content:
+                cache_log.warning("Seçici bulunamadı: %s", selector)
+                return None
+            text = content.get_text(strip=True)
+        else:
+            text = soup.get_text(strip=True)
+        
+        # Whitespace'leri normalize et
+        normalized = re.sub(r'\s+', ' ', text).strip()
+        
+        # Hash oluştur
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    
     def should_scrape(self, team_name: str, data_type: str, current_hash: str) -> bool:
         """
         Cache kontrolü yapar ve scrape gerekip gerekmediğini döner.
@@ -128,18 +462,15 @@ class CacheManager:
         """
         try:
             # Firestore'dan cache metadata'yı çek
-            cache_ref = self.db.collection('cache_metadata').document(team_name)
-            cache_doc = cache_ref.get()
+            cache_data = self.get_metadata(team_name)
             
-            if not cache_doc.exists:
-                print(f"[CACHE] İlk scrape: {team_name}/{data_type}", file=sys.stderr)
+            if not cache_data:
+                cache_log.info("İlk scrape: %s/%s", team_name, data_type)
                 return True
             
-            cache_data = cache_doc.to_dict()
-            
             # Bu veri tipi için cache bilgisi var mı?
             if data_type not in cache_data:
-                print(f"[CACHE] Yeni veri tipi: {team_name}/{data_type}", file=sys.stderr)
+                cache_log.info("Yeni veri tipi: %s/%s", team_name, data_type)
                 return True
             
             type_cache = cache_data[data_type]
@@ -148,7 +479,7 @@ class CacheManager:
             
             # Hash değişmiş mi?
             if current_hash != last_hash:
-                print(f"[CACHE] İçerik değişmiş: {team_name}/{data_type}", file=sys.stderr)
+                cache_log.info("İçerik değişmiş: %s/%s", team_name, data_type)
                 return True
             
             # Cache süresi dolmuş mu?
@@ -158,14 +489,15 @@ class CacheManager:
                 expiry_time = last_update + timedelta(minutes=cache_duration)
                 
                 if now> expiry_time:
-                    print(f"[CACHE] Süresi dolmuş: {team_name}/{data_type} ({cache_duration} dk)", file=sys.stderr)
+                    cache_log.info("Süresi dolmuş: %s/%s (%s dk)", team_name, data_type, cache_duration)
                     return True
             
-            print(f"[CACHE HIT] ✓ Kullanılıyor: {team_name}/{data_type}", file=sys.stderr)
+            cache_log.info("HIT ✓ Kullanılıyor: %s/%s", team_name, data_type)
+            self.mark_validated(team_name, data_type)
             return False
         
         except Exception as e:
-            print(f"[CACHE HATA] Kontrol başarısız ({team_name}/{data_type}): {e}", file=sys.stderr)
+            cache_log.error("Kontrol başarısız (%s/%s): %s", team_name, data_type, e)
             # Hata durumunda güvenli taraf: scrape et
             return True
 
@@ -174,49 +506,54 @@ class CacheManager:
         Suspension sayfası için özel hash - sadece cezalı oyuncu isimlerini hashler.
         """
         try:
-            soup = get_soup(url)
-
-            # Cezalı oyuncuları bul
-            suspended_players = []
-
-            for row in soup.find_all("tr", class_=["odd", "even"]):
-                # ← DEĞİŞTİ: Hem eski hem yeni yapıyı ara
-                ausfall_span = row.find("span", class_="ausfall-table") or row.find("span", class_="svg-icon")
-
-                if ausfall_span:
-                    # Oyuncu adını bul
-                    name_td = row.find("td", class_="hauptlink")
-                    if name_td:
-                        # <a> tag'i içindeki ismi al
-                        name_link = name_td.find("a", href=True)
-                        if name_link:
-                            # Metni al (span hariç)
-                            player_name = "".join(name_link.find_all(string=True, recursive=False)).strip()
-
-                            # Eğer boşsa, tüm text'i al
-                            if not player_name:
-                                player_name = name_link.get_text(strip=True)
-
-                            # Ceza bilgisini al
-                            ceza_bilgi = ausfall_span.get("title", "")
-                            suspended_players.append(f"{player_name}:{ceza_bilgi}")
-
-            # Oyuncuları sırala
-            suspended_players.sort()
-
-            # Boş liste için özel işaret
-            if not suspended_players:
-                hash_data = "NO_SUSPENSIONS"
-            else:
-                hash_data = "|".join(suspended_players)
-
-            print(f"[SUSPENSION HASH] Cezalılar: {hash_data[:100]}", file=sys.stderr)
-
-            return hashlib.sha256(hash_data.encode('utf-8')).hexdigest()
+            return parse_html(self.suspension_hash, self._fetch(url))
 
         except Exception as e:
-            print(f"[CACHE HATA] Suspension hash oluşturulamadı: {e}", file=sys.stderr)
+            cache_log.error("Suspension hash oluşturulamadı: %s", e)
             return None
+
+    @staticmethod
+    def suspension_hash(html: str) -> str:
+        """Cezalı oyuncu adı ve ceza bilgilerinin sıralı listesinin hash'i; parse havuzunda da çalışır."""
+        soup = BeautifulSoup(html, "lxml")
+
+        # Cezalı oyuncuları bul
+        suspended_players = []
+
+        for row in soup.find_all("tr", class_=["odd", "even"]):
+            # ← DEĞİŞTİ: Hem eski hem yeni yapıyı ara
+            ausfall_span = row.find("span", class_="ausfall-table") or row.find("span", class_="svg-icon")
+
+            if ausfall_span:
+                # Oyuncu adını bul
+                name_td = row.find("td", class_="hauptlink")
+                if name_td:
+                    # <a> tag'i içindeki ismi al
+                    name_link = name_td.find("a", href=True)
+                    if name_link:
+                        # Metni al (span hariç)
+                        player_name = "".join(name_link.find_all(string=True, recursive=False)).strip()
+
+                        # Eğer boşsa, tüm text'i al
+                        if not player_name:
+                            player_name = name_link.get_text(strip=True)
+
+                        # Ceza bilgisini al
+                        ceza_bilgi = ausfall_span.get("title", "")
+                        suspended_players.append(f"{player_name}:{ceza_bilgi}")
+
+        # Oyuncuları sırala
+        suspended_players.sort()
+
+        # Boş liste için özel işaret
+        if not suspended_players:
+            hash_data = "NO_SUSPENSIONS"
+        else:
+            hash_data = "|".join(suspended_players)
+
+        cache_log.debug("Suspension hash cezalılar: %s", hash_data[:100])
+
+        return hashlib.sha256(hash_data.encode('utf-8')).hexdigest()
     
     def update_cache(self, team_name: str, data_type: str, content_hash: str):
         """
@@ -230,348 +567,1328 @@ class CacheManager:
         try:
             cache_ref = self.db.collection('cache_metadata').document(team_name)
             now = datetime.now(timezone.utc)
-            cache_ref.set({
-                data_type: {
-                    'hash': content_hash,
-                    'last_update': now,
-                    'last_scraped': now.isoformat()
-                }
-            }, merge=True)
+            entry = {
+                'hash': content_hash,
+                'last_update': now,
+                'last_validated': now,
+                'last_scraped': now.isoformat()
+            }
+            cache_ref.set({data_type: entry}, merge=True)
+            if team_name in self._metadata:
+                self._metadata[team_name][data_type] = entry
             
-            print(f"[CACHE] ✓ Güncellendi: {team_name}/{data_type}", file=sys.stderr)
+            cache_log.info("✓ Güncellendi: %s/%s", team_name, data_type)
         
         except Exception as e:
-            print(f"[CACHE HATA] Güncellenemedi ({team_name}/{data_type}): {e}", file=sys.stderr)
-
-
-# Takım Sözlüğü (Değiştirilmedi)
-TEAMS = {
-    "chapecoense": {"name": "Chapecoense", "slug": "chapecoense", "id": "17776"},
-    "remo": {"name": "Remo", "slug": "clube-do-remo-pa-", "id": "10997"},
-    "coritiba": {"name": "Coritiba", "slug": "coritiba-fc", "id": "776"},
-    "athletico": {"name": "Athletico", "slug": "club-athletico-paranaense", "id": "679"},
-    "tondela": {"name": "Tondela", "slug": "cd-tondela", "id": "7179"},
-    "moreirense": {"name": "Moreirense", "slug": "moreirense-fc", "id": "979"},
-    "santa clara": {"name": "Santa Clara", "slug": "cd-santa-clara", "id": "2423"},
-    "nacional": {"name": "Nacional", "slug": "cd-nacional", "id": "982"},
-    "avs": {"name": "AVS", "slug": "avs-futebol-sad", "id": "110302"},
-    "porto": {"name": "Porto", "slug": "fc-porto", "id": "720"},
-    "rio ave": {"name": "Rio Ave", "slug": "rio-ave-fc", "id": "2425"},
-    "sporting": {"name": "Sporting", "slug": "sporting-lissabon", "id": "336"},
-    "benfica": {"name": "Benfica", "slug": "benfica-lissabon", "id": "294"},
-    "braga": {"name": "Braga", "slug": "sc-braga", "id": "1075"},
-    "gil vicente": {"name": "Gil Vicente", "slug": "gil-vicente-fc", "id": "2424"},
-    "arouca": {"name": "Arouca", "slug": "fc-arouca", "id": "8024"},
-    "vitória sc": {"name": "Vitória SC", "slug": "vitoria-guimaraes-sc", "id": "2420"},
-    "casa pia": {"name": "Casa Pia", "slug": "casa-pia-ac", "id": "3268"},
-    "alverca": {"name": "Alverca", "slug": "fc-alverca", "id": "2521"},
-    "estoril": {"name": "Estoril", "slug": "gd-estoril-praia", "id": "1465"},
-    "estrela": {"name": "Estrela", "slug": "cf-estrela-amadora-sad", "id": "2431"},
-    "famalicão": {"name": "Famalicão", "slug": "fc-famalicao", "id": "3329"},
-    "heracles": {"name": "Heracles", "slug": "heracles-almelo", "id": "1304"},
-    "volendam": {"name": "Volendam", "slug": "fc-volendam", "id": "724"},
-    "telstar": {"name": "Telstar", "slug": "sc-telstar", "id": "1434"},
-    "excelsior": {"name": "Excelsior", "slug": "sbv-excelsior-rotterdam", "id": "798"},
-    "nac breda": {"name": "NAC Breda", "slug": "nac-breda", "id": "132"},
-    "pec zwolle": {"name": "PEC Zwolle", "slug": "pec-zwolle", "id": "1269"},
-    "go ahead": {"name": "Go Ahead", "slug": "go-ahead-eagles-deventer", "id": "1435"},
-    "heerenveen": {"name": "Heerenveen", "slug": "sc-heerenveen", "id": "306"},
-    "sparta": {"name": "Sparta", "slug": "sparta-rotterdam", "id": "468"},
-    "f. sittard": {"name": "F. Sittard", "slug": "fortuna-sittard", "id": "385"},
-    "utrecht": {"name": "Utrecht", "slug": "fc-utrecht", "id": "200"},
-    "twente": {"name": "Twente", "slug": "fc-twente-enschede", "id": "317"},
-    "nec nijmegen": {"name": "NEC Nijmegen", "slug": "nec-nijmegen", "id": "467"},
-    "groningen": {"name": "Groningen", "slug": "fc-groningen", "id": "202"},
-    "az alkmaar": {"name": "AZ Alkmaar", "slug": "az-alkmaar", "id": "1090"},
-    "ajax": {"name": "Ajax", "slug": "ajax-amsterdam", "id": "610"},
-    "psv": {"name": "PSV", "slug": "psv-eindhoven", "id": "383"},
-    "feyenoord": {"name": "Feyenoord", "slug": "feyenoord-rotterdam", "id": "234"},
-    "lecce": {"name": "Lecce", "slug": "us-lecce", "id": "1005"},
-    "cremonese": {"name": "Cremonese", "slug": "us-cremonese", "id": "2239"},
-    "cagliari": {"name": "Cagliari", "slug": "cagliari-calcio", "id": "1390"},
-    "verona": {"name": "Verona", "slug": "hellas-verona", "id": "276"},
-    "pisa": {"name": "Pisa", "slug": "ac-pisa-1909", "id": "4172"},
-    "genoa": {"name": "Genoa", "slug": "genua-cfc", "id": "252"},
-    "udinese": {"name": "Udinese", "slug": "udinese-calcio", "id": "410"},
-    "sassuolo": {"name": "Sassuolo", "slug": "us-sassuolo", "id": "6574"},
-    "parma": {"name": "Parma", "slug": "parma-calcio-1913", "id": "130"},
-    "torino": {"name": "Torino", "slug": "fc-turin", "id": "416"},
-    "como": {"name": "Como", "slug": "como-1907", "id": "1047"},
-    "bologna": {"name": "Bologna", "slug": "fc-bologna", "id": "1025"},
-    "lazio": {"name": "Lazio", "slug": "lazio-rom", "id": "398"},
-    "fiorentina": {"name": "Fiorentina", "slug": "ac-florenz", "id": "430"},
-    "roma": {"name": "Roma", "slug": "as-rom", "id": "12"},
-    "atalanta": {"name": "Atalanta", "slug": "atalanta-bergamo", "id": "800"},
-    "napoli": {"name": "Napoli", "slug": "ssc-neapel", "id": "6195"},
-    "milan": {"name": "Milan", "slug": "ac-mailand", "id": "5"},
-    "juventus": {"name": "Juventus", "slug": "juventus-turin", "id": "506"},
-    "inter": {"name": "Inter", "slug": "inter-mailand", "id": "46"},
-    "al-hazem": {"name": "Al-Hazem", "slug": "al-hazm", "id": "9131"},
-    "al-najma": {"name": "Al-Najma", "slug": "al-najma", "id": "32328"},
-    "neom sc": {"name": "NEOM SC", "slug": "al-suqoor", "id": "34911"},
-    "al-okhdood": {"name": "Al-Okhdood", "slug": "al-akhdoud-club", "id": "71665"},
-    "damac": {"name": "Damac", "slug": "damac-fc", "id": "50532"},
-    "al-fayha": {"name": "Al-Fayha", "slug": "al-fayha-fc", "id": "50531"},
-    "al-khaleej": {"name": "Al-Khaleej", "slug": "al-khaleej", "id": "6070"},
-    "al-riyadh": {"name": "Al-Riyadh", "slug": "al-riad", "id": "31008"},
-    "al-fateh": {"name": "Al-Fateh", "slug": "al-fateh", "id": "27221"},
-    "al-kholood": {"name": "Al-Kholood", "slug": "al-kholood", "id": "91427"},
-    "al-taawoun": {"name": "Al-Taawoun", "slug": "al-taawoun-fc", "id": "28844"},
-    "al-ettifaq": {"name": "Al-Ettifaq", "slug": "al-ettifaq", "id": "7732"},
-    "al-shabab": {"name": "Al-Shabab", "slug": "al-shabab-riad", "id": "9840"},
-    "al-ahli": {"name": "Al-Ahli", "slug": "al-ahli-dschidda", "id": "18487"},
-    "al-qadsiah": {"name": "Al-Qadsiah", "slug": "al-qadisiyah-fc", "id": "26069"},
-    "al-nassr": {"name": "Al-Nassr", "slug": "al-nasr-riad", "id": "18544"},
-    "al-hilal": {"name": "Al-Hilal", "slug": "al-hilal-riad", "id": "1114"},
-    "al-ittihad": {"name": "Al-Ittihad", "slug": "al-ittihad-dschidda", "id": "8023"},
-    "sport recife": {"name": "Sport Recife", "slug": "sport-club-do-recife", "id": "8718"},
-    "juventude": {"name": "Juventude", "slug": "esporte-clube-juventude", "id": "10492"},
-    "vasco": {"name": "Vasco", "slug": "vasco-da-gama-rio-de-janeiro", "id": "978"},
-    "fortaleza": {"name": "Fortaleza", "slug": "fortaleza-esporte-clube", "id": "10870"},
-    "vitória": {"name": "Vitória", "slug": "esporte-clube-vitoria", "id": "2125"},
-    "grêmio": {"name": "Grêmio", "slug": "gremio-porto-alegre", "id": "210"},
-    "santos": {"name": "Santos", "slug": "fc-santos", "id": "221"},
-    "corinthians": {"name": "Corinthians", "slug": "corinthians-sao-paulo", "id": "199"},
-    "ceará sc": {"name": "Ceará SC", "slug": "ceara-sporting-club", "id": "2029"},
-    "sc inter": {"name": "SC Inter", "slug": "sc-internacional-porto-alegre", "id": "6600"},
-    "atlético-mg": {"name": "Atlético-MG", "slug": "clube-atletico-mineiro", "id": "330"},
-    "fluminense": {"name": "Fluminense", "slug": "fluminense-rio-de-janeiro", "id": "2462"},
-    "bragantino": {"name": "Bragantino", "slug": "red-bull-bragantino", "id": "8793"},
-    "são paulo": {"name": "São Paulo", "slug": "fc-sao-paulo", "id": "585"},
-    "mirassol": {"name": "Mirassol", "slug": "mirassol-futebol-clube-sp-", "id": "3876"},
-    "botafogo": {"name": "Botafogo", "slug": "botafogo-rio-de-janeiro", "id": "537"},
-    "bahia": {"name": "Bahia", "slug": "esporte-clube-bahia", "id": "10010"},
-    "palmeiras": {"name": "Palmeiras", "slug": "se-palmeiras-sao-paulo", "id": "1023"},
-    "cruzeiro": {"name": "Cruzeiro", "slug": "ec-cruzeiro-belo-horizonte", "id": "609"},
-    "flamengo": {"name": "Flamengo", "slug": "flamengo-rio-de-janeiro", "id": "614"},
-    "psg": {"name": "PSG", "slug": "fc-paris-saint-germain", "id": "583"},
-    "marsilya": {"name": "Marsilya", "slug": "olympique-marseille", "id": "244"},
-    "monaco": {"name": "Monaco", "slug": "as-monaco", "id": "162"},
-    "nice": {"name": "Nice", "slug": "ogc-nizza", "id": "417"},
-    "lille": {"name": "Lille", "slug": "losc-lille", "id": "1082"},
-    "lyon": {"name": "Lyon", "slug": "olympique-lyon", "id": "1041"},
-    "strasbourg": {"name": "Strasbourg", "slug": "rc-strassburg-alsace", "id": "667"},
-    "lens": {"name": "Lens", "slug": "rc-lens", "id": "826"},
-    "brest": {"name": "Brest", "slug": "stade-brest-29", "id": "3911"},
-    "toulouse": {"name": "Toulouse", "slug": "fc-toulouse", "id": "415"},
-    "aj auxerre": {"name": "AJ Auxerre", "slug": "aj-auxerre", "id": "290"},
-    "rennes": {"name": "Rennes", "slug": "fc-stade-rennes", "id": "273"},
-    "nantes": {"name": "Nantes", "slug": "fc-nantes", "id": "995"},
-    "angers": {"name": "Angers", "slug": "sco-angers", "id": "1420"},
-    "le havre": {"name": "Le Havre", "slug": "ac-le-havre", "id": "738"},
-    "lorient": {"name": "Lorient", "slug": "fc-lorient", "id": "1158"},
-    "paris fc": {"name": "Paris FC", "slug": "paris-fc", "id": "10004"},
-    "metz": {"name": "Metz", "slug": "fc-metz", "id": "347"},
-    "hoffenheim": {"name": "Hoffenheim", "slug": "tsg-1899-hoffenheim", "id": "533"},
-    "heidenheim": {"name": "Heidenheim", "slug": "1-fc-heidenheim-1846", "id": "2036"},
-    "köln": {"name": "Köln", "slug": "1-fc-koln", "id": "3"},
-    "hamburg": {"name": "Hamburg", "slug": "hamburger-sv", "id": "41"},
-    "st. pauli": {"name": "St. Pauli", "slug": "fc-st-pauli", "id": "35"},
-    "u. berlin": {"name": "U. Berlin", "slug": "1-fc-union-berlin", "id": "89"},
-    "augsburg": {"name": "Augsburg", "slug": "fc-augsburg", "id": "167"},
-    "wolfsburg": {"name": "Wolfsburg", "slug": "vfl-wolfsburg", "id": "82"},
-    "stuttgart": {"name": "Stuttgart", "slug": "vfb-stuttgart", "id": "79"},
-    "gladbach": {"name": "Gladbach", "slug": "borussia-monchengladbach", "id": "18"},
-    "bremen": {"name": "Bremen", "slug": "sv-werder-bremen", "id": "86"},
-    "leipzig": {"name": "Leipzig", "slug": "rasenballsport-leipzig", "id": "23826"},
-    "mainz": {"name": "Mainz", "slug": "1-fsv-mainz-05", "id": "39"},
-    "freiburg": {"name": "Freiburg", "slug": "sc-freiburg", "id": "60"},
-    "frankfurt": {"name": "Frankfurt", "slug": "eintracht-frankfurt", "id": "24"},
-    "leverkusen": {"name": "Leverkusen", "slug": "bayer-04-leverkusen", "id": "15"},
-    "real oviedo": {"name": "Real Oviedo", "slug": "real-oviedo", "id": "2497"},
-    "elche": {"name": "Elche", "slug": "fc-elche", "id": "1531"},
-    "levante": {"name": "Levante", "slug": "ud-levante", "id": "3368"},
-    "espanyol": {"name": "Espanyol", "slug": "espanyol-barcelona", "id": "714"},
-    "girona": {"name": "Girona", "slug": "fc-girona", "id": "12321"},
-    "alavés": {"name": "Alavés", "slug": "deportivo-alaves", "id": "1108"},
-    "getafe": {"name": "Getafe", "slug": "fc-getafe", "id": "3709"},
-    "valencia": {"name": "Valencia", "slug": "fc-valencia", "id": "1049"},
-    "sociedad": {"name": "Sociedad", "slug": "real-sociedad-san-sebastian", "id": "681"},
-    "mallorca": {"name": "Mallorca", "slug": "rcd-mallorca", "id": "237"},
-    "osasuna": {"name": "Osasuna", "slug": "ca-osasuna", "id": "331"},
-    "celta vigo": {"name": "Celta Vigo", "slug": "celta-vigo", "id": "940"},
-    "rayo": {"name": "Rayo", "slug": "rayo-vallecano", "id": "367"},
-    "real betis": {"name": "Real Betis", "slug": "real-betis-sevilla", "id": "150"},
-    "villarreal": {"name": "Villarreal", "slug": "fc-villarreal", "id": "1050"},
-    "athletic bilbao": {"name": "Athletic Bilbao", "slug": "athletic-bilbao", "id": "621"},
-    "everton": {"name": "Everton", "slug": "fc-everton", "id": "29"},
-    "leeds": {"name": "Leeds", "slug": "leeds-united", "id": "399"},
-    "brentford": {"name": "Brentford", "slug": "fc-brentford", "id": "1148"},
-    "nottingham": {"name": "Nottingham", "slug": "nottingham-forest", "id": "703"},
-    "crystal palace": {"name": "Crystal Palace", "slug": "crystal-palace", "id": "873"},
-    "wolves": {"name": "Wolves", "slug": "wolverhampton-wanderers", "id": "543"},
-    "burnley": {"name": "Burnley", "slug": "fc-burnley", "id": "1132"},
-    "tottenham": {"name": "Tottenham", "slug": "tottenham-hotspur", "id": "148"},
-    "west ham": {"name": "West Ham", "slug": "west-ham-united", "id": "379"},
-    "sunderland": {"name": "Sunderland", "slug": "afc-sunderland", "id": "289"},
-    "fulham": {"name": "Fulham", "slug": "fc-fulham", "id": "931"},
-    "brighton": {"name": "Brighton", "slug": "brighton-amp-hove-albion", "id": "1237"},
-    "newcastle": {"name": "Newcastle", "slug": "newcastle-united", "id": "762"},
-    "aston villa": {"name": "Aston Villa", "slug": "aston-villa", "id": "405"},
-    "liverpool": {"name": "Liverpool", "slug": "fc-liverpool", "id": "31"},
-    "bournemouth": {"name": "Bournemouth", "slug": "afc-bournemouth", "id": "989"},
-    "barcelona": {"name": "Barcelona", "slug": "fc-barcelona", "id": "131"},
-    "real madrid": {"name": "Real Madrid", "slug": "real-madrid", "id": "418"},
-    "man united": {"name": "Man United", "slug": "manchester-united", "id": "985"},
-    "atletico madrid": {"name": "Atletico Madrid", "slug": "atletico-madrid", "id": "13"},
-    "man city": {"name": "Man City", "slug": "manchester-city", "id": "281"},
-    "chelsea": {"name": "Chelsea", "slug": "chelsea", "id": "631"},
-    "dortmund": {"name": "Dortmund", "slug": "borussia-dortmund", "id": "16"},
-    "sevilla": {"name": "Sevilla", "slug": "fc-sevilla", "id": "368"},
-    "arsenal": {"name": "Arsenal", "slug": "fc-arsenal", "id": "11"},
-    "bayern münih": {"name": "Bayern Münih", "slug": "fc-bayern-munchen", "id": "27"},
-    "galatasaray": {"name": "Galatasaray", "slug": "galatasaray-istanbul", "id": "141"},
-    "fenerbahçe": {"name": "Fenerbahçe", "slug": "fenerbahce-istanbul", "id": "36"},
-    "beşiktaş": {"name": "Beşiktaş", "slug": "besiktas-istanbul", "id": "114"},
-    "trabzonspor": {"name": "Trabzonspor", "slug": "trabzonspor", "id": "449"},
-    "göztepe": {"name": "Göztepe", "slug": "goztepe", "id": "1467"},
-    "başakşehir": {"name": "Başakşehir", "slug": "istanbul-basaksehir-fk", "id": "6890"},
-    "ç. rizespor": {"name": "Ç. Rizespor", "slug": "caykur-rizespor", "id": "126"},
-    "samsunspor": {"name": "Samsunspor", "slug": "samsunspor", "id": "152"},
-    "kasımpaşa": {"name": "Kasımpaşa", "slug": "kasimpasa", "id": "10484"},
-    "eyüpspor": {"name": "Eyüpspor", "slug": "eyupspor", "id": "7160"},
-    "alanyaspor": {"name": "Alanyaspor", "slug": "alanyaspor", "id": "11282"},
-    "antalyaspor": {"name": "Antalyaspor", "slug": "antalyaspor", "id": "589"},
-    "gaziantep fk": {"name": "Gaziantep FK", "slug": "gaziantep-fk", "id": "2832"},
-    "konyaspor": {"name": "Konyaspor", "slug": "konyaspor", "id": "2293"},
-    "kayserispor": {"name": "Kayserispor", "slug": "kayserispor", "id": "3205"},
-    "karagümrük": {"name": "Karagümrük", "slug": "fatih-karagumruk", "id": "6646"},
-    "kocaelispor": {"name": "Kocaelispor", "slug": "kocaelispor", "id": "120"},
-    "gençlerbirliği": {"name": "Gençlerbirliği", "slug": "genclerbirligi-ankara", "id": "820"},
-}
+            cache_log.error("Güncellenemedi (%s/%s): %s", team_name, data_type, e)
+    
+    def mark_validated(self, team_name: str, data_type: str):
+        """Hash aynı çıktı: TTL penceresini yeniden başlatır (last_update, yani yeniden scrape zamanı değişmez)."""
+        try:
+            now = datetime.now(timezone.utc)
+            self.db.collection('cache_metadata').document(team_name).set(
+                {data_type: {'last_validated': now}}, merge=True)
+            self._metadata.get(team_name, {}).get(data_type, {})['last_validated'] = now
+        except Exception as e:
+            cache_log.error("Doğrulama zamanı yazılamadı (%s/%s): %s", team_name, data_type, e)
+
+
+# Takım/lig kataloğu: catalog.json'dan yüklenir ve dosya değiştiğinde yeniden yüklenir
+# (load_catalog / maybe_reload_catalog). Yeni takımlar discover_teams.py ile eklenebilir.
+CATALOG_PATH = os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json"))
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "30"))
+
+# Takım Sözlüğü (anahtar -> name/slug/id/league) ve lig sözlüğü (anahtar -> name/slug/code)
+TEAMS: Dict[str, dict] = {}
+LEAGUES: Dict[str, dict] = {}
+
+
+def fold_name(text: str) -> str:
+    """Aksanları/noktalamayı atıp küçük harfe çevirir: 'Ç. Rizespor' → 'c rizespor', 'Bayern Münih' → 'bayern munih'."""
+    text = unicodedata.normalize("NFKD", text.replace("ı", "i").replace("İ", "I"))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+class TeamRegistry:
+    """
+    TEAMS üzerinde önceden hesaplanmış indeksler.
+
+    - anahtar, aksansız takma adlar (anahtar, görünen ad, slug) ve transfermarkt id ile O(1) çözümleme
+    - takım → lig ve lig → takımlar
+    - bulunamayan anahtarlar için difflib ile yakın eşleşme önerileri
+    """
+
+    def __init__(self, teams: Dict[str, dict]):
+        self.teams = teams
+        self.by_alias: Dict[str, str] = {}
+        self.by_id: Dict[str, str] = {}
+        self.by_league: Dict[str, List[str]] = defaultdict(list)
+        ambiguous = set()
+        for key, info in teams.items():
+            self.by_id[info["id"]] = key
+            if info.get("league"):
+                self.by_league[info["league"]].append(key)
+            for alias in {fold_name(key), fold_name(info["name"]), fold_name(info["slug"])}:
+                if alias in self.by_alias and self.by_alias[alias] != key:
+                    ambiguous.add(alias)
+                self.by_alias.setdefault(alias, key)
+        # Birden fazla takıma işaret eden takma adlar (anahtar olmadıkça) kullanılmaz
+        for alias in ambiguous - {fold_name(k) for k in teams}:
+            del self.by_alias[alias]
+        self._aliases = list(self.by_alias)
+
+    def resolve_key(self, team_key: str) -> str | None:
+        """Anahtar, takma ad veya transfermarkt id'sinden TEAMS anahtarını bulur."""
+        key = team_key.strip().lower()
+        if key in self.teams:
+            return key
+        return self.by_alias.get(fold_name(key)) or self.by_id.get(key)
+
+    def suggest(self, team_key: str, limit: int = 3) -> List[str]:
+        """Bulunamayan anahtar için en yakın takım anahtarları."""
+        matches = difflib.get_close_matches(fold_name(team_key), self._aliases, n=limit * 3, cutoff=0.6)
+        return list(dict.fromkeys(self.by_alias[m] for m in matches))[:limit]
+
+    def league_of(self, team_key: str) -> str | None:
+        key = self.resolve_key(team_key)
+        return self.teams[key].get("league") if key else None
+
+
+TEAM_REGISTRY = TeamRegistry(TEAMS)
+
+_catalog_mtime = None
+_catalog_checked = 0.0
+_catalog_lock = threading.Lock()
+
+
+def load_catalog(path: str | None = None) -> None:
+    """
+    Kataloğu okur, doğrular ve TEAMS, LEAGUES, TEAM_REGISTRY'yi tek seferde değiştirir.
+    Hatalı dosyada ValueError/KeyError/OSError fırlatır; mevcut katalog değişmez.
+    """
+    global TEAMS, LEAGUES, TEAM_REGISTRY, _catalog_mtime
+    path = path or CATALOG_PATH
+    mtime = os.path.getmtime(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    leagues = {key.lower(): league for key, league in data["leagues"].items()}
+    teams = {}
+    for key, info in data["teams"].items():
+        missing = {"name", "slug", "id"} - set(info)
+        if missing:
+            raise ValueError(f"Katalogda {key} için eksik alanlar: {sorted(missing)}")
+        if info.get("league") and info["league"] not in leagues:
+            raise ValueError(f"Katalogda {key} bilinmeyen lige bağlı: {info['league']}")
+        teams[key.lower()] = info
+    registry = TeamRegistry(teams)
+
+    TEAMS, LEAGUES, TEAM_REGISTRY = teams, leagues, registry
+    _catalog_mtime = mtime
+    log.info("Katalog yüklendi: %d takım, %d lig (%s)", len(teams), len(leagues), path)
+
+
+def maybe_reload_catalog() -> None:
+    """Katalog dosyası değiştiyse yeniden yükler (en fazla CATALOG_RELOAD_INTERVAL saniyede bir kontrol)."""
+    global _catalog_checked
+    if time.monotonic() - _catalog_checked < CATALOG_RELOAD_INTERVAL:
+        return
+    with _catalog_lock:
+        if time.monotonic() - _catalog_checked < CATALOG_RELOAD_INTERVAL:
+            return
+        _catalog_checked = time.monotonic()
+        try:
+            if os.path.getmtime(CATALOG_PATH) != _catalog_mtime:
+                load_catalog()
+        except (OSError, ValueError, KeyError) as e:
+            log.error("Katalog yeniden yüklenemedi, mevcut katalog kullanılıyor: %s", e)
+
+
+load_catalog()
+
+
+def infer_league(home_key: str, away_key: str) -> str | None:
+    """İki takım aynı ligdeyse o ligin anahtarını döner (league_key verilmediğinde kullanılır)."""
+    leagues = {TEAM_REGISTRY.league_of(home_key), TEAM_REGISTRY.league_of(away_key)}
+    return leagues.pop() if len(leagues) == 1 else None
 
 
 def get_team_info(team_key: str) -> dict:
-    key = team_key.lower()
-    if key not in TEAMS:
-        raise ValueError(f"{team_key} takımı bulunamadı. Geçerli takımlar: {list(TEAMS.keys())}")
+    key = TEAM_REGISTRY.resolve_key(team_key)
+    if key is None:
+        suggestions = TEAM_REGISTRY.suggest(team_key)
+        hint = f" Bunu mu demek istediniz: {', '.join(suggestions)}?" if suggestions else ""
+        raise ValueError(f"{team_key} takımı bulunamadı.{hint}")
     return TEAMS[key]
 
-def get_soup(url: str) -> BeautifulSoup:
-    """Verilen URL'den HTML çekip BeautifulSoup objesine dönüştürür (Proxy kullanarak)."""
+TM_BASE = "https://www.transfermarkt.com.tr"
 
-    # Proxy kullanılıp kullanılmadığını logla
-    if PROXIES:
-        print(f"[UYARI] Proxy kullanılıyor: {PROXY_URL}", file=sys.stderr)
+# Sabit sezon (ör. "2025"); boşsa tarihten hesaplanır (transfermarkt saison_id = sezonun başladığı yıl)
+SEASON_ID = os.getenv("SEASON_ID", "")
+SEASON_START_MONTH = 7
 
-    res = requests.get(url, proxies=PROXIES, impersonate="chrome120", timeout=18)
-    res.raise_for_status()
-    return BeautifulSoup(res.text, "lxml")
 
-def extract_first_int(s: str) -> int:
-    """Bir string içindeki ilk tam sayıyı ayıkla. Yoksa 0 döner."""
-    if not s:
-        return 0
-    s = s.replace("'", "").replace(".", "").replace(",", "").strip()
-    m = re.search(r'(\d+)', s)
-    return int(m.group(1)) if m else 0
+def season_id_for(when: datetime) -> int:
+    """Verilen tarihin düştüğü sezonun transfermarkt saison_id'si (Temmuz'da yeni sezon başlar)."""
+    return when.year if when.month >= SEASON_START_MONTH else when.year - 1
 
-def scrape_stats(team_slug: str, team_id: str) -> List[dict]:
-    """Oyuncu istatistiklerini (oynadığı maç ve süre) çeker."""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/leistungsdaten/verein/{team_id}"
+
+def current_season_id(when: datetime | None = None) -> int:
+    """Scrape edilen sezon: SEASON_ID verilmişse o, yoksa when'in (varsayılan: şimdi) sezonu."""
+    return int(SEASON_ID) if SEASON_ID else season_id_for(when or datetime.now(timezone.utc))
+
+
+def team_page_url(page: str, team_slug: str, team_id: str, season_id: int | None = None) -> str:
+    """Takımın transfermarkt sayfa URL'si (startseite, leistungsdaten, sperrenundverletzungen, kader)."""
+    url = f"{TM_BASE}/{team_slug}/{page}/verein/{team_id}"
+    return f"{url}/saison_id/{season_id}" if season_id is not None else url
+
+def team_page_urls(team_info: dict, season_id: int | None = None) -> List[str]:
+    """generate_team_data'nın bir takım için çektiği tüm takım sayfaları."""
+    slug, team_id = team_info["slug"], team_info["id"]
+    season_id = season_id or current_season_id()
+    return [
+        team_page_url("startseite", slug, team_id),
+        team_page_url("leistungsdaten", slug, team_id),
+        team_page_url("sperrenundverletzungen", slug, team_id),
+        team_page_url("kader", slug, team_id, season_id),
+    ]
+
+# Upstream fetch öncelikleri: düşük sayı önce çalışır
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_fetch_priority = contextvars.ContextVar("fetch_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def fetch_priority(priority: int):
+    """Bu blok içindeki tüm upstream fetch'leri verilen öncelikle kuyruğa sokar."""
+    token = _fetch_priority.set(priority)
     try:
-        # requests.get'i PROXIES parametresi ile güncelle
-        if PROXIES:
-            print(f"[UYARI] Proxy kullanılıyor: {PROXY_URL}", file=sys.stderr)
+        yield
+    finally:
+        _fetch_priority.reset(token)
 
-        soup = get_soup(url)
 
-        table = soup.select_one("table.items")
-        if not table:
-            print(f"[HATA] table.items bulunamadı → {team_slug}", file=sys.stderr)
-            return None
-        players = []
-        rows = table.select("tbody tr")
-        for row in rows:
-            cells = row.find_all("td")
-            if len(cells) < 11:
-                continue
-            texts = [td.get_text(strip=True) for td in cells]
+class _HostBucket:
+    __slots__ = ("rate", "tokens", "updated", "blocked_until", "waiters")
 
-            raw_name = texts[3] if len(texts) > 3 else ""
-            if not raw_name:
-                continue
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
 
-            pos_pattern = r"(Kaleci|Defans|Stoper|Sağ Bek|Sol Bek|Orta saha|Merkez Orta Saha|On Numara|Forvet|Santrafor|Sol Kanat|Sağ Kanat)"
-            name_part = re.sub(pos_pattern, "", raw_name, flags=re.IGNORECASE).strip()
 
-            # Tekrar eden soyisim / kısaltma temizliği
-            name_part = re.sub(r"([A-Za-z\s]+?)([A-Z]\.\s*[A-Za-z]+?)\1?$", r"\1", name_part).strip()
-            name = re.sub(r"\b[A-Z]\.\s*", "", name_part).strip()
+class RateLimiter:
+    """
+    Host başına adaptif token-bucket hız sınırlayıcı.
 
-            words = name.split()
-            if len(words) >= 2 and words[-1] == words[-2]:
-                name = " ".join(words[:-1]).strip()
+    - Her host saniyede `rate` istek, en fazla `burst` ardışık istek alabilir.
+    - 429/403/5xx yanıtlarında host'un hızı `backoff` ile çarpılır ve host
+      Retry-After (yoksa `penalty` saniye) kadar durdurulur; başarılı yanıtlarla
+      hız kademeli olarak başlangıç değerine döner.
+    - Bekleyenler (öncelik, sıra) ile sıralanır: INTERACTIVE istekler BACKGROUND
+      yenilemelerin önüne geçer.
+    """
 
-            if not name:
-                continue
+    def __init__(self, rate: float, burst: int, backoff: float = 0.5,
+                 recovery: float = 0.1, penalty: float = 10.0, min_rate: float | None = None):
+        self.base_rate = rate
+        self.burst = burst
+        self.backoff = backoff
+        self.recovery = recovery
+        self.penalty = penalty
+        self.min_rate = min_rate or rate / 8
+        self._hosts: Dict[str, _HostBucket] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
 
-            # Maç sayısı: index 8
-            played_str = texts[8] if len(texts) > 8 else ""
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            bucket = self._hosts[host] = _HostBucket(self.base_rate, self.burst)
+        return bucket
 
-            # Dakika: index 10
-            minutes_str = texts[10].replace("'", "").replace(".", "") if len(texts) > 10 else ""
+    def _refill(self, bucket: _HostBucket, now: float):
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
 
-            if "oynatılmadı" in " ".join(texts).lower() or not minutes_str.isdigit():
-                continue
+    def acquire(self, url: str, priority: int | None = None, timeout: float | None = None) -> float:
+        """
+        URL'nin host'u için token alana kadar bekler.
 
-            played = extract_first_int(played_str)
-            minutes = extract_first_int(minutes_str)
+        Args:
+            url: İstek atılacak URL
+            priority: INTERACTIVE/BACKGROUND (None ise aktif fetch_priority)
+            timeout: En fazla bekleme süresi; aşılırsa TimeoutError
 
-            if played is not None and minutes is not None and minutes > 0:
-                players.append({
-                    "name": name,
-                    "played_matches": played,
-                    "minutes_played": minutes
-                })
+        Returns:
+            Beklenen süre (saniye)
+        """
+        host = urlsplit(url).hostname or ""
+        entry = (_fetch_priority.get() if priority is None else priority, next(self._seq))
+        start = time.monotonic()
+        give_up = start + timeout if timeout is not None else float("inf")
 
-        if not players:
-            print(f"[UYARI] {team_slug} için oyuncu verisi çıkmadı.", file=sys.stderr)
-            return None
+        with self._cond:
+            bucket = self._bucket(host)
+            heapq.heappush(bucket.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= give_up:
+                        raise TimeoutError(f"{host} için rate limit beklemesi {timeout:.1f} sn'yi aştı")
+                    self._refill(bucket, now)
+                    if bucket.waiters[0] != entry:
+                        # Önde daha öncelikli/erken bir istek var
+                        self._cond.wait(None if timeout is None else give_up - now)
+                        continue
+                    delay = max(bucket.blocked_until - now, (1 - bucket.tokens) / bucket.rate)
+                    if delay <= 0:
+                        bucket.tokens -= 1
+                        break
+                    self._cond.wait(min(delay, give_up - now))
+            finally:
+                bucket.waiters.remove(entry)
+                heapq.heapify(bucket.waiters)
+                self._cond.notify_all()
 
-        return players
+        waited = time.monotonic() - start
+        if waited > 0.05:
+            scrape_log.debug("Rate limit beklemesi: %s %.2f sn (öncelik %s)", host, waited, entry[0])
+        return waited
 
-    except Exception as e:
-        print(f"[HATA] {team_slug}: {e}", file=sys.stderr)
-        return None
+    def record(self, url: str, status: int, retry_after: float | None = None):
+        """Yanıt durumuna göre host'un hızını düşürür veya kademeli olarak geri yükseltir."""
+        host = urlsplit(url).hostname or ""
+        with self._cond:
+            bucket = self._bucket(host)
+            if status in (403, 429) or status >= 500:
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff)
+                bucket.tokens = 0.0
+                pause = retry_after if retry_after is not None else self.penalty
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + pause)
+                scrape_log.warning("Upstream %s → %s: hız %.2f/sn'ye düşürüldü, %.0f sn bekleniyor",
+                                   host, status, bucket.rate, pause)
+            elif bucket.rate < self.base_rate:
+                bucket.rate = min(self.base_rate, bucket.rate + self.base_rate * self.recovery)
+            self._cond.notify_all()
 
-def scrape_stats_cached(team_slug: str, team_id: str, team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
-    """Cache-aware oyuncu istatistikleri"""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/leistungsdaten/verein/{team_id}"
-    
-    content_hash = cache_mgr.get_content_hash(url, "table.items")
-    if not content_hash:
-        return scrape_stats(team_slug, team_id)
-    
-    if not cache_mgr.should_scrape(team_name, 'stats', content_hash):
-        return None
-    
-    stats = scrape_stats(team_slug, team_id)
-    
-    if stats is not None:
-        cache_mgr.update_cache(team_name, 'stats', content_hash)
-    
-    return stats
+    def snapshot(self) -> dict:
+        """Host başına anlık hız/token/blok durumu (metrikler için)."""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                host: {
+                    "rate": round(b.rate, 3),
+                    "tokens": round(min(self.burst, b.tokens + (now - b.updated) * b.rate), 2),
+                    "blocked_for": round(max(0.0, b.blocked_until - now), 1),
+                    "waiting": len(b.waiters),
+                }
+                for host, b in self._hosts.items()
+            }
 
-def scrape_suspensions(team_slug, team_id, squad):
+
+# Saniyede istek ve ardışık istek limiti (host başına), ortam değişkeniyle ayarlanabilir
+RATE_LIMITER = RateLimiter(
+    rate=float(os.getenv("UPSTREAM_RATE", "1.0")),
+    burst=int(os.getenv("UPSTREAM_BURST", "5")),
+)
+
+
+class UpstreamError(Exception):
+    """Upstream sayfası (tüm denemelere rağmen) alınamadı. status: son HTTP durumu (biliniyorsa)."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    """Host'un devre kesicisi açık; istek hiç gönderilmeden reddedildi."""
+
+
+class BudgetExceededError(UpstreamError):
+    """İsteğin toplam upstream süre bütçesi tükendi."""
+
+
+# İstek başına upstream süre bütçesi (monotonic deadline); None ise sınırsız
+_request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+REQUEST_BUDGET = float(os.getenv("REQUEST_BUDGET", "60"))
+
+
+@contextmanager
+def request_budget(seconds: float):
+    """Bu blok içindeki tüm fetch'ler (denemeler ve beklemeler dahil) toplam `seconds` ile sınırlanır."""
+    token = _request_deadline.set(time.monotonic() + seconds)
     try:
-        url_squad = f"https://www.transfermarkt.com.tr/{team_slug}/startseite/verein/{team_id}"
-        soup = get_soup(url_squad) 
-        suspensions = []
-        
-        # Oyuncu tablosunu bul
-        table = soup.find("table", class_="items")
-        if not table:
-            print(f"{team_slug} için oyuncu tablosu bulunamadı", file=sys.stderr)
-            return suspensions
-        
-        # Oyuncu satırlarını tara
-        rows = table.find_all("tr", class_=["odd", "even"])
-        print(f"[DEBUG] {team_slug} için {len(rows)} satır bulundu", file=sys.stderr)
-        
-        for row in rows:
-            table_inline = row.find("table", class_="inline-table")
-            if table_inline:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_budget() -> float:
+    """Aktif bütçeden kalan süre (saniye); bütçe yoksa sonsuz."""
+    deadline = _request_deadline.get()
+    return float("inf") if deadline is None else deadline - time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Jitter'lı üstel geri çekilme ile yeniden deneme politikası.
+
+    Bekleme "full jitter" ile seçilir: uniform(0, min(max_delay, base_delay * 2^deneme)).
+    Sadece ağ hataları, 429 ve 5xx yeniden denenir; 403/404 gibi yanıtlar denenmez.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0, timeout: float = 18.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def is_retryable(status: int | None) -> bool:
+        return status is None or status == 429 or status >= 500
+
+
+RETRY_POLICY = RetryPolicy(attempts=int(os.getenv("UPSTREAM_ATTEMPTS", "3")))
+
+
+class CircuitBreaker:
+    """
+    Host başına devre kesici.
+
+    closed   → ardışık `failure_threshold` hata → open
+    open     → `reset_timeout` saniye boyunca tüm istekler anında reddedilir → half_open
+    half_open→ tek bir deneme isteğine izin verilir; başarılıysa closed, değilse tekrar open.
+               Deneme sonuçlanmadan `probe_timeout` saniye geçerse (ya da release_probe() ile geri
+               verilirse) yeni bir denemeye izin verilir.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 probe_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.total_failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and (not self.probe_in_flight
+                                                 or now - self.probe_started >= self.probe_timeout):
+                self.probe_in_flight = True
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self):
+        """Sonuçlanmadan biten (ör. beklenmeyen hata) half-open denemesinin hakkını geri verir."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                log.info("Devre kesici kapandı: %s", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.total_failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    log.warning("Devre kesici açıldı: %s (%d ardışık hata, %.0f sn)",
+                                self.name, self.failures, self.reset_timeout)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """İsme (host) ait devre kesiciyi döner, yoksa oluşturur."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("BREAKER_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("BREAKER_RESET", "60")),
+                probe_timeout=float(os.getenv("BREAKER_PROBE_TIMEOUT", "30")),
+            )
+        return breaker
+
+
+def breaker_snapshot() -> dict:
+    """Tüm devre kesicilerin durumu (metrikler için)."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def _retry_after(res) -> float | None:
+    """Retry-After başlığını (saniye cinsinden) okur; yoksa/tarih biçimindeyse None."""
+    value = res.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _ProxyState:
+    __slots__ = ("url", "latency", "error_rate", "blocked_until", "in_flight", "requests", "failures", "blocks")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = 1.0  # saniye, EWMA (ölçüm yokken nötr başlangıç)
+        self.error_rate = 0.0  # EWMA
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.blocks = 0
+
+
+class ProxyPool:
+    """
+    Sağlık puanlı proxy havuzu.
+
+    - Her proxy için kayan (EWMA) gecikme ve hata oranı tutulur; puan = gecikme * (1 + 4 * hata oranı),
+      eşzamanlı kullanım da puana eklenir. En düşük puanlı proxy seçilir.
+    - curl_cffi Session'ları proxy başına ortak bir havuzda tutulur (en fazla `max_idle` boşta) ve
+      tüm thread'ler/istekler arasında yeniden kullanılır (bağlantı/TLS tekrar kullanımı). En iyiden
+      belirgin biçimde kötü olmayan proxy'ler arasında boşta Session'ı (sıcak bağlantısı) olan tercih edilir.
+    - 403/429 alan proxy `cooldown` saniye boyunca havuzdan çıkarılır.
+    - Havuz boşsa doğrudan bağlantı kullanılır (proxy None).
+    """
+
+    def __init__(self, urls: List[str], alpha: float = 0.3, cooldown: float = 300.0, max_idle: int = 8):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.max_idle = max_idle
+        self._proxies = [_ProxyState(u) for u in urls]
+        self._idle: Dict[str | None, List[requests.Session]] = defaultdict(list)  # proxy URL -> boştaki Session'lar
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    @staticmethod
+    def _score(p: _ProxyState) -> float:
+        return p.latency * (1 + 4 * p.error_rate) * (1 + 0.5 * p.in_flight)
+
+    def acquire(self, prefer: set | None = None) -> _ProxyState | None:
+        """
+        Bu thread için kullanılacak proxy'yi seçer ve in_flight sayacını artırır.
+
+        `prefer` verilirse (ör. host için clearance çerezi olan proxy URL'leri) bunlardan uygun olan
+        varsa seçim yalnızca onlar arasında yapılır; çerez başka IP'den gönderilirse geçersizdir.
+        """
+        if not self._proxies:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            available = [p for p in self._proxies if p.blocked_until <= now] or self._proxies
+            preferred = [p for p in available if p.url in prefer] if prefer else []
+            if preferred:
+                available = preferred
+            best = min(available, key=self._score)
+            # En iyiden belirgin biçimde kötü değilse sıcak bağlantısı olan proxy tercih edilir
+            warm = [p for p in available if self._idle[p.url] and self._score(p) <= self._score(best) * 2]
+            if warm and best not in warm:
+                best = min(warm, key=self._score)
+            best.in_flight += 1
+            return best
+
+    def release(self, proxy: _ProxyState | None, ok: bool, latency: float, blocked: bool = False):
+        """İstek sonucuna göre proxy'nin sağlık puanını günceller."""
+        if proxy is None:
+            return
+        with self._lock:
+            proxy.in_flight -= 1
+            proxy.requests += 1
+            proxy.error_rate += self.alpha * ((0.0 if ok else 1.0) - proxy.error_rate)
+            if ok:
+                proxy.latency += self.alpha * (latency - proxy.latency)
+            else:
+                proxy.failures += 1
+            if blocked:
+                proxy.blocks += 1
+                proxy.blocked_until = time.monotonic() + self.cooldown
+                scrape_log.warning("Proxy engellendi, %.0f sn havuz dışı: %s", self.cooldown, redact_url(proxy.url))
+
+    def has_alternative(self, proxy: _ProxyState | None) -> bool:
+        """Verilen proxy dışında şu an kullanılabilir başka proxy var mı?"""
+        now = time.monotonic()
+        with self._lock:
+            return any(p is not proxy and p.blocked_until <= now for p in self._proxies)
+
+    @contextmanager
+    def session(self, proxy: _ProxyState | None):
+        """Verilen proxy (yoksa doğrudan bağlantı) için havuzdan bir Session ödünç verir, sonra geri koyar."""
+        key = proxy.url if proxy else None
+        with self._lock:
+            idle = self._idle[key]
+            sess = idle.pop() if idle else None
+        if sess is None:
+            proxies = {"http": proxy.url, "https": proxy.url} if proxy else None
+            sess = requests.Session(impersonate="chrome120", proxies=proxies)
+        try:
+            yield sess
+        finally:
+            with self._lock:
+                idle = self._idle[key]
+                if len(idle) < self.max_idle:
+                    idle.append(sess)
+                    sess = None
+            if sess is not None:
+                sess.close()
+
+    def snapshot(self) -> list[dict]:
+        """Proxy başına sağlık durumu (kimlik bilgileri maskelenmiş, metrikler için)."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "proxy": redact_url(p.url),
+                    "latency_s": round(p.latency, 3),
+                    "error_rate": round(p.error_rate, 3),
+                    "score": round(self._score(p), 3),
+                    "blocked_for": round(max(0.0, p.blocked_until - now), 1),
+                    "in_flight": p.in_flight,
+                    "requests": p.requests,
+                    "failures": p.failures,
+                    "blocks": p.blocks,
+                }
+                for p in self._proxies
+            ]
+
+
+PROXY_POOL = ProxyPool(PROXY_URLS, cooldown=float(os.getenv("PROXY_COOLDOWN", "300")),
+                       max_idle=int(os.getenv("PROXY_SESSIONS", "8")))
+
+
+# Bot koruması challenge sayfalarının işaretleri (200 ile dönseler de engel sayılır)
+_CHALLENGE_MARKERS = (
+    "cf_chl_opt",
+    "<title>Just a moment...</title>",
+    "captcha-delivery.com",
+    "px-captcha",
+    "_Incapsula_Resource",
+)
+
+
+def is_challenge_page(html: str) -> bool:
+    head = html[:20000]
+    return any(marker in head for marker in _CHALLENGE_MARKERS)
+
+
+def http_fetch(url: str) -> str:
+    """URL'yi curl_cffi ile (Chrome taklidi, proxy havuzu üzerinden, hız sınırlı) çeker ve HTML metnini döner."""
+    host = urlsplit(url).hostname or ""
+    breaker = get_breaker(host)
+    attempt = 0
+    while True:
+        # Bütçe ve rate limit, half-open deneme hakkı alınmadan önce kontrol edilir; aksi halde
+        # BudgetExceededError deneme hakkını sonuçsuz bırakıp devreyi kalıcı kilitler
+        budget = remaining_budget()
+        if budget <= 0:
+            raise BudgetExceededError(f"İstek süre bütçesi tükendi: {url}")
+        try:
+            RATE_LIMITER.acquire(url, timeout=None if budget == float("inf") else budget)
+        except TimeoutError as e:
+            raise BudgetExceededError(f"İstek süre bütçesi rate limit beklerken tükendi: {url}") from e
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} devre kesicisi açık, istek gönderilmedi: {url}")
+        timeout = min(RETRY_POLICY.timeout, remaining_budget())
+
+        # Tarayıcıda clearance kazanılmışsa istek çerezi kazanan proxy'den (aynı IP'den) gider
+        proxy = PROXY_POOL.acquire(prefer=CLEARANCE.proxies(host))
+        # Proxy kullanılıp kullanılmadığını logla (kimlik bilgileri maskelenir)
+        if proxy:
+            scrape_log.debug("Proxy kullanılıyor: %s", redact_url(proxy.url))
+
+        status = None
+        started = time.monotonic()
+        try:
+            cookies = CLEARANCE.get(host, proxy.url if proxy else None)
+            with PROXY_POOL.session(proxy) as session:
+                res = session.get(url, timeout=timeout, cookies=cookies)
+            status = res.status_code
+            if status == 200 and is_challenge_page(res.text):
+                status = 403  # bot koruması sayfası: engellenmiş sayılır
+            RATE_LIMITER.record(url, status, _retry_after(res))
+            if status != res.status_code:
+                raise requests.exceptions.HTTPError(f"Bot koruması (challenge) sayfası döndü: {url}")
+            res.raise_for_status()
+            PROXY_POOL.release(proxy, True, time.monotonic() - started)
+            breaker.record_success()
+            return res.text
+        except requests.exceptions.RequestException as e:
+            blocked = status in (403, 429)
+            if status is not None and status < 500 and not blocked:
+                # Host ve proxy ayakta (ör. 404); devre kesici açısından başarı sayılır
+                PROXY_POOL.release(proxy, True, time.monotonic() - started)
+                breaker.record_success()
+                raise
+            PROXY_POOL.release(proxy, False, time.monotonic() - started, blocked=blocked)
+            breaker.record_failure()
+            attempt += 1
+            delay = RETRY_POLICY.backoff(attempt)
+            # Engellenen proxy'den başka proxy'ye geçilebiliyorsa 403 de yeniden denenir
+            retryable = RETRY_POLICY.is_retryable(status) or (blocked and PROXY_POOL.has_alternative(proxy))
+            if attempt >= RETRY_POLICY.attempts or not retryable or delay >= remaining_budget():
+                raise UpstreamError(f"{url} {attempt} denemede alınamadı: {e}", status=status) from e
+            scrape_log.warning("Fetch hatası (%s), %.1f sn sonra tekrar denenecek (%d/%d): %s",
+                               status or type(e).__name__, delay, attempt, RETRY_POLICY.attempts, url)
+            time.sleep(delay)
+        except BaseException:
+            # RequestException dışı hata: sonuç kaydedilmez, proxy ve half-open deneme hakkı geri verilir
+            PROXY_POOL.release(proxy, False, time.monotonic() - started)
+            breaker.release_probe()
+            raise
+
+
+# --- Katmanlı fetch: curl_cffi (hızlı yol) -> engel tespit edilince tarayıcı havuzu ---
+
+BROWSER_FALLBACK = os.getenv("BROWSER_FALLBACK", "0") == "1"
+BROWSER_CONTEXTS = int(os.getenv("BROWSER_CONTEXTS", "2"))
+BROWSER_TIMEOUT = float(os.getenv("BROWSER_TIMEOUT", "45"))
+# Çerezlere rağmen curl bu kadar art arda engellenirse host BROWSER_HOLD saniye doğrudan tarayıcıya gider
+BROWSER_ESCALATE_AFTER = int(os.getenv("BROWSER_ESCALATE_AFTER", "3"))
+BROWSER_HOLD = float(os.getenv("BROWSER_HOLD", "600"))
+
+BLOCK_STATUSES = (403, 429)
+
+# curl_cffi "chrome120" taklidinin User-Agent'ı; tarayıcı context'leri de bunu kullanır ki
+# kazanılan clearance çerezleri curl isteklerinde de geçerli olsun
+CURL_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+class ClearanceJar:
+    """
+    Tarayıcıda kazanılan host çerezleri (cf_clearance vb.); http_fetch bunları curl isteklerine ekler.
+
+    Clearance çerezleri IP'ye (ve User-Agent'a) bağlıdır; bu yüzden (host, proxy) başına tutulur ve
+    yalnızca çerezi kazanan proxy üzerinden giden isteklere eklenir (proxy None = doğrudan bağlantı).
+    """
+
+    def __init__(self):
+        self._cookies: Dict[tuple, Dict[str, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, host: str, proxy: str | None, cookies: List[dict]):
+        """Playwright context.cookies() çıktısını kaydeder (expires -1 = oturum çerezi)."""
+        with self._lock:
+            jar = self._cookies.setdefault((host, proxy), {})
+            for cookie in cookies:
+                expires = cookie.get("expires", -1)
+                jar[cookie["name"]] = (cookie["value"], expires if expires and expires > 0 else None)
+
+    def _valid(self, key: tuple, now: float) -> Dict[str, str] | None:
+        jar = self._cookies.get(key)
+        if not jar:
+            return None
+        for name in [n for n, (_, expires) in jar.items() if expires is not None and expires <= now]:
+            del jar[name]
+        return {name: value for name, (value, _) in jar.items()} or None
+
+    def get(self, host: str, proxy: str | None) -> Dict[str, str] | None:
+        with self._lock:
+            return self._valid((host, proxy), time.time())
+
+    def proxies(self, host: str) -> set:
+        """Bu host için geçerli çerezi olan proxy URL'leri (doğrudan bağlantı için None)."""
+        now = time.time()
+        with self._lock:
+            return {proxy for (h, proxy) in list(self._cookies) if h == host and self._valid((h, proxy), now)}
+
+
+CLEARANCE = ClearanceJar()
+
+
+class FetchTiers:
+    """
+    Host başına fetch katmanı kararı. curl engellendiğinde o istek tarayıcıya çıkar; çerezler geri
+    verildiği için sonraki istekler yine curl ile denenir. curl art arda `escalate_after` kez
+    engellenirse host `hold` saniye boyunca doğrudan tarayıcı katmanında kalır.
+    """
+
+    def __init__(self, escalate_after: int = 3, hold: float = 600.0):
+        self.escalate_after = escalate_after
+        self.hold = hold
+        self._state: Dict[str, dict] = defaultdict(
+            lambda: {"blocks": 0, "last_block": 0.0, "browser_until": 0.0,
+                     "curl_ok": 0, "browser_ok": 0, "browser_failed": 0})
+        self._lock = threading.Lock()
+
+    def browser_first(self, host: str) -> bool:
+        with self._lock:
+            return self._state[host]["browser_until"] > time.monotonic()
+
+    def record_curl(self, host: str, blocked: bool):
+        with self._lock:
+            state = self._state[host]
+            if not blocked:
+                state["blocks"] = 0
+                state["curl_ok"] += 1
+                return
+            state["blocks"] += 1
+            state["last_block"] = time.monotonic()
+            if state["blocks"] >= self.escalate_after:
+                state["blocks"] = 0
+                state["browser_until"] = time.monotonic() + self.hold
+                scrape_log.warning("%s curl ile art arda engellendi, %.0f sn tarayıcı katmanında", host, self.hold)
+
+    def recently_blocked(self, host: str) -> bool:
+        """curl son `hold` saniye içinde engellendi mi? (devre kesici açıldıysa sebebi muhtemelen engel)"""
+        with self._lock:
+            return self._state[host]["last_block"] > time.monotonic() - self.hold
+
+    def record_browser(self, host: str, ok: bool):
+        with self._lock:
+            self._state[host]["browser_ok" if ok else "browser_failed"] += 1
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: dict(state, browser_until=round(max(0.0, state["browser_until"] - now), 1),
+                           last_block=round(now - state["last_block"], 1) if state["last_block"] else None)
+                for host, state in self._state.items()
+            }
+
+
+FETCH_TIERS = FetchTiers(BROWSER_ESCALATE_AFTER, BROWSER_HOLD)
+
+
+def _playwright_proxy(url: str | None) -> dict | None:
+    """Proxy URL'sini Playwright'ın {"server", "username", "password"} biçimine çevirir."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    proxy = {"server": f"{parts.scheme}://{parts.hostname}:{parts.port}" if parts.port else f"{parts.scheme}://{parts.hostname}"}
+    if parts.username:
+        proxy["username"] = parts.username
+        proxy["password"] = parts.password or ""
+    return proxy
+
+
+class BrowserPool:
+    """
+    Önceden başlatılmış headless Chromium ve `size` adet hazır context.
+
+    Playwright'ın async API'si kendi event loop thread'inde çalışır; fetch() herhangi bir thread'den
+    çağrılabilir ve boş bir context'i bekler. Tarayıcı bir kez başlatılır, her fetch yalnızca yeni
+    bir sayfa açar. Context'ler sırayla PROXY_URLS'ten birini kullanır; kazanılan çerezler o proxy
+    adına saklanır (bkz. ClearanceJar).
+    """
+
+    def __init__(self, size: int = 2, proxies: List[str] | None = None, timeout: float = 45.0):
+        self.size = size
+        self.proxies = proxies or []
+        self.timeout = timeout
+        self.fetches = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._ready: Future | None = None
+
+    def start(self) -> "BrowserPool":
+        """Tarayıcıyı arka planda başlatır; ilk fetch hazır olmasını bekler."""
+        self._thread.start()
+        self._ready = asyncio.run_coroutine_threadsafe(self._launch(), self._loop)
+        self._ready.add_done_callback(self._log_launch_error)
+        return self
+
+    @staticmethod
+    def _log_launch_error(future: Future):
+        if future.exception() is not None:
+            log.error("Tarayıcı havuzu başlatılamadı (playwright install chromium?): %s", future.exception())
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        launch_args = {"headless": True, "args": ["--disable-blink-features=AutomationControlled"]}
+        if self.proxies:
+            # Her context kendi proxy'sini verir; global değer kullanılmaz
+            launch_args["proxy"] = {"server": "http://per-context"}
+        self._browser = await self._playwright.chromium.launch(**launch_args)
+        self._contexts = asyncio.Queue()
+        for index in range(self.size):
+            await self._contexts.put(await self._new_context(index))
+        log.info("Tarayıcı havuzu hazır: %d context", self.size)
+
+    async def _new_context(self, index: int) -> tuple:
+        proxy = self.proxies[index % len(self.proxies)] if self.proxies else None
+        context = await self._browser.new_context(
+            user_agent=CURL_USER_AGENT, locale="tr-TR", proxy=_playwright_proxy(proxy))
+        if Stealth is not None:
+            await Stealth().apply_stealth_async(context)
+        return context, proxy
+
+    async def _fetch(self, url: str) -> tuple[str, List[dict], str | None]:
+        """(html, çerezler, context'in proxy URL'si) döner."""
+        context, proxy = entry = await self._contexts.get()
+        page = None
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout * 1000)
+            html = await page.content()
+            # Challenge sayfasıysa tarayıcının çözmesini bekle
+            deadline = time.monotonic() + self.timeout / 2
+            while is_challenge_page(html) and time.monotonic() < deadline:
+                await page.wait_for_timeout(1000)
+                html = await page.content()
+            if is_challenge_page(html):
+                raise UpstreamError(f"Tarayıcı challenge'ı geçemedi: {url}", status=403)
+            return html, await context.cookies(url), proxy
+        finally:
+            if page is not None:
+                await page.close()
+            await self._contexts.put(entry)
+
+    def fetch(self, url: str, timeout: float | None = None) -> str:
+        """Sayfayı tarayıcıda açar, HTML'i döner ve kazanılan çerezleri CLEARANCE'a yazar."""
+        timeout = timeout or self.timeout
+        self._ready.result(timeout=timeout)  # başlatma hatası varsa burada fırlar
+        with self._stats_lock:
+            self.fetches += 1
+        try:
+            html, cookies, proxy = asyncio.run_coroutine_threadsafe(self._fetch(url), self._loop).result(timeout)
+        except Exception:
+            with self._stats_lock:
+                self.failures += 1
+            raise
+        CLEARANCE.update(urlsplit(url).hostname or "", proxy, cookies)
+        return html
+
+    async def _shutdown(self):
+        await self._browser.close()
+        await self._playwright.stop()
+
+    def close(self):
+        try:
+            if self._ready is not None and self._ready.done() and self._ready.exception() is None:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(10)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def snapshot(self) -> dict:
+        ready = self._ready is not None and self._ready.done() and self._ready.exception() is None
+        with self._stats_lock:
+            return {"ready": ready, "contexts": self.size, "fetches": self.fetches, "failures": self.failures}
+
+
+BROWSER_POOL: BrowserPool | None = None
+
+
+def start_browser_pool() -> BrowserPool | None:
+    """BROWSER_FALLBACK=1 ise ve playwright kuruluysa tarayıcı havuzunu önceden başlatır."""
+    global BROWSER_POOL
+    if async_playwright is None:
+        log.error("BROWSER_FALLBACK=1 fakat playwright kurulu değil; sadece curl katmanı kullanılacak")
+        return None
+    BROWSER_POOL = BrowserPool(BROWSER_CONTEXTS, PROXY_URLS, BROWSER_TIMEOUT).start()
+    atexit.register(BROWSER_POOL.close)
+    return BROWSER_POOL
+
+
+def browser_fetch(url: str) -> str:
+    """Tarayıcı katmanı: aynı rate limiter ve süre bütçesi altında BROWSER_POOL ile çeker."""
+    host = urlsplit(url).hostname or ""
+    budget = remaining_budget()
+    if budget <= 0:
+        raise BudgetExceededError(f"İstek süre bütçesi tükendi: {url}")
+    try:
+        RATE_LIMITER.acquire(url, timeout=None if budget == float("inf") else budget)
+    except TimeoutError as e:
+        raise BudgetExceededError(f"İstek süre bütçesi rate limit beklerken tükendi: {url}") from e
+    try:
+        html = BROWSER_POOL.fetch(url, timeout=min(BROWSER_POOL.timeout, remaining_budget()))
+    except Exception as e:
+        FETCH_TIERS.record_browser(host, False)
+        raise UpstreamError(f"{url} tarayıcı ile de alınamadı: {e}") from e
+    FETCH_TIERS.record_browser(host, True)
+    return html
+
+
+def tiered_fetch(url: str) -> str:
+    """
+    Varsayılan fetcher. Önce ucuz curl_cffi yolu (http_fetch) denenir; host engellerse (403/429 ya da
+    challenge sayfası) istek tarayıcı havuzuna çıkar. Tarayıcı havuzu yoksa http_fetch ile aynıdır.
+    """
+    if BROWSER_POOL is None:
+        return http_fetch(url)
+    host = urlsplit(url).hostname or ""
+    if not FETCH_TIERS.browser_first(host):
+        try:
+            html = http_fetch(url)
+            FETCH_TIERS.record_curl(host, blocked=False)
+            return html
+        except CircuitOpenError:
+            # Devre kesici engeller yüzünden açıldıysa tarayıcı katmanı denenir, aksi halde host gerçekten sorunlu
+            if not FETCH_TIERS.recently_blocked(host):
+                raise
+            scrape_log.warning("Devre kesici açık ve host yakın zamanda engelledi, tarayıcı katmanına geçiliyor: %s", url)
+        except UpstreamError as e:
+            if e.status not in BLOCK_STATUSES:
+                raise
+            FETCH_TIERS.record_curl(host, blocked=True)
+            scrape_log.warning("curl engellendi (%s), tarayıcı katmanına geçiliyor: %s", e.status, url)
+    return browser_fetch(url)
+
+
+# get_soup'un kullandığı fetcher; testler/benchmark'lar set_fetcher ile değiştirebilir
+_fetcher: Callable[[str], str] = tiered_fetch
+
+
+def set_fetcher(fetcher: Callable[[str], str] | None) -> Callable[[str], str]:
+    """
+    get_soup'un HTML çekmek için kullandığı fonksiyonu değiştirir.
+
+    Args:
+        fetcher: url -> html fonksiyonu (None ise varsayılan tiered_fetch)
+
+    Returns:
+        Önceki fetcher (geri yüklemek için)
+    """
+    global _fetcher
+    previous = _fetcher
+    _fetcher = fetcher or tiered_fetch
+    return previous
+
+
+class PageMemo:
+    """
+    Bir istek/batch boyunca her URL'nin en fazla bir kez çekilmesini sağlar (single-flight).
+
+    Aynı URL'yi isteyen eşzamanlı thread'ler ilk fetch'in sonucunu bekler; hatalar da
+    saklanır, böylece çekilemeyen bir sayfa aynı batch içinde tekrar denenmez.
+    """
+
+    def __init__(self):
+        self._pages: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.hits = 0
+
+    def get(self, url: str, fetch: Callable[[str], str]) -> str:
+        with self._lock:
+            future = self._pages.get(url)
+            owner = future is None
+            if owner:
+                future = self._pages[url] = Future()
+                self.fetches += 1
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                future.set_result(fetch(url))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+
+_page_memo = contextvars.ContextVar("page_memo", default=None)
+
+
+@contextmanager
+def page_memo():
+    """Bu blok içindeki get_soup çağrıları aynı PageMemo'yu paylaşır."""
+    memo = PageMemo()
+    token = _page_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _page_memo.reset(token)
+
+
+def fetch_html(url: str) -> str:
+    """Verilen URL'nin HTML'i (aktif fetcher ile, varsa PageMemo üzerinden)."""
+    memo = _page_memo.get()
+    return memo.get(url, _fetcher) if memo is not None else _fetcher(url)
+
+
+def get_soup(url: str) -> BeautifulSoup:
+    """Verilen URL'den HTML çekip BeautifulSoup objesine dönüştürür."""
+    return BeautifulSoup(fetch_html(url), "lxml")
+
+
+# HTML parse'ı için süreç havuzu boyutu (0 = kapalı, parse isteği işleyen thread'de yapılır)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))
+
+
+def _run_with_pages(fn: Callable, pages: dict, args: tuple):
+    """
+    Worker'da çalışır: fn'i sadece görevle gelen sayfaları (url -> html veya fetch hatası)
+    gören bir fetcher ile çağırır; extractor'lar kendi get_soup çağrılarını değiştirmeden kullanır.
+    """
+    def fetch(url):
+        page = pages.get(url)
+        if page is None:
+            raise UpstreamError(f"{url} parse görevine eklenmemiş")
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    previous = set_fetcher(fetch)
+    try:
+        return fn(*args)
+    finally:
+        set_fetcher(previous)
+
+
+def _worker_pid(_) -> int:
+    return os.getpid()
+
+
+class ParsePool:
+    """
+    BeautifulSoup/lxml parse'ını (CPU-bound, GIL tutar) süreç havuzuna taşır.
+
+    Sayfalar ana süreçte çekilir (rate limiter, proxy, memo aynen çalışır), worker'a ham HTML gider
+    ve sadece çıkarılan kayıtlar (list/dict/hash) geri döner. Havuz bozulursa (worker öldü) yeniden
+    kurulur ve o görev bu thread'de (normal get_soup yoluyla) çalıştırılır.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.tasks = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._executor = self._create()
+
+    def _create(self) -> ProcessPoolExecutor:
+        # fork, thread'leri (log listener, webhook) olan bir süreçte güvenli değil
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+
+    def start(self) -> "ParsePool":
+        """Tüm worker'ları başlatır ve modülü yüklemelerini bekler; ilk istek bu maliyeti ödemez."""
+        pids = set(self._executor.map(_worker_pid, range(self.workers)))
+        log.info("Parse havuzu hazır: %d worker (%s)", len(pids), sorted(pids))
+        return self
+
+    def run(self, fn: Callable, args: tuple, pages: dict | None = None):
+        self.tasks += 1
+        executor = self._executor
+        try:
+            return executor.submit(_run_with_pages, fn, pages or {}, args).result()
+        except BrokenProcessPool as e:
+            log.error("Parse havuzu bozuldu, yeniden kuruluyor: %s", e)
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = self._create()
+                    self.restarts += 1
+            # _run_with_pages global fetcher'ı değiştirdiği için burada kullanılmaz; extractor sayfayı yeniden ister
+            return fn(*args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> dict:
+        return {"workers": self.workers, "tasks": self.tasks, "restarts": self.restarts}
+
+
+PARSE_POOL: ParsePool | None = None
+
+
+def start_parse_pool(workers: int = PARSE_WORKERS) -> ParsePool | None:
+    """PARSE_POOL'u kurup worker'ları önceden başlatır (workers 0 ise havuz kapatılır)."""
+    global PARSE_POOL
+    if PARSE_POOL is not None:
+        PARSE_POOL.shutdown()
+        PARSE_POOL = None
+    if workers > 0:
+        PARSE_POOL = ParsePool(workers).start()
+        atexit.register(PARSE_POOL.shutdown)
+    return PARSE_POOL
+
+
+def parse_html(fn: Callable, *args):
+    """HTML alan saf parse fonksiyonunu (ör. content_hash) havuz varsa orada, yoksa burada çalıştırır."""
+    if PARSE_POOL is None:
+        return fn(*args)
+    return PARSE_POOL.run(fn, args)
+
+
+def extract(fn: Callable, url: str, *args):
+    """
+    get_soup(url) okuyan bir extractor'ı (scrape_squad, get_league_position, ...) çalıştırır.
+    Havuz varsa sayfa burada çekilir ve parse worker'da yapılır; fetch hatası da worker'a
+    iletilir, böylece extractor'ın hata davranışı (None/[] dönmesi) değişmez.
+    """
+    if PARSE_POOL is None:
+        return fn(*args)
+    try:
+        page = fetch_html(url)
+    except Exception as e:
+        page = e if isinstance(e, UpstreamError) else UpstreamError(f"{type(e).__name__}: {e}")
+    return PARSE_POOL.run(fn, args, {url: page})
+
+def extract_first_int(s: str) -> int:
+    """Bir string içindeki ilk tam sayıyı ayıkla. Yoksa 0 döner."""
+    if not s:
+        return 0
+    s = s.replace("'", "").replace(".", "").replace(",", "").strip()
+    m = re.search(r'(\d+)', s)
+    return int(m.group(1)) if m else 0
+
+def scrape_stats(team_slug: str, team_id: str) -> List[dict]:
+    """Oyuncu istatistiklerini (oynadığı maç ve süre) çeker."""
+    url = team_page_url("leistungsdaten", team_slug, team_id)
+    try:
+        soup = get_soup(url)
+
+        table = soup.select_one("table.items")
+        if not table:
+            scrape_log.error("table.items bulunamadı → %s", team_slug)
+            return None
+        players = []
+        rows = table.select("tbody tr")
+        for row in rows:
+            cells = row.find_all("td")
+            if len(cells) < 11:
+                continue
+            texts = [td.get_text(strip=True) for td in cells]
+
+            raw_name = texts[3] if len(texts) > 3 else ""
+            if not raw_name:
+                continue
+
+            pos_pattern = r"(Kaleci|Defans|Stoper|Sağ Bek|Sol Bek|Orta saha|Merkez Orta Saha|On Numara|Forvet|Santrafor|Sol Kanat|Sağ Kanat)"
+            name_part = re.sub(pos_pattern, "", raw_name, flags=re.IGNORECASE).strip()
+
+            # Tekrar eden soyisim / kısaltma temizliği
+            name_part = re.sub(r"([A-Za-z\s]+?)([A-Z]\.\s*[A-Za-z]+?)\1?$", r"\1", name_part).strip()
+            name = re.sub(r"\b[A-Z]\.\s*", "", name_part).strip()
+
+            words = name.split()
+            if len(words) >= 2 and words[-1] == words[-2]:
+                name = " ".join(words[:-1]).strip()
+
+            if not name:
+                continue
+
+            # Maç sayısı: index 8
+            played_str = texts[8] if len(texts) > 8 else ""
+
+            # Dakika: index 10
+            minutes_str = texts[10].replace("'", "").replace(".", "") if len(texts) > 10 else ""
+
+            if "oynatılmadı" in " ".join(texts).lower() or not minutes_str.isdigit():
+                continue
+
+            played = extract_first_int(played_str)
+            minutes = extract_first_int(minutes_str)
+
+            if played is not None and minutes is not None and minutes > 0:
+                players.append({
+                    "name": name,
+                    "played_matches": played,
+                    "minutes_played": minutes
+                })
+
+        if not players:
+            scrape_log.warning("%s için oyuncu verisi çıkmadı.", team_slug)
+            return None
+
+        return players
+
+    except Exception as e:
+        scrape_log.error("%s: %s", team_slug, e)
+        return None
+
+def scrape_stats_cached(team_slug: str, team_id: str, team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
+    """Cache-aware oyuncu istatistikleri"""
+    url = team_page_url("leistungsdaten", team_slug, team_id)
+    if cache_mgr.is_fresh(team_name, 'stats'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    content_hash = cache_mgr.get_content_hash(url, "table.items")
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(scrape_stats, url, team_slug, team_id)
+    
+    if not cache_mgr.should_scrape(team_name, 'stats', content_hash):
+        return None
+    
+    stats = extract(scrape_stats, url, team_slug, team_id)
+    
+    if stats is not None:
+        cache_mgr.update_cache(team_name, 'stats', content_hash)
+    
+    return stats
+
+def scrape_suspensions(team_slug, team_id, squad):
+    try:
+        url_squad = team_page_url("startseite", team_slug, team_id)
+        soup = get_soup(url_squad) 
+        suspensions = []
+        
+        # Oyuncu tablosunu bul
+        table = soup.find("table", class_="items")
+        if not table:
+            scrape_log.warning("%s için oyuncu tablosu bulunamadı", team_slug)
+            return suspensions
+        
+        # Oyuncu satırlarını tara
+        rows = table.find_all("tr", class_=["odd", "even"])
+        debug = scrape_log.isEnabledFor(logging.DEBUG)
+        if debug:
+            scrape_log.debug("%s için %d satır bulundu", team_slug, len(rows))
+        
+        for row in rows:
+            table_inline = row.find("table", class_="inline-table")
+            if table_inline:
                 name_tag = table_inline.find("a", href=True)
                 if name_tag:
                     # Hem eski hem yeni yapıyı ara
@@ -587,10 +1904,7 @@ def scrape_suspensions(team_slug, team_id, squad):
                         if not player_name:
                             player_name = name_tag.get_text(strip=True)
                         
-                        print(f"[DEBUG] Oyuncu adı: '{player_name}'", file=sys.stderr)
-                        
                         suspension_type = span_tag.get("title", "").strip()
-                        print(f"[DEBUG] Ceza tipi: '{suspension_type}'", file=sys.stderr)
                         
                         status = (
                             "Kırmızı Kart" if "Kırmızı kart cezalısı" in suspension_type or "kart cezalısı" in suspension_type.lower() else
@@ -601,8 +1915,6 @@ def scrape_suspensions(team_slug, team_id, squad):
                         matched = next((p for p in squad if p["name"] == player_name), None)
                         position = matched["position"] if matched else "Bilinmiyor"
                         
-                        print(f"[DEBUG] Pozisyon: '{position}'", file=sys.stderr)
-                        
                         suspensions.append({
                             "name": player_name,
                             "position": position,
@@ -610,379 +1922,1719 @@ def scrape_suspensions(team_slug, team_id, squad):
                             "details": suspension_type
                         })
                         
-                        print(f"[DEBUG] ✓ Eklendi: {player_name}", file=sys.stderr)
+                        if debug:
+                            scrape_log.debug("✓ Eklendi: '%s' (%s, %s)", player_name, suspension_type, position)
         
-        print(f"[DEBUG SONUÇ] {team_slug} için toplam {len(suspensions)} cezalı oyuncu", file=sys.stderr)
+        scrape_log.debug("%s için toplam %d cezalı oyuncu", team_slug, len(suspensions))
         return suspensions
         
     except Exception as e:
-        print(f"Cezalılar veri hatası ({team_slug}): {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return []
+        scrape_log.exception("Cezalılar veri hatası (%s): %s", team_slug, e)
+        return []
+
+def scrape_suspensions_cached(team_slug: str, team_id: str, squad: List[dict],
+                              team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
+    """Cache-aware ceza scraping"""
+    url = team_page_url("startseite", team_slug, team_id)
+    if cache_mgr.is_fresh(team_name, 'suspensions'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    # ← DEĞİŞTİ: Özel suspension hash kullan
+    content_hash = cache_mgr.get_suspension_hash(url)
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(scrape_suspensions, url, team_slug, team_id, squad)
+    
+    if not cache_mgr.should_scrape(team_name, 'suspensions', content_hash):
+        return None
+    
+    scrape_log.info("Scraping: %s/suspensions", team_name)
+    suspensions = extract(scrape_suspensions, url, team_slug, team_id, squad)
+    
+    scrape_log.info("Sonuç: %s/suspensions = %d oyuncu", team_name, len(suspensions) if suspensions else 0)
+    
+    if suspensions is not None:
+        cache_mgr.update_cache(team_name, 'suspensions', content_hash)
+    
+    return suspensions
+
+
+def scrape_squad(team_slug: str, team_id: str) -> List[dict] | None:
+    try:
+        url = team_page_url("startseite", team_slug, team_id)
+        soup = get_soup(url)
+
+        table = soup.find("table", class_="items")
+        if not table:
+            raise ValueError("Squad table not found")
+
+        rows = table.find_all("tr", class_=["odd", "even"])
+        players = []
+
+        for row in rows:
+            name = row.find("td", class_="hauptlink").text.strip()
+            position = row.find_all("td")[4].text.strip()
+            market_value = row.find_all("td")[-1].text.strip()
+            players.append({
+                "name": name,
+                "position": position,
+                "market_value": market_value
+            })
+
+        if not players:
+            raise ValueError("Squad empty")
+
+        return players
+
+    except Exception as e:
+        scrape_log.error("Squad scrape başarısız (%s): %s", team_slug, e)
+        return None
+
+def scrape_squad_cached(team_slug: str, team_id: str, team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
+    """Cache-aware kadro scraping"""
+    url = team_page_url("startseite", team_slug, team_id)
+    if cache_mgr.is_fresh(team_name, 'squad'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    # Hash oluştur
+    content_hash = cache_mgr.get_content_hash(url, "table.items")
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        cache_log.warning("Squad hash oluşturulamadı: %s", team_name)
+        return extract(scrape_squad, url, team_slug, team_id)  # Normal scrape'e devam et
+    
+    # Cache kontrolü
+    if not cache_mgr.should_scrape(team_name, 'squad', content_hash):
+        return None  # None = cache kullan, eski veriyi koru
+    
+    # Scrape et
+    squad = extract(scrape_squad, url, team_slug, team_id)
+    
+    # Başarılıysa cache'i güncelle
+    if squad is not None:
+        cache_mgr.update_cache(team_name, 'squad', content_hash)
+    
+    return squad
+
+def scrape_injuries(team_slug: str, team_id: str, squad: List[dict]) -> List[dict] | None:
+    url = team_page_url("sperrenundverletzungen", team_slug, team_id)
+    injuries = []
+    try:
+        # get_soup zaten proxy kullanıyor
+        soup = get_soup(url)
+        inj_header = soup.find("td", string="Sakatlıklar")
+        if not inj_header:
+            return injuries
+
+        row = inj_header.find_parent("tr")
+        next_row = row.find_next_sibling()
+        while next_row and "extrarow" not in (next_row.get("class") or []):
+            inline = next_row.find("table", class_="inline-table")
+            if inline:
+                name_tag = inline.find("a", href=True)
+                if name_tag:
+                    player_name = name_tag.get_text(strip=True)
+                    matched = next((p for p in squad if p["name"] == player_name), None)
+                    position = matched["position"] if matched else ""
+
+                    injuries.append({"name": player_name, "position": position})
+            next_row = next_row.find_next_sibling()
+        return injuries
+    except Exception as e:
+        scrape_log.error("Sakatlık verisi alınamadı: %s", e)
+    return None
+
+def scrape_injuries_cached(team_slug: str, team_id: str, squad: List[dict], 
+                           team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
+    """Cache-aware sakatlık scraping"""
+    url = team_page_url("sperrenundverletzungen", team_slug, team_id)
+    if cache_mgr.is_fresh(team_name, 'injuries'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    # Hash oluştur (sadece sakatlıklar bölümünden)
+    content_hash = cache_mgr.get_content_hash(url, "table.items")
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(scrape_injuries, url, team_slug, team_id, squad)
+    
+    # Cache kontrolü
+    if not cache_mgr.should_scrape(team_name, 'injuries', content_hash):
+        return None
+    
+    # Scrape et
+    injuries = extract(scrape_injuries, url, team_slug, team_id, squad)
+    
+    if injuries is not None:
+        cache_mgr.update_cache(team_name, 'injuries', content_hash)
+    
+    return injuries
+
+
+
+def get_league_url(league_key: str) -> str | None:
+    league = LEAGUES.get(league_key.lower())
+    return f"{TM_BASE}/{league['slug']}/tabelle/wettbewerb/{league['code']}" if league else None
+
+
+def get_form_url(league_key: str) -> str | None:
+    league = LEAGUES.get(league_key.lower())
+    return f"{TM_BASE}/{league['slug']}/formtabelle/wettbewerb/{league['code']}" if league else None
+
+
+_TEAM_LINK_RE = re.compile(r"^/([^/]+)/[^/]+/verein/(\d+)")
+
+
+def discover_league_teams(league_key: str) -> List[dict]:
+    """Ligin puan tablosundan (tabelle) takımların adını, slug'ını ve id'sini çıkarır."""
+    soup = get_soup(get_league_url(league_key))
+    table = soup.find("table", class_="items")
+    teams = []
+    for row in table.find("tbody").find_all("tr", recursive=False):
+        for link in row.find_all("a", href=True):
+            m = _TEAM_LINK_RE.match(link["href"])
+            if m:
+                name = link.get("title") or link.get_text(strip=True)
+                teams.append({"name": name, "slug": m.group(1), "id": m.group(2), "league": league_key})
+                break
+    return teams
+
+
+def discover_catalog(league_keys: List[str] | None = None, path: str | None = None, write: bool = True) -> dict:
+    """
+    Lig tablolarını tarayıp katalog dosyasını günceller.
+
+    Bilinen takımlar id ile eşleştirilir (slug/lig değiştiyse güncellenir), tabloda olup katalogda
+    olmayan takımlar (ör. lige yükselenler) eklenir. Katalogdaki hiçbir takım silinmez.
+    Dosya atomik olarak yazılır; çalışan süreçler maybe_reload_catalog ile değişikliği alır.
+
+    Returns:
+        {"added": [...], "updated": [...], "failed": {lig: hata}}
+    """
+    path = path or CATALOG_PATH
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    teams = data["teams"]
+    by_id = {info["id"]: key for key, info in teams.items()}
+    report = {"added": [], "updated": [], "failed": {}}
+
+    with fetch_priority(BACKGROUND):
+        for league_key in league_keys or list(data["leagues"]):
+            try:
+                found = discover_league_teams(league_key)
+            except Exception as e:
+                scrape_log.error("Lig taranamadı (%s): %s", league_key, e)
+                report["failed"][league_key] = str(e)
+                continue
+            for team in found:
+                key = by_id.get(team["id"])
+                if key is None:
+                    key = team["name"].lower()
+                    if key in teams:
+                        key = f"{key} ({league_key})"
+                    teams[key] = team
+                    by_id[team["id"]] = key
+                    report["added"].append(key)
+                    continue
+                info = teams[key]
+                changes = {field: team[field] for field in ("slug", "league") if info.get(field) != team[field]}
+                if changes:
+                    info.update(changes)
+                    report["updated"].append(key)
+
+    if write and (report["added"] or report["updated"]):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+        log.info("Katalog güncellendi: %d eklendi, %d güncellendi", len(report["added"]), len(report["updated"]))
+    return report
+
+
+_VEREIN_ID_RE = re.compile(r"/verein/(\d+)")
+
+
+def row_team_id(row) -> str | None:
+    """Tablo satırındaki kulüp linkinden transfermarkt takım id'sini çıkarır."""
+    for link in row.find_all("a", href=True):
+        m = _VEREIN_ID_RE.search(link["href"])
+        if m:
+            return m.group(1)
+    return None
+
+
+def get_league_position(team_name: str, league_key: str, team_id: str | None = None, url: str | None = None):
+    # url parse worker'a ana süreçten verilir (worker'ın kataloğu katalog yenilemesinden eski olabilir)
+    try:
+        url = url or get_league_url(league_key)
+        if not url:
+            return
+        # get_soup zaten proxy kullanıyor
+        soup = get_soup(url) 
+        table = soup.find("table", class_="items")
+        rows = table.find("tbody").find_all("tr", recursive=False)
+        for row in rows:
+            cells = row.find_all("td")
+            if len(cells) < 3:
+                continue
+            pos = cells[0].text.strip()
+            # Satır id'si okunabiliyorsa takım id'si ile, okunamıyorsa isimle eşleştir
+            row_id = row_team_id(row) if team_id else None
+            if row_id:
+                matched = row_id == team_id
+            else:
+                matched = cells[2].text.strip().lower() == team_name.lower()
+            if matched:
+                return int(pos) if pos.isdigit() else pos
+        return
+    except Exception as e:
+        scrape_log.error("Lig sıralaması alınamadı: %s", e)
+        return
+
+def get_league_position_cached(team_name: str, league_key: str, cache_mgr: CacheManager,
+                               team_id: str | None = None) -> int | None:
+    """Cache-aware lig pozisyonu"""
+    url = get_league_url(league_key)
+    if not url:
+        return None
+    if cache_mgr.is_fresh(team_name.lower(), 'position'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    content_hash = cache_mgr.get_content_hash(url, "table.items")
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(get_league_position, url, team_name, league_key, team_id, url)
+    
+    if not cache_mgr.should_scrape(team_name.lower(), 'position', content_hash):
+        return None
+    
+    position = extract(get_league_position, url, team_name, league_key, team_id, url)
+    
+    if position is not None:
+        cache_mgr.update_cache(team_name.lower(), 'position', content_hash)
+    
+    return position
+
+def get_recent_form(team_name: str, league_key: str, team_id: str | None = None, url: str | None = None) -> dict:
+    # url parse worker'a ana süreçten verilir (worker'ın kataloğu katalog yenilemesinden eski olabilir)
+    try:
+        url = url or get_form_url(league_key)
+        if not url:
+            return
+        # get_soup zaten proxy kullanıyor
+        soup = get_soup(url)
+        rows = soup.select("div.responsive-table table tbody tr")
+        for row in rows:
+            team_cell = row.select_one("td.no-border-links.hauptlink a")
+            if not team_cell:
+                continue
+            # Satır id'si okunabiliyorsa takım id'si ile, okunamıyorsa isimle eşleştir
+            row_id = row_team_id(row) if team_id else None
+            if row_id:
+                matched = row_id == team_id
+            else:
+                matched = team_name.lower() in team_cell.text.lower()
+            if matched:
+                tds = row.find_all("td")
+                wins = int(tds[4].text.strip())
+                draws = int(tds[5].text.strip())
+                losses = int(tds[6].text.strip())
+                form_spans = tds[10].find_all("span")
+                recent_results = [s.text.strip() for s in form_spans if s.text.strip() in ["G", "B", "M"]]
+                return {"wins": wins, "draws": draws, "losses": losses, "last_matches": recent_results}
+        return
+    except Exception as e:
+        scrape_log.error("Form verisi alınamadı: %s", e)
+        return
+
+def get_recent_form_cached(team_name: str, league_key: str, cache_mgr: CacheManager,
+                           team_id: str | None = None) -> dict | None:
+    """Cache-aware form tablosu"""
+    url = get_form_url(league_key)
+    if not url:
+        return None
+    if cache_mgr.is_fresh(team_name.lower(), 'form'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    content_hash = cache_mgr.get_content_hash(url, "div.responsive-table")
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(get_recent_form, url, team_name, league_key, team_id, url)
+    
+    if not cache_mgr.should_scrape(team_name.lower(), 'form', content_hash):
+        return None
+    
+    form = extract(get_recent_form, url, team_name, league_key, team_id, url)
+    
+    if form is not None:
+        cache_mgr.update_cache(team_name.lower(), 'form', content_hash)
+    
+    return form
+
+def scrape_suspensions_kader(team_slug: str, team_id: str, season_id: int | None = None) -> list | None:
+
+    season_id = season_id or current_season_id()
+    url = team_page_url("kader", team_slug, team_id, season_id)
+
+    try:
+        soup = get_soup(url)
+
+        cezali_oyuncular = []
+
+        for row in soup.find_all("tr", class_=["odd", "even"]):
+            ausfall_span = row.find("span", class_="ausfall-table")
+            if not ausfall_span:
+                continue
+
+            name_td = row.find("td", class_="hauptlink")
+            player_name = (
+                " ".join(name_td.get_text(strip=True).split())
+                if name_td else "İsim bulunamadı"
+            )
+
+            ceza_title = ausfall_span.get("title", "Ceza bilgisi yok")
+
+            numara_div = row.find("div", class_="rn_nummer")
+            numara = numara_div.get_text(strip=True) if numara_div else "-"
+
+            pos_td = row.find("td", class_="posrela")
+            pozisyon = "-"
+            if pos_td:
+                tds = pos_td.find_all("td")
+                if len(tds) > 1:
+                    pozisyon = tds[-1].get_text(strip=True)
+
+            cezali_oyuncular.append({
+                "name": player_name,
+                "number": numara,
+                "position": pozisyon,
+                "details": ceza_title,
+                "source": "kader"
+            })
+
+        return cezali_oyuncular
+
+    except Exception as e:
+        scrape_log.warning("Kader cezalı scrape başarısız (%s): %s", team_slug, e)
+        return None
+
+def scrape_suspensions_kader_cached(team_slug: str, team_id: str, team_name: str, 
+                                     cache_mgr: CacheManager, season_id: int | None = None) -> list | None:
+    """Cache-aware kader cezalı scraping"""
+    season_id = season_id or current_season_id()
+    url = team_page_url("kader", team_slug, team_id, season_id)
+    if cache_mgr.is_fresh(team_name, 'suspensions_kader'):
+        return None  # TTL içinde: upstream'e gidilmez, kayıtlı veri kullanılır
+    
+    # ← DEĞİŞTİ: Özel suspension hash kullan
+    content_hash = cache_mgr.get_suspension_hash(url)
+    if not content_hash:
+        if cache_mgr.fetch_failed(url):
+            return None  # Upstream erişilemedi: ikinci scrape denenmez, kayıtlı veri korunur
+        return extract(scrape_suspensions_kader, url, team_slug, team_id, season_id)
+    
+    if not cache_mgr.should_scrape(team_name, 'suspensions_kader', content_hash):
+        return None
+    
+    scrape_log.info("Scraping: %s/suspensions_kader", team_name)
+    suspensions = extract(scrape_suspensions_kader, url, team_slug, team_id, season_id)
+    
+    scrape_log.info("Sonuç: %s/suspensions_kader = %d oyuncu", team_name, len(suspensions) if suspensions else 0)
+    
+    if suspensions is not None:
+        cache_mgr.update_cache(team_name, 'suspensions_kader', content_hash)
+    
+    return suspensions
+
+
+# --- Süreç içi kompakt takım snapshot'ları ---
+# Oyuncu kayıtları dict yerine tuple tabanlı NamedTuple olarak tutulur; pozisyon/durum
+# metinleri intern edilir, piyasa değeri bir kez sayıya çevrilir.
+
+_MARKET_VALUE_RE = re.compile(r"(\d[\d.,]*)\s*(bin|mil|mlr|k|m|bn)?", re.IGNORECASE)
+_MARKET_VALUE_UNITS = {"bin": 1_000, "k": 1_000, "mil": 1_000_000, "m": 1_000_000, "mlr": 1_000_000_000, "bn": 1_000_000_000}
+
+
+def parse_market_value(text: str) -> int | None:
+    """'€5,00 mil.' / '500 bin €' gibi piyasa değerini avroya çevirir. Değer yoksa None."""
+    m = _MARKET_VALUE_RE.search(text or "")
+    if not m:
+        return None
+    number = m.group(1)
+    if "," in number:
+        number = number.replace(".", "").replace(",", ".")
+    elif number.count(".") > 1 or (m.group(2) is None and "." in number):
+        number = number.replace(".", "")
+    try:
+        value = float(number)
+    except ValueError:
+        return None
+    return int(round(value * _MARKET_VALUE_UNITS.get((m.group(2) or "").lower(), 1)))
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SquadPlayer(NamedTuple):
+    name: str
+    position: str
+    market_value: str
+    market_value_eur: int | None
+
+
+class Absence(NamedTuple):
+    """Sakat veya cezalı oyuncu; kaynağa göre bazı alanlar boş kalır (to_dict'te yazılmaz)."""
+    name: str
+    position: str | None = None
+    status: str | None = None
+    details: str | None = None
+    number: str | None = None
+    source: str | None = None
+
+
+class PlayerStat(NamedTuple):
+    name: str
+    played_matches: int
+    minutes_played: int
+
+
+class RecentForm(NamedTuple):
+    wins: int
+    draws: int
+    losses: int
+    last_matches: str  # "GBMGG" (tek string, liste yerine)
+
+
+def _absence(d: dict) -> Absence:
+    return Absence(
+        d.get("name", ""),
+        _intern(d.get("position")), _intern(d.get("status")), _intern(d.get("details")),
+        d.get("number"), _intern(d.get("source")),
+    )
+
+
+def _absence_dict(a: Absence) -> dict:
+    return {k: v for k, v in zip(Absence._fields, a) if v is not None}
+
+
+def json_bytes(obj) -> bytes:
+    """Objeyi UTF-8 JSON byte'larına çevirir (orjson varsa onunla, yoksa stdlib ile)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class EncodedBody:
+    """
+    Bir kez üretilmiş JSON yanıt gövdesi ve sıkıştırılmış varyantları.
+    Okuma yolunda encode/sıkıştırma yapılmaz; hazır byte'lar olduğu gibi gönderilir.
+    """
+
+    __slots__ = ("identity", "gzip", "br", "etag")
+
+    # Bundan küçük gövdeler sıkıştırılmaz
+    MIN_COMPRESS = 1024
+
+    def __init__(self, obj):
+        self.identity = json_bytes(obj)
+        self.etag = hashlib.blake2b(self.identity, digest_size=16).hexdigest()
+        compress = len(self.identity) >= self.MIN_COMPRESS
+        self.gzip = gzip.compress(self.identity, compresslevel=6) if compress else None
+        self.br = brotli.compress(self.identity, quality=5) if compress and brotli is not None else None
+
+    def negotiate(self, accept_encoding: str) -> tuple[bytes, str | None]:
+        """Accept-Encoding'e göre (gövde, Content-Encoding) seçer."""
+        accept = accept_encoding.lower()
+        if self.br is not None and "br" in accept:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accept:
+            return self.gzip, "gzip"
+        return self.identity, None
+
+
+class TeamSnapshot:
+    """
+    Bir takımın team_data dokümanının kompakt, değiştirilemez bellek içi kopyası.
+    to_dict() Firestore'daki biçimin aynısını üretir; body() yanıt gövdesini bir kez üretip saklar.
+    """
+
+    __slots__ = ("team", "last_checked", "position", "squad", "injuries", "suspensions", "form", "stats", "extra",
+                 "_body")
+
+    def __init__(self, team=None, last_checked=None, position=None, squad=None, injuries=None,
+                 suspensions=None, form=None, stats=None, extra=None):
+        self.team = team
+        self.last_checked = last_checked
+        self.position = position
+        self.squad = squad
+        self.injuries = injuries
+        self.suspensions = suspensions
+        self.form = form
+        self.stats = stats
+        self.extra = extra or {}
+        self._body = None
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> "TeamSnapshot":
+        doc = dict(doc)
+        squad = doc.pop("squad", None)
+        injuries = doc.pop("injuries", None)
+        suspensions = doc.pop("suspensions", None)
+        form = doc.pop("recent_form", None)
+        stats = doc.pop("stats", None)
+        return cls(
+            team=doc.pop("team", None),
+            last_checked=doc.pop("last_checked", None),
+            position=doc.pop("position_in_league", None),
+            squad=None if squad is None else tuple(
+                SquadPlayer(p.get("name", ""), _intern(p.get("position", "")), p.get("market_value", ""),
+                            parse_market_value(p.get("market_value", "")))
+                for p in squad
+            ),
+            injuries=None if injuries is None else tuple(_absence(p) for p in injuries),
+            suspensions=None if suspensions is None else tuple(_absence(p) for p in suspensions),
+            form=None if form is None else RecentForm(
+                form.get("wins", 0), form.get("draws", 0), form.get("losses", 0),
+                "".join(form.get("last_matches", []))),
+            stats=None if stats is None else tuple(
+                PlayerStat(p.get("name", ""), p.get("played_matches", 0), p.get("minutes_played", 0))
+                for p in stats
+            ),
+            extra=doc,
+        )
+
+    def merge(self, update: dict) -> "TeamSnapshot":
+        """set(merge=True) ile yazılan kısmi güncellemeyi uygular, yeni snapshot döner."""
+        changed = TeamSnapshot.from_dict(update)
+        merged = TeamSnapshot(extra={**self.extra, **changed.extra})
+        for field, key in _SNAPSHOT_KEYS.items():
+            setattr(merged, field, getattr(changed if key in update else self, field))
+        return merged
+
+    def to_dict(self) -> dict:
+        data = dict(self.extra)
+        if self.team is not None:
+            data["team"] = self.team
+        if self.last_checked is not None:
+            data["last_checked"] = self.last_checked
+        if self.position is not None:
+            data["position_in_league"] = self.position
+        if self.squad is not None:
+            data["squad"] = [{"name": p.name, "position": p.position, "market_value": p.market_value} for p in self.squad]
+        if self.injuries is not None:
+            data["injuries"] = [_absence_dict(a) for a in self.injuries]
+        if self.suspensions is not None:
+            data["suspensions"] = [_absence_dict(a) for a in self.suspensions]
+        if self.form is not None:
+            data["recent_form"] = {"wins": self.form.wins, "draws": self.form.draws, "losses": self.form.losses,
+                                   "last_matches": list(self.form.last_matches)}
+        if self.stats is not None:
+            data["stats"] = [dict(zip(PlayerStat._fields, p)) for p in self.stats]
+        return data
+
+    def body(self) -> EncodedBody:
+        """Önceden encode edilmiş JSON gövdesi (snapshot değişmez olduğu için bir kez üretilir)."""
+        if self._body is None:
+            self._body = EncodedBody(self.to_dict())
+        return self._body
+
+
+# Snapshot alanı -> team_data dokümanındaki anahtar
+_SNAPSHOT_KEYS = {
+    "team": "team",
+    "last_checked": "last_checked",
+    "position": "position_in_league",
+    "squad": "squad",
+    "injuries": "injuries",
+    "suspensions": "suspensions",
+    "form": "recent_form",
+    "stats": "stats",
+}
+
+
+# Firestore düzeni: "legacy" = tek team_data dokümanı (+ new_data'da istatistik kopyası);
+# "sharded" = küçük team_summary dokümanı + veri tipi başına team_parts dokümanı;
+# "dual" = geçiş dönemi için ikisine birden yazar, sharded düzenden okur.
+STORAGE_LAYOUT = os.getenv("STORAGE_LAYOUT", "legacy").lower()
+STORAGE_LAYOUTS = ("legacy", "sharded", "dual")
+if STORAGE_LAYOUT not in STORAGE_LAYOUTS:
+    raise RuntimeError(f"STORAGE_LAYOUT {STORAGE_LAYOUTS} içinden olmalı: {STORAGE_LAYOUT}")
+
+# Ayrı dokümanda tutulan (büyük, liste) alanlar; geri kalanı özet dokümanında kalır
+PART_FIELDS = ("squad", "injuries", "suspensions", "stats")
+
+
+def team_part_doc_id(team_doc: str, field: str) -> str:
+    return f"{team_doc}__{field}"
+
+
+class TeamStore:
+    """
+    Takım verisinin Firestore'daki düzenini (STORAGE_LAYOUT) soyutlar.
+
+    Sharded düzende team_summary/<takım> dokümanı küçük alanları (takım, last_checked, sıra, form)
+    ve hangi parçaların var olduğunu tutar; her liste alanı team_parts/<takım>__<alan> dokümanındadır.
+    load(fields=...) sadece istenen parça dokümanlarını okur. Özeti olmayan takımlar okunurken
+    legacy dokümandan taşınır.
+    """
+
+    def __init__(self, layout: str = STORAGE_LAYOUT):
+        self.layout = layout
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sharded(self) -> bool:
+        return self.layout in ("sharded", "dual")
+
+    def _get(self, collection: str, doc_id: str) -> dict | None:
+        doc = DB.collection(collection).document(doc_id).get()
+        with self._lock:
+            self.reads += 1
+        return doc.to_dict() if doc.exists else None
+
+    def save(self, team_doc: str, data: dict):
+        """save_team_data'nın yazdığı veriyi (set merge=True anlamıyla) düzene göre yazar."""
+        if self.layout in ("legacy", "dual"):
+            DB.collection("team_data").document(team_doc).set(data, merge=True)
+            if "stats" in data:
+                DB.collection("new_data").document(team_doc).set({"player_stats": data["stats"]}, merge=True)
+        if self.sharded:
+            self._save_sharded(team_doc, data)
+
+    def _save_sharded(self, team_doc: str, data: dict):
+        # Önce parçalar, sonra özet: özette görünen bir parça her zaman okunabilir olur
+        updated_at = data.get("last_checked") or datetime.now(timezone.utc).isoformat()
+        summary = {k: v for k, v in data.items() if k not in PART_FIELDS}
+        parts = {}
+        for field in PART_FIELDS:
+            if field not in data:
+                continue
+            DB.collection("team_parts").document(team_part_doc_id(team_doc, field)).set(
+                {"team_doc": team_doc, "field": field, "updated_at": updated_at, "value": data[field]})
+            parts[field] = {"count": len(data[field]), "updated_at": updated_at}
+        if parts:
+            summary["parts"] = parts
+        DB.collection("team_summary").document(team_doc).set(summary, merge=True)
+
+    def load(self, team_doc: str, fields: List[str] | None = None) -> dict | None:
+        """
+        Takımın team_data biçimindeki verisi; fields verilirse sadece o alanlar (team ve
+        last_checked her zaman dahil). Takımın kaydı yoksa None.
+        """
+        if not self.sharded:
+            data = self._load_legacy(team_doc)
+            return data if data is None or fields is None else self.project(data, fields)
+
+        summary = self._get("team_summary", team_doc)
+        if summary is None:
+            data = self._load_legacy(team_doc)
+            if data is None:
+                return None
+            store_log.info("Sharded düzene taşınıyor (okuma sırasında): %s", team_doc)
+            self._save_sharded(team_doc, data)
+            return data if fields is None else self.project(data, fields)
+
+        available = summary.pop("parts", {})
+        wanted = [f for f in (PART_FIELDS if fields is None else fields) if f in available]
+        data = summary if fields is None else self.project(summary, fields)
+        if wanted:
+            # Parça dokümanları tek batch okumayla (get_all; dönüş sırası garanti değil)
+            refs = [DB.collection("team_parts").document(team_part_doc_id(team_doc, f)) for f in wanted]
+            parts = {doc.id: doc.to_dict() for doc in DB.get_all(refs) if doc.exists}
+            with self._lock:
+                self.reads += len(refs)
+            for field in wanted:
+                part = parts.get(team_part_doc_id(team_doc, field))
+                if part is not None:
+                    data[field] = part["value"]
+        return data
+
+    def _load_legacy(self, team_doc: str) -> dict | None:
+        data = self._get("team_data", team_doc)
+        if data is not None and "stats" not in data:
+            # Eski kayıtlarda istatistik sadece new_data'da olabilir
+            stats = self._get("new_data", team_doc)
+            if stats and "player_stats" in stats:
+                data["stats"] = stats["player_stats"]
+        return data
+
+    @staticmethod
+    def project(data: dict, fields: List[str]) -> dict:
+        keep = {"team", "last_checked", *fields}
+        return {k: v for k, v in data.items() if k in keep}
+
+    def migrate(self, team_docs: List[str] | None = None, dry_run: bool = False,
+                delete_legacy: bool = False) -> dict:
+        """
+        team_data/new_data dokümanlarını sharded düzene kopyalar. Takım başına legacy doküman,
+        özet ve en büyük parça boyutlarını (byte) raporlar. delete_legacy sadece layout
+        "sharded" iken (legacy'den artık okunmuyorsa) kullanılmalıdır.
+        """
+        if team_docs is None:
+            team_docs = [doc.id for doc in DB.collection("team_data").stream()]
+        report = {"migrated": [], "missing": [], "sizes": {}}
+        for team_doc in team_docs:
+            data = self._load_legacy(team_doc)
+            if data is None:
+                report["missing"].append(team_doc)
+                continue
+            summary = {k: v for k, v in data.items() if k not in PART_FIELDS}
+            report["sizes"][team_doc] = {
+                "legacy": len(json_bytes(data)),
+                "summary": len(json_bytes(summary)),
+                **{f: len(json_bytes(data[f])) for f in PART_FIELDS if f in data},
+            }
+            if not dry_run:
+                self._save_sharded(team_doc, data)
+                if delete_legacy:
+                    DB.collection("team_data").document(team_doc).delete()
+                    DB.collection("new_data").document(team_doc).delete()
+            report["migrated"].append(team_doc)
+        return report
+
+    def snapshot(self) -> dict:
+        return {"layout": self.layout, "reads": self.reads}
+
+
+TEAM_STORE = TeamStore()
+
+
+class SnapshotStore:
+    """
+    Takım başına TeamSnapshot tutan süreç içi depo.
+    İlk erişimde Firestore'dan (TEAM_STORE) yüklenir, save_team_data ile güncel tutulur.
+    max_age verilirse (çok düğümlü modda, takımı başka düğüm de yazabilir) bu süreden uzun
+    süredir yüklenmemiş/güncellenmemiş snapshot'lar Firestore'dan yeniden yüklenir.
+    """
+
+    def __init__(self, max_age: float | None = None):
+        self.max_age = max_age
+        self._snapshots: Dict[str, TeamSnapshot] = {}
+        self._loaded: Dict[str, float] = {}
+        # (takım, alanlar) -> (?parts= yanıt gövdesi, üretildiği an); takım güncellenince düşer
+        self._projections: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def _current(self, team_doc: str) -> TeamSnapshot | None:
+        snapshot = self._snapshots.get(team_doc)
+        if snapshot is not None and self.max_age is not None \
+                and time.monotonic() - self._loaded.get(team_doc, 0.0) > self.max_age:
+            return None
+        return snapshot
+
+    def get(self, team_doc: str) -> TeamSnapshot | None:
+        """Takımın snapshot'ı; bellekte yoksa (veya süresi dolduysa) Firestore'dan yükler. Doküman yoksa None."""
+        snapshot = self._current(team_doc)
+        if snapshot is not None or DB is None:
+            return snapshot
+        data = TEAM_STORE.load(team_doc)
+        if data is None:
+            return None
+        snapshot = TeamSnapshot.from_dict(data)
+        snapshot.body()
+        with self._lock:
+            if self._current(team_doc) is None:
+                self._snapshots[team_doc] = snapshot
+                self._loaded[team_doc] = time.monotonic()
+            return self._snapshots[team_doc]
+
+    def projection(self, team_doc: str, fields: List[str]) -> EncodedBody | None:
+        """
+        Sadece istenen alanları içeren, önceden encode edilmiş yanıt gövdesi. Tam snapshot bellekteyse
+        ondan, yoksa TEAM_STORE'dan sadece o alanlar okunarak üretilir ve saklanır. Kayıt yoksa None.
+        """
+        key = (team_doc, tuple(sorted(fields)))
+        cached = self._projections.get(key)
+        if cached is not None and (self.max_age is None or time.monotonic() - cached[1] <= self.max_age):
+            return cached[0]
+        snapshot = self._current(team_doc)
+        if snapshot is not None:
+            data = TeamStore.project(snapshot.to_dict(), fields)
+        elif DB is not None:
+            data = TEAM_STORE.load(team_doc, fields)
+        else:
+            data = None
+        if data is None:
+            return None
+        body = EncodedBody(data)
+        with self._lock:
+            self._projections[key] = (body, time.monotonic())
+        return body
+
+    def _drop_projections(self, team_doc: str | None):
+        for key in [k for k in self._projections if team_doc is None or k[0] == team_doc]:
+            self._projections.pop(key, None)
+
+    def update(self, team_doc: str, data: dict):
+        """Firestore'a merge ile yazılan veriyi bellekteki snapshot'a uygular (gövde burada yeniden üretilir)."""
+        with self._lock:
+            self._drop_projections(team_doc)
+            current = self._current(team_doc)
+            if current is None:
+                # Süresi dolmuş bir kopyaya merge edilmez; sonraki get Firestore'dan yükler
+                self._snapshots.pop(team_doc, None)
+                return
+            merged = self._snapshots[team_doc] = current.merge(data)
+            self._loaded[team_doc] = time.monotonic()
+        merged.body()
+
+    def invalidate(self, team_doc: str | None = None):
+        with self._lock:
+            self._drop_projections(team_doc)
+            if team_doc is None:
+                self._snapshots.clear()
+                self._loaded.clear()
+            else:
+                self._snapshots.pop(team_doc, None)
+                self._loaded.pop(team_doc, None)
+
+
+SNAPSHOTS = SnapshotStore()
+
+
+# Geçmiş: takım/veri tipi/sezon başına küçük bir team_history başlık dokümanı ve her sürüm için
+# versions alt koleksiyonunda ayrı bir doküman (tek dokümanın 1 MiB sınırına takılmamak için).
+# Her sürüm ya tam değer ("full") ya da bir önceki sürüme göre fark ("delta") olarak saklanır. HISTORY_KEYFRAME_EVERY sürümde
+# bir tam değer yazılır ki bir ana dönmek için uzun bir delta zinciri gerekmesin.
+HISTORY_KEYFRAME_EVERY = int(os.getenv("HISTORY_KEYFRAME_EVERY", "20"))
+# Bellekte son durumu tutulan en fazla geçmiş dokümanı (LRU); sürümlerin kendisi bellekte tutulmaz
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "2048"))
+
+# Geçmişi tutulan veri tipi -> team_data dokümanındaki alan
+HISTORY_FIELDS = {k: v for k, v in _SNAPSHOT_KEYS.items() if k not in ("team", "last_checked")}
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _item_key(item) -> str:
+    return hashlib.md5(_canonical(item).encode("utf-8")).hexdigest()[:12]
+
+
+def make_delta(old, new) -> dict | None:
+    """
+    new'i old'dan üreten fark. Listeler indeks bazlı yama ("splice": [başlangıç, bitiş, yeni elemanlar])
+    olarak saklanır, böylece sıra ve tekrar eden elemanlar korunur; dict'ler anahtar bazında
+    (set/unset) karşılaştırılır. Farklı tiplerde None döner (tam değer saklanmalı).
+    """
+    if isinstance(old, list) and isinstance(new, list):
+        matcher = difflib.SequenceMatcher(None, [_item_key(i) for i in old], [_item_key(i) for i in new],
+                                          autojunk=False)
+        return {"splice": [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]}
+    if isinstance(old, dict) and isinstance(new, dict):
+        return {
+            "set": {k: v for k, v in new.items() if old.get(k) != v},
+            "unset": [k for k in old if k not in new],
+        }
+    return None
+
+
+def apply_delta(old, delta: dict):
+    """make_delta'nın tersi: old + delta -> yeni değer."""
+    if "set" in delta:
+        value = {k: v for k, v in old.items() if k not in delta["unset"]}
+        value.update(delta["set"])
+        return value
+    value = list(old)
+    for start, end, items in reversed(delta["splice"]):
+        value[start:end] = items
+    return value
+
+
+def diff_items(old: list, new: list) -> dict:
+    """İki liste arasında eklenen ve çıkan elemanlar (tekrarlar sayılarak, sıradan bağımsız)."""
+    old_counts = Counter(_item_key(item) for item in old)
+    new_counts = Counter(_item_key(item) for item in new)
+    added_counts, removed_counts = new_counts - old_counts, old_counts - new_counts
+    added, removed = [], []
+    for item in new:
+        key = _item_key(item)
+        if added_counts[key]:
+            added_counts[key] -= 1
+            added.append(item)
+    for item in old:
+        key = _item_key(item)
+        if removed_counts[key]:
+            removed_counts[key] -= 1
+            removed.append(item)
+    return {"added": added, "removed": removed}
+
+
+def history_doc_id(team_doc: str, data_type: str, season_id: int) -> str:
+    return f"{team_doc}__{data_type}__{season_id}"
+
+
+def _to_utc_iso(when: str) -> str:
+    """ISO tarih/zamanı UTC isoformat'ına çevirir (saat dilimi yoksa UTC kabul edilir); hatalıysa ValueError."""
+    parsed = datetime.fromisoformat(when)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+class HistoryStore:
+    """
+    Takım verisinin sezon ve scrape zamanına göre sürümlenmiş geçmişi (team_history koleksiyonu).
+
+    Sadece değişen değerler yeni sürüm olarak yazılır ve CHANGE_FEED'e bildirilir
+    (sezonun ilk sürümü bildirilmez). Bellekte yalnızca doküman başına son durum (başlık, son değer,
+    son tam sürümden beri delta sayısı) en fazla `max_docs` doküman için LRU olarak tutulur; yeni
+    sürüm eklemek sürümleri yeniden okumaz, zaman sorguları sürümleri Firestore'dan okur. Kilitler
+    doküman başınadır; farklı takımların kaydı birbirini beklemez.
+    """
+
+    def __init__(self, max_docs: int = HISTORY_CACHE_SIZE):
+        self.max_docs = max_docs
+        # doc_id -> {"head": başlık, "count": sürüm sayısı, "value": son değer, "hash": içerik hash'i,
+        #            "since_keyframe": son tam sürümden beri delta sayısı}
+        self._state: OrderedDict[str, dict] = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _doc_lock(self, doc_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(doc_id, threading.Lock())
+
+    @staticmethod
+    def _versions_ref(doc_id: str):
+        return DB.collection("team_history").document(doc_id).collection("versions")
+
+    def _read(self, doc_id: str) -> List[dict] | None:
+        """Dokümanın tüm sürümleri (sıra numarasına göre); geçmiş yoksa None."""
+        if DB is None:
+            return None
+        return [v.to_dict() for v in self._versions_ref(doc_id).stream()] or None
 
-def scrape_suspensions_cached(team_slug: str, team_id: str, squad: List[dict],
-                              team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
-    """Cache-aware ceza scraping"""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/startseite/verein/{team_id}"
-    
-    # ← DEĞİŞTİ: Özel suspension hash kullan
-    content_hash = cache_mgr.get_suspension_hash(url)
-    if not content_hash:
-        return scrape_suspensions(team_slug, team_id, squad)
-    
-    if not cache_mgr.should_scrape(team_name, 'suspensions', content_hash):
-        print(f"[CACHE HIT] {team_name}/suspensions")
-        return None
-    
-    print(f"[SCRAPING] {team_name}/suspensions")
-    suspensions = scrape_suspensions(team_slug, team_id, squad)
-    
-    print(f"[SONUÇ] {team_name}/suspensions = {len(suspensions) if suspensions else 0} oyuncu")
-    
-    if suspensions is not None:
-        cache_mgr.update_cache(team_name, 'suspensions', content_hash)
-    
-    return suspensions
+    def _load(self, doc_id: str) -> dict | None:
+        """Dokümanın son durumu (doküman kilidi altında çağrılmalı); bellekte yoksa sürümlerden kurulur."""
+        with self._lock:
+            state = self._state.get(doc_id)
+            if state is not None:
+                self._state.move_to_end(doc_id)
+                return state
+        if DB is None:
+            return None
+        snapshot = DB.collection("team_history").document(doc_id).get()
+        versions = self._read(doc_id) if snapshot.exists else None
+        if not versions:
+            return None
+        value = self._replay(versions)[1]
+        since_keyframe = 0
+        for version in reversed(versions):
+            if "full" in version:
+                break
+            since_keyframe += 1
+        state = {"head": snapshot.to_dict(), "count": len(versions), "value": value,
+                 "hash": _item_key(value), "since_keyframe": since_keyframe}
+        self._remember(doc_id, state)
+        return state
 
+    def _remember(self, doc_id: str, state: dict):
+        with self._lock:
+            self._state[doc_id] = state
+            self._state.move_to_end(doc_id)
+            while len(self._state) > self.max_docs:
+                self._state.popitem(last=False)
 
-def scrape_squad(team_slug: str, team_id: str) -> List[dict] | None:
-    try:
-        url = f"https://www.transfermarkt.com.tr/{team_slug}/startseite/verein/{team_id}"
-        soup = get_soup(url)
+    def invalidate(self, team_doc: str):
+        """Takımın bellekteki geçmiş durumunu bırakır (sahibi başka düğüme geçtiğinde; sonraki erişim Firestore'dan okur)."""
+        prefix = f"{team_doc}__"
+        with self._lock:
+            for doc_id in [d for d in self._state if d.startswith(prefix)]:
+                self._state.pop(doc_id, None)
 
-        table = soup.find("table", class_="items")
-        if not table:
-            raise ValueError("Squad table not found")
+    @staticmethod
+    def _replay(versions: List[dict], until: str | None = None):
+        """Sürümleri sırayla uygular; (son sürümün zamanı, değer) döner (until'den sonrakiler atlanır)."""
+        scraped_at, value = None, None
+        for version in versions:
+            if until is not None and version["scraped_at"] > until:
+                break
+            value = version["full"] if "full" in version else apply_delta(value, version["delta"])
+            scraped_at = version["scraped_at"]
+        return scraped_at, value
 
-        rows = table.find_all("tr", class_=["odd", "even"])
-        players = []
+    def record(self, team_doc: str, data_type: str, value, scraped_at: str) -> bool:
+        """Değer son sürümden farklıysa yeni sürüm ekler; eklendiyse True."""
+        scraped_at = _to_utc_iso(scraped_at)
+        season_id = current_season_id(datetime.fromisoformat(scraped_at))
+        doc_id = history_doc_id(team_doc, data_type, season_id)
+        content_hash = _item_key(value)
 
-        for row in rows:
-            name = row.find("td", class_="hauptlink").text.strip()
-            position = row.find_all("td")[4].text.strip()
-            market_value = row.find_all("td")[-1].text.strip()
-            players.append({
-                "name": name,
-                "position": position,
-                "market_value": market_value
-            })
+        with self._doc_lock(doc_id):
+            state = self._load(doc_id)
+            if state is not None and state["hash"] == content_hash:
+                return False
+            previous = state["value"] if state is not None else None
+            delta = None
+            if state is not None and state["since_keyframe"] + 1 < HISTORY_KEYFRAME_EVERY:
+                delta = make_delta(previous, value)
+            version = {"scraped_at": scraped_at, "full": value} if delta is None else {"scraped_at": scraped_at, "delta": delta}
 
-        if not players:
-            raise ValueError("Squad empty")
+            seq = state["count"] if state is not None else 0
+            head = state["head"] if state is not None else {
+                "team": team_doc, "data_type": data_type, "season_id": season_id}
+            doc_head = dict(head, count=seq + 1, last_scraped_at=scraped_at)
+            if DB is not None:
+                # Önce sürüm, sonra başlık: başlıktaki sayaç hiçbir zaman yazılmamış bir sürümü göstermez
+                self._versions_ref(doc_id).document(f"{seq:06d}").set(version)
+                DB.collection("team_history").document(doc_id).set(doc_head)
+            self._remember(doc_id, {
+                "head": doc_head, "count": seq + 1, "value": value, "hash": content_hash,
+                "since_keyframe": 0 if delta is None else state["since_keyframe"] + 1})
+        store_log.info("Geçmişe yeni sürüm eklendi: %s (%s)", doc_id, "tam" if delta is None else "delta")
+        if state is not None:
+            CHANGE_FEED.publish(team_doc, data_type, previous, value, scraped_at)
+        return True
 
-        return players
+    def record_team(self, team_doc: str, team_data: dict) -> List[str]:
+        """save_team_data'ya giden veriyi kaydeder; yeni sürüm yazılan veri tiplerini döner."""
+        scraped_at = team_data.get("last_checked") or datetime.now(timezone.utc).isoformat()
+        return [
+            data_type for data_type, field in HISTORY_FIELDS.items()
+            if field in team_data and self.record(team_doc, data_type, team_data[field], scraped_at)
+        ]
 
-    except Exception as e:
-        print(f"[HATA] Squad scrape başarısız ({team_slug}): {e}", file=sys.stderr)
-        return None
+    def state_at(self, team_doc: str, data_type: str, at: str, season_id: int | None = None) -> dict | None:
+        """at anındaki değer: {"scraped_at", "value"}; o sezonda o ana kadar sürüm yoksa None."""
+        at = _to_utc_iso(at)
+        season_id = season_id or current_season_id(datetime.fromisoformat(at))
+        versions = self._read(history_doc_id(team_doc, data_type, season_id))
+        if versions is None:
+            return None
+        scraped_at, value = self._replay(versions, until=at)
+        return {"scraped_at": scraped_at, "value": value} if scraped_at is not None else None
 
-def scrape_squad_cached(team_slug: str, team_id: str, team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
-    """Cache-aware kadro scraping"""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/startseite/verein/{team_id}"
-    
-    # Hash oluştur
-    content_hash = cache_mgr.get_content_hash(url, "table.items")
-    if not content_hash:
-        print(f"[UYARI] Squad hash oluşturulamadı: {team_name}", file=sys.stderr)
-        return scrape_squad(team_slug, team_id)  # Normal scrape'e devam et
-    
-    # Cache kontrolü
-    if not cache_mgr.should_scrape(team_name, 'squad', content_hash):
-        return None  # None = cache kullan, eski veriyi koru
-    
-    # Scrape et
-    squad = scrape_squad(team_slug, team_id)
-    
-    # Başarılıysa cache'i güncelle
-    if squad is not None:
-        cache_mgr.update_cache(team_name, 'squad', content_hash)
-    
-    return squad
+    def changes_since(self, team_doc: str, data_type: str, since: str, season_id: int | None = None) -> List[dict]:
+        """
+        since'den sonraki değişiklikler, bir önceki sürüme göre fark olarak (çıkan elemanlar hash yerine kendisiyle).
+        season_id verilmezse since'in sezonundan bu sezona kadar tüm sezonlar sırayla taranır (her sezonun
+        ilk sürümü tam değer olarak döner).
+        """
+        since = _to_utc_iso(since)
+        first = season_id or current_season_id(datetime.fromisoformat(since))
+        last = season_id or current_season_id()
+        changes = []
+        for season in range(first, last + 1):
+            versions = self._read(history_doc_id(team_doc, data_type, season))
+            if versions is not None:
+                changes.extend(self._changes(versions, since))
+        return changes
 
-def scrape_injuries(team_slug: str, team_id: str, squad: List[dict]) -> List[dict] | None:
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/sperrenundverletzungen/verein/{team_id}"
-    injuries = []
-    try:
-        # get_soup zaten proxy kullanıyor
-        soup = get_soup(url)
-        inj_header = soup.find("td", string="Sakatlıklar")
-        if not inj_header:
-            return injuries
+    @staticmethod
+    def _changes(versions: List[dict], since: str) -> List[dict]:
+        changes, value = [], None
+        for version in versions:
+            previous = value
+            value = version["full"] if "full" in version else apply_delta(value, version["delta"])
+            if version["scraped_at"] <= since:
+                continue
+            if isinstance(previous, list) and isinstance(value, list):
+                delta = diff_items(previous, value)
+            else:
+                delta = make_delta(previous, value) if previous is not None else None
+            change = {"scraped_at": version["scraped_at"]}
+            change.update(delta if delta is not None else {"full": value})
+            changes.append(change)
+        return changes
 
-        row = inj_header.find_parent("tr")
-        next_row = row.find_next_sibling()
-        while next_row and "extrarow" not in (next_row.get("class") or []):
-            inline = next_row.find("table", class_="inline-table")
-            if inline:
-                name_tag = inline.find("a", href=True)
-                if name_tag:
-                    player_name = name_tag.get_text(strip=True)
-                    matched = next((p for p in squad if p["name"] == player_name), None)
-                    position = matched["position"] if matched else ""
 
-                    injuries.append({"name": player_name, "position": position})
-            next_row = next_row.find_next_sibling()
-        return injuries
-    except Exception as e:
-        print(f"Sakatlık verisi alınamadı: {e}", file=sys.stderr)
-    return None
+HISTORY = HistoryStore()
 
-def scrape_injuries_cached(team_slug: str, team_id: str, squad: List[dict], 
-                           team_name: str, cache_mgr: CacheManager) -> List[dict] | None:
-    """Cache-aware sakatlık scraping"""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/sperrenundverletzungen/verein/{team_id}"
-    
-    # Hash oluştur (sadece sakatlıklar bölümünden)
-    content_hash = cache_mgr.get_content_hash(url, "table.items")
-    if not content_hash:
-        return scrape_injuries(team_slug, team_id, squad)
-    
-    # Cache kontrolü
-    if not cache_mgr.should_scrape(team_name, 'injuries', content_hash):
-        return None
-    
-    # Scrape et
-    injuries = scrape_injuries(team_slug, team_id, squad)
-    
-    if injuries is not None:
-        cache_mgr.update_cache(team_name, 'injuries', content_hash)
-    
-    return injuries
 
+# Değişiklik bildirimleri: geçmişe yeni sürüm yazıldığında (yani çıkarılan değer gerçekten
+# değiştiğinde) olay üretilir ve yapılandırılmış sink'lere dağıtılır.
+CHANGE_WEBHOOK_URL = os.getenv("CHANGE_WEBHOOK_URL", "")
+CHANGE_WEBHOOK_SECRET = os.getenv("CHANGE_WEBHOOK_SECRET", "")
+CHANGE_WEBHOOK_BATCH = int(os.getenv("CHANGE_WEBHOOK_BATCH", "50"))
+CHANGE_WEBHOOK_INTERVAL = float(os.getenv("CHANGE_WEBHOOK_INTERVAL", "5"))
+CHANGE_WEBHOOK_MAX_BACKOFF = float(os.getenv("CHANGE_WEBHOOK_MAX_BACKOFF", "300"))
+CHANGE_WEBHOOK_ATTEMPTS = int(os.getenv("CHANGE_WEBHOOK_ATTEMPTS", "5"))
+CHANGE_FIRESTORE = os.getenv("CHANGE_FIRESTORE", "0") == "1"
+CHANGE_QUEUE_SIZE = int(os.getenv("CHANGE_QUEUE_SIZE", "0"))
 
 
-def get_league_url(league_key: str) -> str | None:
-    url_map = {
-        "en1": "https://www.transfermarkt.com.tr/premier-league/tabelle/wettbewerb/GB1",
-        "es1": "https://www.transfermarkt.com.tr/laliga/tabelle/wettbewerb/ES1",
-        "de1": "https://www.transfermarkt.com.tr/bundesliga/tabelle/wettbewerb/L1",
-        "tr1": "https://www.transfermarkt.com.tr/super-lig/tabelle/wettbewerb/TR1",
-        "fr1": "https://www.transfermarkt.com.tr/ligue-1/tabelle/wettbewerb/FR1",
-        "br1": "https://www.transfermarkt.com.tr/campeonato-brasileiro-serie-a/tabelle/wettbewerb/BRA1",
-        "sa1": "https://www.transfermarkt.com.tr/saudi-professional-league/tabelle/wettbewerb/SA1",
-        "it1": "https://www.transfermarkt.com.tr/serie-a/tabelle/wettbewerb/IT1",
-        "hl1": "https://www.transfermarkt.com.tr/eredivisie/tabelle/wettbewerb/NL1",
-        "pt1": "https://www.transfermarkt.com.tr/liga-nos/tabelle/wettbewerb/PO1"
-    }
-    return url_map.get(league_key.lower())
+def _item_label(item) -> str:
+    return item.get("name", _item_key(item)) if isinstance(item, dict) else str(item)
 
 
-def get_form_url(league_key: str) -> str | None:
-    url_map = {
-        "en1": "https://www.transfermarkt.com.tr/premier-league/formtabelle/wettbewerb/GB1",
-        "es1": "https://www.transfermarkt.com.tr/laliga/formtabelle/wettbewerb/ES1",
-        "de1": "https://www.transfermarkt.com.tr/bundesliga/formtabelle/wettbewerb/L1",
-        "tr1": "https://www.transfermarkt.com.tr/super-lig/formtabelle/wettbewerb/TR1",
-        "fr1": "https://www.transfermarkt.com.tr/ligue-1/formtabelle/wettbewerb/FR1",
-        "br1": "https://www.transfermarkt.com.tr/campeonato-brasileiro-serie-a/formtabelle/wettbewerb/BRA1",
-        "sa1": "https://www.transfermarkt.com.tr/saudi-professional-league/formtabelle/wettbewerb/SA1",
-        "it1": "https://www.transfermarkt.com.tr/serie-a/formtabelle/wettbewerb/IT1",
-        "hl1": "https://www.transfermarkt.com.tr/eredivisie/formtabelle/wettbewerb/NL1",
-        "pt1": "https://www.transfermarkt.com.tr/eredivisie/formtabelle/wettbewerb/PO1",
-    }
-    return url_map.get(league_key.lower())
+def summarize_change(previous, value) -> dict:
+    """
+    İnsan okunur fark özeti. Listelerde eklenen/çıkan/değişen oyuncu adları,
+    dict'lerde değişen alanlar [eski, yeni] olarak döner.
+    """
+    if isinstance(previous, list) and isinstance(value, list):
+        delta = diff_items(previous, value)
+        added = {_item_label(item) for item in delta["added"]}
+        removed = {_item_label(item) for item in delta["removed"]}
+        return {
+            "added": sorted(added - removed),
+            "removed": sorted(removed - added),
+            "changed": sorted(added & removed),
+        }
+    delta = make_delta(previous, value)
+    if delta is None:
+        return {"replaced": True}
+    return {"changed": {k: [previous.get(k), v] for k, v in delta["set"].items()},
+            "removed": delta["unset"]}
 
 
-def get_league_position(team_name: str, league_key: str):
-    try:
-        url = get_league_url(league_key)
-        if not url:
+class QueueSink:
+    """Olayları süreç içi bir kuyruğa koyar; tüketiciler get()/drain() ile okur. Kuyruk doluysa en eski olay düşer."""
+
+    name = "queue"
+
+    def __init__(self, maxsize: int = 0):
+        self.queue = queue.Queue(maxsize)
+
+    def emit(self, event: dict):
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float | None = None) -> dict | None:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self, limit: int = 100) -> List[dict]:
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def close(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"pending": self.queue.qsize()}
+
+
+class WebhookSink:
+    """
+    Olayları arka plan thread'inde toplayıp JSON dizisi olarak POST eder.
+    batch_size olaya ulaşınca ya da interval saniye geçince gönderir. Başarısız gönderimden sonra
+    interval'dan başlayıp max_backoff'a kadar katlanan süre beklenir (yeni olaylar beklemeyi
+    kısaltmaz); batch en fazla max_attempts kez denenir, sonra bırakılır (en fazla max_pending
+    olay tutulur). secret verilirse gövdenin HMAC-SHA256 imzası X-Signature başlığında gönderilir.
+    """
+
+    name = "webhook"
+
+    def __init__(self, url: str, batch_size: int = 50, interval: float = 5.0,
+                 secret: str = "", max_pending: int = 10_000, max_backoff: float = 300.0,
+                 max_attempts: int = 5):
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.secret = secret.encode("utf-8")
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.pending: List[dict] = []
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._failures = 0  # ardışık başarısız gönderim (geri çekilme süresi)
+        self._attempts = 0  # baştaki batch'in deneme sayısı
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="change-webhook", daemon=True)
+        self._thread.start()
+
+    def emit(self, event: dict):
+        with self._cond:
+            self.pending.append(event)
+            if len(self.pending) > self.max_pending:
+                del self.pending[:len(self.pending) - self.max_pending]
+            if len(self.pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _post(self, batch: List[dict]) -> bool:
+        body = json_bytes(batch)
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["X-Signature"] = "sha256=" + hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+        try:
+            res = requests.post(self.url, data=body, headers=headers, timeout=10)
+            res.raise_for_status()
+            return True
+        except Exception as e:
+            log.error("Webhook gönderilemedi (%s, %d olay): %s", redact_url(self.url), len(batch), e)
+            return False
+
+    def flush(self):
+        with self._cond:
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+        if not batch:
             return
-        # get_soup zaten proxy kullanıyor
-        soup = get_soup(url) 
-        table = soup.find("table", class_="items")
-        rows = table.find("tbody").find_all("tr", recursive=False)
-        for row in rows:
-            cells = row.find_all("td")
-            if len(cells) < 3:
-                continue
-            pos = cells[0].text.strip()
-            name = cells[2].text.strip()
-            if name.lower() == team_name.lower():
-                return int(pos) if pos.isdigit() else pos
-        return
-    except Exception as e:
-        print(f"Lig sıralaması alınamadı: {e}", file=sys.stderr)
-        return
+        if self._post(batch):
+            self.sent += len(batch)
+            self._failures = self._attempts = 0
+            return
+        self.failed += len(batch)
+        self._failures += 1
+        self._attempts += 1
+        if self._attempts >= self.max_attempts:
+            self._attempts = 0
+            self.dropped += len(batch)
+            log.error("Webhook batch'i %d denemeden sonra bırakıldı (%d olay)", self.max_attempts, len(batch))
+            return
+        with self._cond:
+            self.pending[:0] = batch
 
-def get_league_position_cached(team_name: str, league_key: str, cache_mgr: CacheManager) -> int | None:
-    """Cache-aware lig pozisyonu"""
-    url = get_league_url(league_key)
-    if not url:
-        return None
-    
-    content_hash = cache_mgr.get_content_hash(url, "table.items")
-    if not content_hash:
-        return get_league_position(team_name, league_key)
-    
-    if not cache_mgr.should_scrape(team_name.lower(), 'position', content_hash):
-        return None
-    
-    position = get_league_position(team_name, league_key)
-    
-    if position is not None:
-        cache_mgr.update_cache(team_name.lower(), 'position', content_hash)
-    
-    return position
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._failures:
+                    delay = min(self.interval * 2 ** (self._failures - 1), self.max_backoff)
+                    self._cond.wait_for(lambda: self._closed, timeout=delay)
+                elif not self._closed and len(self.pending) < self.batch_size:
+                    self._cond.wait(self.interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
 
-def get_recent_form(team_name: str, league_key: str) -> dict:
-    try:
-        url = get_form_url(league_key)
-        if not url:
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=self.interval + 10)
+
+    def snapshot(self) -> dict:
+        return {"pending": len(self.pending), "sent": self.sent, "failed": self.failed,
+                "dropped": self.dropped, "consecutive_failures": self._failures}
+
+
+class FirestoreSink:
+    """Her olayı team_changes koleksiyonuna ayrı bir doküman olarak yazar (doküman id'si = olay id'si)."""
+
+    name = "firestore"
+
+    def __init__(self, collection: str = "team_changes"):
+        self.collection = collection
+        self.written = 0
+
+    def emit(self, event: dict):
+        if DB is None:
             return
-        # get_soup zaten proxy kullanıyor
-        soup = get_soup(url)
-        rows = soup.select("div.responsive-table table tbody tr")
-        for row in rows:
-            team_cell = row.select_one("td.no-border-links.hauptlink a")
-            if team_cell and team_name.lower() in team_cell.text.lower():
-                tds = row.find_all("td")
-                wins = int(tds[4].text.strip())
-                draws = int(tds[5].text.strip())
-                losses = int(tds[6].text.strip())
-                form_spans = tds[10].find_all("span")
-                recent_results = [s.text.strip() for s in form_spans if s.text.strip() in ["G", "B", "M"]]
-                return {"wins": wins, "draws": draws, "losses": losses, "last_matches": recent_results}
+        DB.collection(self.collection).document(event["id"]).set(event)
+        self.written += 1
+
+    def close(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"written": self.written}
+
+
+class ChangeFeed:
+    """Değişiklik olaylarını kayıtlı sink'lere dağıtır; bir sink'in hatası diğerlerini etkilemez."""
+
+    def __init__(self, sinks: list | None = None):
+        self.sinks = list(sinks or [])
+        self.published = 0
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def publish(self, team_doc: str, data_type: str, previous, value, scraped_at: str) -> dict | None:
+        if not self.sinks:
+            return None
+        event = {
+            "id": hashlib.sha1(f"{team_doc}|{data_type}|{scraped_at}".encode("utf-8")).hexdigest(),
+            "team": team_doc,
+            "data_type": data_type,
+            "scraped_at": scraped_at,
+            "summary": summarize_change(previous, value),
+        }
+        self.published += 1
+        for sink in self.sinks:
+            try:
+                sink.emit(event)
+            except Exception as e:
+                log.error("Değişiklik olayı iletilemedi (%s, %s/%s): %s", sink.name, team_doc, data_type, e)
+        return event
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def snapshot(self) -> dict:
+        return {"published": self.published, "sinks": {sink.name: sink.snapshot() for sink in self.sinks}}
+
+
+def build_change_feed() -> ChangeFeed:
+    """Env ayarlarına göre sink'leri kurar (CHANGE_WEBHOOK_URL, CHANGE_FIRESTORE, CHANGE_QUEUE_SIZE)."""
+    feed = ChangeFeed()
+    if CHANGE_WEBHOOK_URL:
+        feed.add_sink(WebhookSink(CHANGE_WEBHOOK_URL, CHANGE_WEBHOOK_BATCH, CHANGE_WEBHOOK_INTERVAL, CHANGE_WEBHOOK_SECRET,
+                                  max_backoff=CHANGE_WEBHOOK_MAX_BACKOFF, max_attempts=CHANGE_WEBHOOK_ATTEMPTS))
+    if CHANGE_FIRESTORE:
+        feed.add_sink(FirestoreSink())
+    if CHANGE_QUEUE_SIZE:
+        feed.add_sink(QueueSink(CHANGE_QUEUE_SIZE))
+    atexit.register(feed.close)
+    return feed
+
+
+CHANGE_FEED = ChangeFeed() if IN_PARSE_WORKER else build_change_feed()
+
+
+# --- İstek profilleme (opt-in) ---
+# PROFILE_TOKEN tanımlıysa X-Profile: cprofile|sample başlığı (X-Admin-Token ile) ya da
+# POST /admin/profile ile tek istek profillenir. PROFILE_SAMPLE_RATE > 0 ise isteklerin bu
+# oranı kendiliğinden örnekleme profiline alınır; en yavaş PROFILE_KEEP profil saklanır.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_WINDOW = float(os.getenv("PROFILE_WINDOW", "3600"))  # saniye; daha eski profiller düşer
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))  # örnekleme aralığı (saniye)
+
+PROFILE_MODES = ("cprofile", "sample")
+
+# Profillenen isteğin (takım, veri tipi, ms) span listesi; profil yoksa None
+_profile_spans = contextvars.ContextVar("profile_spans", default=None)
+# Profillenen isteğin RequestProfiler'ı; run_concurrently worker'ları buradan profile katılır
+_profiler = contextvars.ContextVar("profiler", default=None)
+
+
+@contextmanager
+def profile_span(team: str, data_type: str):
+    """Profillenen istekte bloğun süresini takım/veri tipi etiketiyle kaydeder; aksi halde maliyetsizdir."""
+    spans = _profile_spans.get()
+    if spans is None:
+        yield
         return
-    except Exception as e:
-        print(f"Form verisi alınamadı: {e}", file=sys.stderr)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((team, data_type, (time.perf_counter() - started) * 1000))
+
+
+@contextmanager
+def profiled_thread():
+    """Profillenen isteğin işini yapan thread'i (batch/stream worker) o isteğin profiline katar."""
+    profiler = _profiler.get()
+    if profiler is None:
+        yield
         return
+    with profiler.thread():
+        yield
 
-def get_recent_form_cached(team_name: str, league_key: str, cache_mgr: CacheManager) -> dict | None:
-    """Cache-aware form tablosu"""
-    url = get_form_url(league_key)
-    if not url:
-        return None
-    
-    content_hash = cache_mgr.get_content_hash(url, "div.responsive-table")
-    if not content_hash:
-        return get_recent_form(team_name, league_key)
-    
-    if not cache_mgr.should_scrape(team_name.lower(), 'form', content_hash):
-        return None
-    
-    form = get_recent_form(team_name, league_key)
-    
-    if form is not None:
-        cache_mgr.update_cache(team_name.lower(), 'form', content_hash)
-    
-    return form
 
-def scrape_suspensions_kader(team_slug: str, team_id: str, season_id: int = 2025) -> list | None:
+class StackSampler:
+    """
+    Ayrı bir thread'de verilen thread'lerin (`threads` None ise tüm thread'lerin) yığınlarını
+    `interval` aralıkla örnekler ve collapsed stack (flamegraph) sayımları üretir. Bu modülden frame
+    içermeyen yığınlar (boşta bekleyen altyapı thread'leri) sayılmaz.
+    """
 
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/kader/verein/{team_id}/saison_id/{season_id}"
+    def __init__(self, interval: float = 0.005, threads: set | None = None):
+        self.interval = interval
+        self.threads = threads
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
 
-    try:
-        soup = get_soup(url)
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
 
-        cezali_oyuncular = []
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        self._thread.join()
+        return dict(self.counts)
 
-        for row in soup.find_all("tr", class_=["odd", "even"]):
-            ausfall_span = row.find("span", class_="ausfall-table")
-            if not ausfall_span:
-                continue
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                stack, ours = [], False
+                while frame is not None:
+                    code = frame.f_code
+                    ours = ours or code.co_filename == __file__
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if ours:
+                    stack.append(names.get(ident, str(ident)))
+                    self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
 
-            name_td = row.find("td", class_="hauptlink")
-            player_name = (
-                " ".join(name_td.get_text(strip=True).split())
-                if name_td else "İsim bulunamadı"
-            )
 
-            ceza_title = ausfall_span.get("title", "Ceza bilgisi yok")
+class RequestProfiler:
+    """
+    Tek isteği cProfile (deterministik) veya StackSampler (örnekleme) ile profiller.
+
+    Profil istek thread'ini ve thread() ile katılan thread'leri (run_concurrently worker'ları,
+    stream üreticisi) kapsar; eşzamanlı başka isteklerin thread'leri örneklenmez. cProfile yalnızca
+    istek thread'inde çalışır (Python 3.12+ aynı anda tek cProfile'a izin verir); worker'lar her iki
+    modda da örneklenir. Başka bir cProfile zaten etkinse profil örnekleme moduna düşer. Parse havuzu
+    ayrı süreçlerde çalıştığından parse süresi yalnızca sonucu bekleyen thread'de görünür.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.fallback = None
+        self.spans: list = []
+        self.started = time.perf_counter()
+        self._request_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError as e:
+                # Python 3.12+: "Another profiling tool is already active" (ör. eşzamanlı cprofile isteği)
+                api_log.warning("cProfile başlatılamadı, örnekleme profiline geçiliyor: %s", e)
+                self.mode, self.fallback = "sample", str(e)
+        # Örneklenen thread'ler: cProfile modunda yalnızca worker'lar, örnekleme modunda istek thread'i de
+        self._threads = set() if self.mode == "cprofile" else {self._request_thread}
+        self._sampler = StackSampler(PROFILE_INTERVAL, threads=self._threads).start()
+
+    @contextmanager
+    def thread(self):
+        """Bloğu çalıştıran thread'i profile katar (istek thread'inin kendisiyse etkisizdir)."""
+        ident = threading.get_ident()
+        with self._lock:
+            joined = ident != self._request_thread and ident not in self._threads
+            if joined:
+                self._threads.add(ident)
+        try:
+            yield
+        finally:
+            if joined:
+                with self._lock:
+                    self._threads.discard(ident)
+
+    def stop(self) -> dict:
+        """
+        Profili durdurur; süre, span'lar ve çıktı döner. pstats yalnızca cprofile modunda (istek
+        thread'i) dolar; collapsed stack worker'ları (örnekleme modunda istek thread'ini de) kapsar.
+        """
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        result = {"mode": self.mode, "duration_ms": round(duration_ms, 1)}
+        if self.fallback:
+            result["fallback"] = self.fallback
+        result["pstats"] = None
+        if self.mode == "cprofile":
+            self._profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(60)
+            result["pstats"] = out.getvalue()
+        counts = self._sampler.stop()
+        result["collapsed"] = "\n".join(f"{stack} {n}" for stack, n in sorted(counts.items())) or None
+        result["samples"] = self._sampler.samples
+
+        by_type: Dict[tuple, float] = defaultdict(float)
+        for team, data_type, ms in self.spans:
+            by_type[(team, data_type)] += ms
+        result["spans"] = [{"team": t, "data_type": d, "ms": round(ms, 1)} for (t, d), ms in by_type.items()]
+        result["teams"] = sorted({t for t, _, _ in self.spans})
+        return result
+
+
+class ProfileStore:
+    """Son PROFILE_WINDOW saniyedeki en yavaş `keep` profil (süreye göre min-heap)."""
+
+    def __init__(self, keep: int = 20, window: float = 3600.0):
+        self.keep = keep
+        self.window = window
+        self._heap: list = []  # (duration_ms, id, kayıt)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._armed: list = []  # POST /admin/profile ile bekleyen profil istekleri
+
+    def arm(self, count: int, mode: str, path: str | None = None):
+        """Sonraki `count` isteği (path verilirse sadece o path'i) profillemek üzere işaretler."""
+        with self._lock:
+            self._armed.extend([(mode, path)] * count)
+
+    def take_armed(self, path: str) -> str | None:
+        with self._lock:
+            for i, (mode, armed_path) in enumerate(self._armed):
+                if armed_path is None or armed_path == path:
+                    del self._armed[i]
+                    return mode
+        return None
+
+    def add(self, record: dict) -> str:
+        now = time.time()
+        with self._lock:
+            record_id = f"p{next(self._ids)}"
+            record = dict(record, id=record_id, at=now)
+            self._heap = [item for item in self._heap if item[2]["at"] > now - self.window]
+            heapq.heapify(self._heap)
+            item = (record["duration_ms"], record_id, record)
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heappushpop(self._heap, item)
+        return record_id
 
-            numara_div = row.find("div", class_="rn_nummer")
-            numara = numara_div.get_text(strip=True) if numara_div else "-"
+    def list(self) -> List[dict]:
+        with self._lock:
+            records = [item[2] for item in self._heap]
+        return sorted(({k: v for k, v in r.items() if k not in ("pstats", "collapsed")} for r in records),
+                      key=lambda r: r["duration_ms"], reverse=True)
 
-            pos_td = row.find("td", class_="posrela")
-            pozisyon = "-"
-            if pos_td:
-                tds = pos_td.find_all("td")
-                if len(tds) > 1:
-                    pozisyon = tds[-1].get_text(strip=True)
+    def get(self, record_id: str) -> dict | None:
+        with self._lock:
+            return next((item[2] for item in self._heap if item[1] == record_id), None)
 
-            cezali_oyuncular.append({
-                "name": player_name,
-                "number": numara,
-                "position": pozisyon,
-                "details": ceza_title,
-                "source": "kader"
-            })
 
-        time.sleep(random.uniform(1.5, 3.0))
-        return cezali_oyuncular
+PROFILES = ProfileStore(PROFILE_KEEP, PROFILE_WINDOW)
 
-    except Exception as e:
-        print(f"[UYARI] Kader cezalı scrape başarısız ({team_slug}): {e}", file=sys.stderr)
-        return None
 
-def scrape_suspensions_kader_cached(team_slug: str, team_id: str, team_name: str, 
-                                     cache_mgr: CacheManager, season_id: int = 2025) -> list | None:
-    """Cache-aware kader cezalı scraping"""
-    url = f"https://www.transfermarkt.com.tr/{team_slug}/kader/verein/{team_id}/saison_id/{season_id}"
-    
-    # ← DEĞİŞTİ: Özel suspension hash kullan
-    content_hash = cache_mgr.get_suspension_hash(url)
-    if not content_hash:
-        return scrape_suspensions_kader(team_slug, team_id, season_id)
-    
-    if not cache_mgr.should_scrape(team_name, 'suspensions_kader', content_hash):
-        print(f"[CACHE HIT] {team_name}/suspensions_kader")
+def requested_profile_mode() -> str | None:
+    """Bu istek profillenecek mi? (başlık + token, /admin/profile ile işaretlenmiş istek veya örnekleme)"""
+    if request.path.startswith("/admin/"):
         return None
-    
-    print(f"[SCRAPING] {team_name}/suspensions_kader")
-    suspensions = scrape_suspensions_kader(team_slug, team_id, season_id)
-    
-    print(f"[SONUÇ] {team_name}/suspensions_kader = {len(suspensions) if suspensions else 0} oyuncu")
-    
-    if suspensions is not None:
-        cache_mgr.update_cache(team_name, 'suspensions_kader', content_hash)
-    
-    return suspensions
+    if PROFILE_TOKEN:
+        header = request.headers.get("X-Profile", "").lower()
+        if header in PROFILE_MODES and request.headers.get("X-Admin-Token") == PROFILE_TOKEN:
+            return header
+        armed = PROFILES.take_armed(request.path)
+        if armed:
+            return armed
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+# Stream edilen veri tipi -> team_data dokümanındaki alan
+STREAM_FIELDS = {
+    "squad": "squad",
+    "injuries": "injuries",
+    "suspensions": "suspensions",
+    "position": "position_in_league",
+    "form": "recent_form",
+    "stats": "stats",
+}
 
 
-def generate_team_data(team_info: dict, league_key: str, cache_mgr: CacheManager) -> tuple[dict, List[dict], str]:
+def generate_team_data(team_info: dict, league_key: str, cache_mgr: CacheManager,
+                       emit: Callable[[str, object, str], None] | None = None) -> tuple[dict, List[dict], str]:
     """
     Cache-aware veri çekme. 
     None dönen değerler = eski veri kullanılacak (Firestore'da merge=True ile)
+
+    emit verilirse her veri tipi hazır olur olmaz emit(veri_tipi, değer, kaynak) çağrılır;
+    kaynak "scrape" (yeni çekildi) veya "cache" (Firestore'daki kayıtlı veri) olur.
     """
     name = team_info["name"]
     slug = team_info["slug"]
     team_id = team_info["id"]
     team_doc = name.lower()
+    stored = None
+
+    def publish(data_type: str, value):
+        nonlocal stored
+        if emit is None:
+            return
+        if value is not None:
+            emit(data_type, value, "scrape")
+            return
+        if stored is None:
+            try:
+                snapshot = SNAPSHOTS.get(team_doc)
+                stored = snapshot.to_dict() if snapshot else {}
+            except Exception as e:
+                store_log.error("Stream için kayıtlı veri alınamadı (%s): %s", team_doc, e)
+                stored = {}
+        if STREAM_FIELDS[data_type] in stored:
+            emit(data_type, stored[STREAM_FIELDS[data_type]], "cache")
     
-    print(f"🔄 {name} için cache-aware veri çekme başlıyor...", file=sys.stderr)
+    cache_mgr.bind_team(team_doc, league_key)
+    scrape_log.info("🔄 %s için cache-aware veri çekme başlıyor...", name)
     
     # 1. Kadro (Cache-aware)
-    squad = scrape_squad_cached(slug, team_id, team_doc, cache_mgr)
+    with profile_span(team_doc, "squad"):
+        squad = scrape_squad_cached(slug, team_id, team_doc, cache_mgr)
+    publish("squad", squad)
     
     # 2. Sakatlıklar ve Cezalılar (Kadro gerekli, ama cache'den gelebilir)
     injuries = None
     suspensions = None
     suspensions_kader = None
     
-    # Eğer squad None ise (cache hit), mevcut squad'ı Firestore'dan çek
+    # Eğer squad None ise (cache hit), mevcut squad'ı snapshot'tan (yoksa Firestore'dan) al
     if squad is None:
         try:
-            doc = DB.collection("team_data").document(team_doc).get()
-            if doc.exists:
-                existing_squad = doc.to_dict().get('squad', [])
+            snapshot = SNAPSHOTS.get(team_doc)
+            if snapshot is not None:
+                existing_squad = snapshot.to_dict().get('squad', [])
                 # Sakatlık/ceza scrape için mevcut squad'ı kullan
-                injuries = scrape_injuries_cached(slug, team_id, existing_squad, team_doc, cache_mgr)
-                suspensions = scrape_suspensions_cached(slug, team_id, existing_squad, team_doc, cache_mgr)
-                suspensions_kader = scrape_suspensions_kader_cached(slug, team_id, team_doc, cache_mgr)
+                with profile_span(team_doc, "injuries"):
+                    injuries = scrape_injuries_cached(slug, team_id, existing_squad, team_doc, cache_mgr)
+                with profile_span(team_doc, "suspensions"):
+                    suspensions = scrape_suspensions_cached(slug, team_id, existing_squad, team_doc, cache_mgr)
+                with profile_span(team_doc, "suspensions_kader"):
+                    suspensions_kader = scrape_suspensions_kader_cached(slug, team_id, team_doc, cache_mgr)
         except Exception as e:
-            print(f"[HATA] Firestore'dan squad alınamadı: {e}", file=sys.stderr)
+            store_log.error("Firestore'dan squad alınamadı: %s", e)
     else:
         # Yeni squad scrape edildi, onunla devam et
-        injuries = scrape_injuries_cached(slug, team_id, squad, team_doc, cache_mgr)
-        suspensions = scrape_suspensions_cached(slug, team_id, squad, team_doc, cache_mgr)
-        suspensions_kader = scrape_suspensions_kader_cached(slug, team_id, team_doc, cache_mgr)
+        with profile_span(team_doc, "injuries"):
+            injuries = scrape_injuries_cached(slug, team_id, squad, team_doc, cache_mgr)
+        with profile_span(team_doc, "suspensions"):
+            suspensions = scrape_suspensions_cached(slug, team_id, squad, team_doc, cache_mgr)
+        with profile_span(team_doc, "suspensions_kader"):
+            suspensions_kader = scrape_suspensions_kader_cached(slug, team_id, team_doc, cache_mgr)
+    
+    combined_suspensions = None
+    if suspensions is not None or suspensions_kader is not None:
+        combined_suspensions = []
+        
+        # suspensions varsa ekle
+        if suspensions is not None:
+            combined_suspensions.extend(suspensions)
+        
+        # suspensions_kader varsa ekle
+        if suspensions_kader is not None:
+            combined_suspensions.extend(suspensions_kader)
+    
+    publish("injuries", injuries)
+    publish("suspensions", combined_suspensions)
     
     # 3. Bağımsız veriler (Cache-aware)
-    position = get_league_position_cached(name, league_key, cache_mgr)
-    form = get_recent_form_cached(name, league_key, cache_mgr)
-    stats = scrape_stats_cached(slug, team_id, team_doc, cache_mgr)
+    with profile_span(team_doc, "position"):
+        position = get_league_position_cached(name, league_key, cache_mgr, team_id)
+    publish("position", position)
+    with profile_span(team_doc, "form"):
+        form = get_recent_form_cached(name, league_key, cache_mgr, team_id)
+    publish("form", form)
+    with profile_span(team_doc, "stats"):
+        stats = scrape_stats_cached(slug, team_id, team_doc, cache_mgr)
+    publish("stats", stats)
     
     # 4. Veriyi birleştir (None olanlar eklenmez = eski veri korunur)
     data = {
@@ -999,53 +3651,812 @@ def generate_team_data(team_info: dict, league_key: str, cache_mgr: CacheManager
     if injuries is not None:
         data["injuries"] = injuries
     
-    if suspensions is not None or suspensions_kader is not None:
-        combined_suspensions = []
-        
-        # suspensions varsa ekle
-        if suspensions is not None:
-            combined_suspensions.extend(suspensions)
-        
-        # suspensions_kader varsa ekle
-        if suspensions_kader is not None:
-            combined_suspensions.extend(suspensions_kader)
-        
+    if combined_suspensions is not None:
         data["suspensions"] = combined_suspensions
     
     if form is not None:
         data["recent_form"] = form
     
-    print(f"✅ {name} için cache-aware veri çekme tamamlandı.", file=sys.stderr)
-    print(f"   → Güncellenecek alanlar: {list(data.keys())}", file=sys.stderr)
+    scrape_log.info("✅ %s için cache-aware veri çekme tamamlandı. Güncellenecek alanlar: %s", name, list(data.keys()))
     
     return data, stats, team_doc
 
 
 def save_team_data(team_name: str, team_data: dict, player_stats: List[dict]) -> None:
-    try:
-        # Player stats'ı team_data'ya ekle
-        if player_stats is not None:
-            team_data["stats"] = player_stats
+    with profile_span(team_name.lower(), "save"):
+        try:
+            # Player stats'ı team_data'ya ekle
+            if player_stats is not None:
+                team_data["stats"] = player_stats
         
-        # Save team data to team_data collection
-        DB.collection("team_data").document(team_name.lower()).set(team_data, merge=True)
-        print(f"✅ Firestore team_data'ya kaydedildi: {team_name}")
+            # STORAGE_LAYOUT'a göre team_data (+ new_data) ve/veya team_summary + team_parts'a yaz
+            TEAM_STORE.save(team_name.lower(), team_data)
+            SNAPSHOTS.update(team_name.lower(), team_data)
+            store_log.info("✅ Kaydedildi (%s): %s", TEAM_STORE.layout, team_name)
+
+            try:
+                HISTORY.record_team(team_name.lower(), team_data)
+            except Exception as e:
+                store_log.error("Geçmiş kaydedilemedi (%s): %s", team_name, e)
         
-        # Save player stats to new_data collection
-        if player_stats is not None:
-            DB.collection("new_data").document(team_name.lower()).set({"player_stats": player_stats}, merge=True)
-            print(f"✅ Firestore new_data'ya kaydedildi: {team_name}")
-        else:
-            print(f"[UYARI] {team_name} için player_stats kaydedilmedi (istatistik alınamadı)", file=sys.stderr)
+            if player_stats is None:
+                store_log.warning("%s için player_stats kaydedilmedi (istatistik alınamadı)", team_name)
+        except Exception as e:
+            store_log.error("❌ Kaydetme hatası (%s): %s", team_name, e)
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+BATCH_BUDGET = float(os.getenv("BATCH_BUDGET", "600"))
+
+
+def run_concurrently(fn: Callable, items: list, workers: int = BATCH_WORKERS) -> list:
+    """
+    fn'i her öğe için thread havuzunda çalıştırır ve sonuçları sırayla döner.
+    Her görev çağıranın context'ini (öncelik, süre bütçesi, PageMemo) kopyalayarak çalışır;
+    istek profilleniyorsa worker thread'leri de profile katılır.
+    """
+    if not items:
+        return []
+    def task(item):
+        with profiled_thread():
+            return fn(item)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, task, item) for item in items]
+        return [f.result() for f in futures]
+
+
+def process_team(team_info: dict, league_key: str, cache_mgr: CacheManager,
+                 emit: Callable[[str, object, str], None] | None = None) -> str | None:
+    """Tek takım için cache-aware veri çekip Firestore'a kaydeder. Hata varsa mesajını döner."""
+    try:
+        data, stats, doc = generate_team_data(team_info, league_key, cache_mgr, emit=emit)
+        if not data:
+            return f"{team_info['name']} için ana veri çekilemedi ve Firestore'a kaydedilemedi."
+        save_team_data(doc, data, stats)
+        return None
     except Exception as e:
-        print(f"❌ Firestore kaydetme hatası ({team_name}): {e}", file=sys.stderr)
+        error_msg = f"{team_info['name']} işlenirken kritik hata oluştu: {str(e)}"
+        api_log.error("Hata izolasyonu: %s", error_msg)
+        return error_msg
+
+
+def plan_batch(fixtures: List[dict]) -> tuple[list, dict]:
+    """
+    Maç listesini çözümler ve tekrarsız iş planı çıkarır.
+
+    Returns:
+        (fixture sonuç iskeletleri, {(takım doc, lig): takım bilgisi})
+    """
+    results = []
+    teams: Dict[tuple, dict] = {}
+    for fixture in fixtures:
+        fixture = fixture if isinstance(fixture, dict) else {}
+        home_key = fixture.get("home_team")
+        away_key = fixture.get("away_team")
+        league_key = fixture.get("league_key") or (infer_league(home_key, away_key) if home_key and away_key else None)
+        result = {"home_team": home_key, "away_team": away_key, "league_key": league_key, "errors": []}
+        results.append(result)
+
+        if not home_key or not away_key or not league_key:
+            result["errors"].append("Eksik parametreler")
+            continue
+        try:
+            infos = [get_team_info(home_key), get_team_info(away_key)]
+        except ValueError as e:
+            result["errors"].append(str(e))
+            continue
+
+        league_key = league_key.lower()
+        note_fixture(infos, fixture.get("kickoff"))
+        result["teams"] = [(info["name"].lower(), league_key) for info in infos]
+        for info in infos:
+            teams[(info["name"].lower(), league_key)] = info
+    return results, teams
+
+
+def stale_page_urls(items: List[tuple], cache_mgr: CacheManager) -> List[str]:
+    """
+    (takım bilgisi, lig) çiftleri için TTL'i dolmuş veri tiplerinin okuduğu tekil sayfalar.
+    Cached wrapper'larla aynı is_fresh kontrolü kullanılır; tamamen taze takım için sayfa çekilmez.
+    """
+    cache_mgr.load_metadata([info["name"].lower() for info, _ in items])
+    urls = []
+    for info, league_key in items:
+        team_doc, slug, team_id = info["name"].lower(), info["slug"], info["id"]
+        cache_mgr.bind_team(team_doc, league_key)
+        pages = [
+            (team_page_url("startseite", slug, team_id), ("squad", "suspensions")),
+            (team_page_url("leistungsdaten", slug, team_id), ("stats",)),
+            (team_page_url("sperrenundverletzungen", slug, team_id), ("injuries",)),
+            (team_page_url("kader", slug, team_id, current_season_id()), ("suspensions_kader",)),
+            (get_league_url(league_key), ("position",)),
+            (get_form_url(league_key), ("form",)),
+        ]
+        urls.extend(url for url, data_types in pages
+                    if url and not all(cache_mgr.is_fresh(team_doc, t) for t in data_types))
+    return list(dict.fromkeys(urls))
+
+
+# --- Çok düğümlü mod (consistent hashing ile takım sahipliği) ---
+# CLUSTER_MODE açıkken her düğüm cluster_nodes koleksiyonuna heartbeat yazar; canlı düğümlerden
+# kurulan hash ring'i her takımın (veya CLUSTER_SHARD_BY=league ise her ligin) tek sahibini belirler.
+# Sahibi olunmayan takımlar sahibine HTTP ile iletilir (CLUSTER_DISPATCH=forward) ya da
+# cluster_queue'ya iş olarak yazılır (enqueue). Böylece upstream trafiği düğüm sayısıyla artmaz.
+CLUSTER_MODE = os.getenv("CLUSTER_MODE", "0").lower() in ("1", "true", "yes")
+NODE_ID = os.getenv("NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+NODE_URL = os.getenv("NODE_URL", "").rstrip("/")  # diğer düğümlerin bu düğüme ulaşacağı adres
+CLUSTER_TOKEN = os.getenv("CLUSTER_TOKEN", "")
+CLUSTER_SHARD_BY = os.getenv("CLUSTER_SHARD_BY", "team").lower()  # team | league
+CLUSTER_DISPATCH = os.getenv("CLUSTER_DISPATCH", "forward").lower()  # forward | enqueue
+CLUSTER_HEARTBEAT = float(os.getenv("CLUSTER_HEARTBEAT", "10"))
+CLUSTER_NODE_TTL = float(os.getenv("CLUSTER_NODE_TTL", "30"))  # bu süre heartbeat yoksa düğüm düşmüş sayılır
+CLUSTER_VNODES = int(os.getenv("CLUSTER_VNODES", "64"))
+# Takımı başka düğüm yazabildiği için bellekteki snapshot'lar bu süreden sonra Firestore'dan yeniden yüklenir
+CLUSTER_SNAPSHOT_TTL = float(os.getenv("CLUSTER_SNAPSHOT_TTL", "60"))
+# Sahibi iletilen işleri BATCH_BUDGET içinde bitirir; istemci ondan biraz daha uzun bekler
+CLUSTER_FORWARD_TIMEOUT = float(os.getenv("CLUSTER_FORWARD_TIMEOUT", str(BATCH_BUDGET + 30)))
+
+
+class HashRing:
+    """Sanal düğümlü consistent hash ring; düğüm eklenip çıkınca anahtarların sadece ~1/N'i yer değiştirir."""
+
+    def __init__(self, nodes: List[str], vnodes: int = 64):
+        self.nodes = sorted(nodes)
+        points = sorted((self._hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def owner(self, key: str) -> str | None:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+class ClusterNode:
+    """
+    Bu sürecin kümedeki kaydı, hash ring'i ve sahibi olmadığı takımların yönlendirilmesi.
+
+    Heartbeat thread'i düğüm kaydını yeniler, üyelik değiştiyse ring'i yeniden kurar (yeni sahibi
+    olunan takımların snapshot'ları Firestore'dan yeniden yüklenir) ve bu düğüme ait kuyruk işlerini
+    işler. Düğüm kapanırken kaydını siler; düşen düğümün kuyruktaki işlerini yeni sahipleri alır.
+    """
+
+    def __init__(self, db, node_id: str = NODE_ID, url: str = NODE_URL, shard_by: str = CLUSTER_SHARD_BY,
+                 dispatch: str = CLUSTER_DISPATCH):
+        self.db = db
+        self.node_id = node_id
+        self.url = url
+        self.shard_by = shard_by
+        self.dispatch_mode = dispatch
+        self.members: Dict[str, dict] = {node_id: {"node_id": node_id, "url": url}}
+        self.ring = HashRing([node_id], CLUSTER_VNODES)
+        self.enabled = False
+        self.rebalances = 0
+        self.forwarded = 0
+        self.enqueued = 0
+        self.fallbacks = 0
+        self.processed_jobs = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    # --- Üyelik ---
+
+    def start(self):
+        self.enabled = True
+        SNAPSHOTS.max_age = CLUSTER_SNAPSHOT_TTL
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name="cluster-heartbeat", daemon=True)
+        self._thread.start()
+        log.info("Küme düğümü başladı: %s (%s), %d düğüm", self.node_id, self.url or "adres yok",
+                 len(self.members))
+
+    def leave(self):
+        """Kaydı siler; diğer düğümler bir sonraki heartbeat'te takımları devralır."""
+        self._stop.set()
+        if self.enabled:
+            self.enabled = False
+            try:
+                self.db.collection("cluster_nodes").document(self.node_id).delete()
+            except Exception as e:
+                log.error("Küme kaydı silinemedi (%s): %s", self.node_id, e)
+
+    def _run(self):
+        while not self._stop.wait(CLUSTER_HEARTBEAT):
+            try:
+                self.heartbeat()
+                self.drain_queue()
+            except Exception as e:
+                log.error("Küme heartbeat hatası: %s", e)
+
+    def heartbeat(self):
+        """Kaydı yeniler ve canlı düğümlere göre ring'i günceller."""
+        now = time.time()
+        self.db.collection("cluster_nodes").document(self.node_id).set(
+            {"node_id": self.node_id, "url": self.url, "heartbeat_at": now})
+        alive = {doc.id: doc.to_dict() for doc in self.db.collection("cluster_nodes").stream()}
+        alive = {node_id: m for node_id, m in alive.items()
+                 if m and now - m.get("heartbeat_at", 0) <= CLUSTER_NODE_TTL or node_id == self.node_id}
+        self._set_members(alive)
+
+    def _set_members(self, members: Dict[str, dict]):
+        with self._lock:
+            if set(members) == set(self.members):
+                self.members = members
+                return
+            old_ring, self.members = self.ring, members
+            self.ring = HashRing(list(members), CLUSTER_VNODES)
+            self.rebalances += 1
+
+        moved, gained = 0, 0
+        for key, info in TEAMS.items():
+            ring_key = self._ring_key(info, info.get("league", ""))
+            before, after = old_ring.owner(ring_key), self.ring.owner(ring_key)
+            if before != after:
+                # Sahibi değişen takımın bellekteki verisi ve geçmiş durumu bırakılır; takımı geri
+                # alan düğüm diğer sahibin yazdığı sürümlerin üzerine yazmasın
+                team_doc = info["name"].lower()
+                SNAPSHOTS.invalidate(team_doc)
+                HISTORY.invalidate(team_doc)
+                moved += 1
+                gained += after == self.node_id
+        log.info("Küme üyeliği değişti (%d düğüm: %s); %d/%d takımın sahibi değişti, bu düğüm %d devraldı",
+                 len(members), ", ".join(sorted(members)), moved, len(TEAMS), gained)
+
+    def _drop(self, node_id: str):
+        """İletilemeyen düğümü bir sonraki heartbeat'e kadar ring'den çıkarır."""
+        with self._lock:
+            members = {k: v for k, v in self.members.items() if k != node_id}
+        if len(members) < len(self.members):
+            self._set_members(members)
+
+    # --- Sahiplik ---
+
+    def _ring_key(self, team_info: dict, league_key: str) -> str:
+        if self.shard_by == "league":
+            return f"league:{league_key.lower()}"
+        return f"team:{team_info['name'].lower()}"
+
+    def owner(self, team_info: dict, league_key: str) -> str:
+        if not self.enabled:
+            return self.node_id
+        return self.ring.owner(self._ring_key(team_info, league_key)) or self.node_id
+
+    def owned_teams(self) -> Dict[str, int]:
+        """Düğüm -> sahibi olduğu katalog takımı sayısı."""
+        counts: Dict[str, int] = defaultdict(int)
+        for info in TEAMS.values():
+            counts[self.owner(info, info.get("league", ""))] += 1
+        return dict(counts)
+
+    def route(self, items: List[tuple]) -> tuple[list, Dict[str, list]]:
+        """
+        (takım bilgisi, lig) çiftlerini bu düğümde işlenecekler ve düğüm -> iletilecekler olarak ayırır.
+        İletilen işler /cluster/refresh'te route'tan geçmeden işlenir, böylece döngü oluşmaz.
+        """
+        if not self.enabled:
+            return list(items), {}
+        local, remote = [], defaultdict(list)
+        for info, league_key in items:
+            owner = self.owner(info, league_key)
+            if owner == self.node_id:
+                local.append((info, league_key))
+            else:
+                remote[owner].append((info, league_key))
+        return local, dict(remote)
+
+    # --- Yönlendirme ---
+
+    def dispatch(self, remote: Dict[str, list]) -> tuple[Dict[str, str | None], list, List[str]]:
+        """
+        Takımları sahiplerine iletir (veya kuyruğa yazar). Bilinen maç saati ve istekteki TTL
+        override'ı işle birlikte gider, böylece sahibi aynı cache politikasını uygular.
+        Returns: (takım doc -> hata mesajı/None, sahibine ulaşılamadığı için yerelde işlenecek çiftler,
+                  yalnızca kuyruğa yazılan (henüz işlenmemiş) takım doc'ları)
+        """
+        results: Dict[str, str | None] = {}
+        fallback, queued = [], []
+        ttl_override = _ttl_override.get()
+
+        def payload(items):
+            jobs = []
+            for info, league_key in items:
+                kickoff = FIXTURES.next_kickoff(info["name"].lower())
+                jobs.append({"team": info["id"], "league_key": league_key, "ttl_override": ttl_override,
+                             "kickoff": kickoff.isoformat() if kickoff else None})
+            return jobs
+
+        def send(node_id):
+            items = remote[node_id]
+            if self.dispatch_mode == "enqueue":
+                return node_id, self._enqueue(node_id, payload(items))
+            try:
+                return node_id, self._forward(node_id, payload(items))
+            except BudgetExceededError as e:
+                return node_id, {info["name"].lower(): str(e) for info, _ in items}
+
+        for node_id, outcome in run_concurrently(send, list(remote)):
+            items = remote[node_id]
+            if outcome is None:
+                fallback.extend(items)
+                continue
+            for info, _ in items:
+                team_doc = info["name"].lower()
+                results[team_doc] = outcome.get(team_doc)
+                if self.dispatch_mode == "forward":
+                    # Sahibi işi bitirdi; kuyruktaki işler ise SNAPSHOTS.max_age ile tazelenir
+                    SNAPSHOTS.invalidate(team_doc)
+                else:
+                    queued.append(team_doc)
+        return results, fallback, queued
+
+    def dispatch_async(self, remote: Dict[str, list]) -> Future:
+        """dispatch'i arka planda başlatır; sahipler kendi takımlarını işlerken yerel takımlar işlenebilir."""
+        if not remote:
+            future = Future()
+            future.set_result(({}, [], []))
+            return future
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="cluster-dispatch")
+        return self._executor.submit(contextvars.copy_context().run, self.dispatch, remote)
+
+    def _forward(self, node_id: str, jobs: List[dict]) -> Dict[str, str | None] | None:
+        """
+        İşleri sahibinin /cluster/refresh endpoint'ine gönderir; ulaşılamazsa None. Bekleme çağıranın
+        kalan süre bütçesiyle sınırlıdır; bütçe biterse BudgetExceededError (düğüm düşürülmez, sahibi
+        işi hâlâ bitiriyor olabileceği için yerelde tekrar işlenmez).
+        """
+        url = self.members.get(node_id, {}).get("url")
+        if not url:
+            log.warning("Küme düğümünün adresi yok (%s), yerelde işlenecek", node_id)
+            with self._lock:
+                self.fallbacks += 1
+            return None
+        headers = {"Content-Type": "application/json", "X-Cluster-Forwarded": self.node_id,
+                   "X-Cluster-Token": CLUSTER_TOKEN,
+                   "X-Fetch-Priority": "background" if _fetch_priority.get() == BACKGROUND else "interactive"}
+        timeout = min(CLUSTER_FORWARD_TIMEOUT, remaining_budget())
+        if timeout <= 0:
+            raise BudgetExceededError(f"Süre bütçesi tükendi, {node_id} düğümüne iletilmedi")
+        try:
+            res = requests.post(f"{url}/cluster/refresh", data=json_bytes({"jobs": jobs}), headers=headers,
+                                timeout=timeout)
+            res.raise_for_status()
+            with self._lock:
+                self.forwarded += len(jobs)
+            return res.json().get("errors", {})
+        except Exception as e:
+            if isinstance(e, requests.exceptions.Timeout) and timeout < CLUSTER_FORWARD_TIMEOUT:
+                raise BudgetExceededError(
+                    f"{node_id} düğümü süre bütçesi içinde ({timeout:.0f} sn) yanıt vermedi") from e
+            log.error("Küme düğümüne iletilemedi (%s, %d takım), yerelde işlenecek: %s", node_id, len(jobs), e)
+            with self._lock:
+                self.fallbacks += 1
+            self._drop(node_id)
+            return None
+
+    def _enqueue(self, node_id: str, jobs: List[dict]) -> Dict[str, str | None]:
+        """İşleri cluster_queue'ya yazar; sahibi bir sonraki heartbeat'te işler."""
+        enqueued_at = time.time()
+        for job in jobs:
+            job_id = f"{node_id}__{job['team']}__{job['league_key']}"
+            self.db.collection("cluster_queue").document(job_id).set(
+                {**job, "node_id": node_id, "enqueued_at": enqueued_at})
+        with self._lock:
+            self.enqueued += len(jobs)
+        return {}
+
+    def drain_queue(self):
+        """Bu düğüme ait (veya sahibi düşmüş ve artık bu düğüme düşen) kuyruk işlerini işler."""
+        mine = []
+        for doc in self.db.collection("cluster_queue").stream():
+            job = doc.to_dict()
+            try:
+                info, league_key = resolve_job(job)
+            except ValueError as e:
+                log.error("Geçersiz kuyruk işi silindi (%s): %s", doc.id, e)
+                self.db.collection("cluster_queue").document(doc.id).delete()
+                continue
+            target = job.get("node_id")
+            if target == self.node_id or (target not in self.members
+                                         and self.owner(info, league_key) == self.node_id):
+                mine.append((doc.id, job))
+        if not mine:
+            return
+
+        _fetch_priority.set(BACKGROUND)
+        results = run_jobs([job for _, job in mine])
+        for (job_id, _), (_, error) in zip(mine, results):
+            if error:
+                log.error("Kuyruk işi başarısız (%s): %s", job_id, error)
+            self.db.collection("cluster_queue").document(job_id).delete()
+        with self._lock:
+            self.processed_jobs += len(mine)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "node_id": self.node_id,
+                "shard_by": self.shard_by,
+                "dispatch": self.dispatch_mode,
+                "members": sorted(self.members),
+                "rebalances": self.rebalances,
+                "forwarded": self.forwarded,
+                "enqueued": self.enqueued,
+                "fallbacks": self.fallbacks,
+                "processed_jobs": self.processed_jobs,
+            }
+
+
+def resolve_job(job: dict) -> tuple[dict, str]:
+    """İşteki takımı (transfermarkt id) ve ligi katalogdan çözer; gönderenin verdiği bilgiye güvenilmez."""
+    if not isinstance(job, dict):
+        raise ValueError("İş bir obje olmalı")
+    info = get_team_info(str(job.get("team", "")))
+    league_key = str(job.get("league_key", "")).lower()
+    if league_key not in LEAGUES:
+        raise ValueError(f"{league_key} ligi bulunamadı.")
+    return info, league_key
+
+
+def run_jobs(jobs: List[dict]) -> List[tuple[str, str | None]]:
+    """
+    İletilen/kuyruktaki işleri ({team, league_key, kickoff, ttl_override}) yerelde işler.
+    Returns: iş başına (takım doc, hata mesajı/None); çözülemeyen işler işlenmeden hata döner.
+    """
+    cache_mgr = CacheManager(DB)
+    resolved = []
+    for job in jobs:
+        try:
+            info, league_key = resolve_job(job)
+        except ValueError as e:
+            resolved.append((None, None, str(e)))
+            continue
+        note_fixture([info], job.get("kickoff"))
+        resolved.append((info, league_key, None))
+
+    def run(item):
+        job, (info, league_key, error) = item
+        if info is None:
+            return str(job.get("team") if isinstance(job, dict) else job), error
+        _ttl_override.set(job.get("ttl_override"))
+        return info["name"].lower(), process_team(info, league_key, cache_mgr)
+
+    # /generate-json-batch gibi: ortak lig/takım sayfaları bir kez çekilir, bütçe batch bütçesidir
+    with request_budget(BATCH_BUDGET), page_memo():
+        return run_concurrently(run, list(zip(jobs, resolved)))
+
+
+CLUSTER = ClusterNode(DB)
+
+
+def start_cluster():
+    """CLUSTER_MODE açıksa düğümü kümeye kaydeder (Firestore gerekir)."""
+    if DB is None:
+        log.error("CLUSTER_MODE açık ama Firestore yok; tek düğüm olarak çalışılıyor")
+        return
+    if not CLUSTER_TOKEN:
+        log.error("CLUSTER_MODE açık ama CLUSTER_TOKEN yok; tek düğüm olarak çalışılıyor")
+        return
+    if CLUSTER_DISPATCH == "forward" and not NODE_URL:
+        log.warning("NODE_URL tanımlı değil; diğer düğümler bu düğüme iş iletemez")
+    CLUSTER.start()
+    atexit.register(CLUSTER.leave)
+
+
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def requested_stream_mode() -> str | None:
+    """?stream=ndjson|sse veya Accept başlığından stream modunu belirler (yoksa None)."""
+    mode = request.args.get("stream", "").lower()
+    if mode in STREAM_MIMETYPES:
+        return mode
+    accept = request.headers.get("Accept", "")
+    for mode, mimetype in STREAM_MIMETYPES.items():
+        if mimetype in accept:
+            return mode
+    return None
+
+
+def format_event(event: dict, mode: str) -> bytes:
+    """Olayı NDJSON satırı veya SSE mesajı olarak biçimlendirir."""
+    payload = json_bytes(event)
+    if mode == "sse":
+        return b"event: " + event["event"].encode() + b"\ndata: " + payload + b"\n\n"
+    return payload + b"\n"
+
+
+def stream_team_data(local: List[tuple], remote: Dict[str, list], cache_mgr: CacheManager, mode: str) -> Response:
+    """
+    Bu düğümün sahibi olduğu (takım bilgisi, lig) çiftlerini arka planda işler ve her veri tipini
+    hazır olur olmaz stream eder. Sahibi başka düğüm olan takımlar ona iletilir; sahibi işi bitirince
+    kayıtlı verisi "remote" kaynağıyla gönderilir. Kuyruğa yazılan takımlar "queued" durumuyla biter,
+    sahibine ulaşılamayan takımlar burada işlenir.
+
+    Olaylar: item (takım, veri tipi, kaynak, veri), team_done (takım, varsa hata ya da durum), done (genel durum).
+    """
+    events = queue.SimpleQueue()
+    finished = object()
+
+    def run_team(item: tuple) -> str | None:
+        info, league_key = item
+        team_doc = info["name"].lower()
+
+        def emit(data_type, value, source):
+            events.put({"event": "item", "team": team_doc, "type": data_type, "source": source, "data": value})
+
+        error = process_team(info, league_key, cache_mgr, emit=emit)
+        events.put({"event": "team_done", "team": team_doc, **({"error": error} if error else {})})
+        return error
+
+    def publish_remote(team_doc: str, error: str | None, queued: bool):
+        if queued:
+            events.put({"event": "team_done", "team": team_doc, "status": "queued"})
+            return
+        if not error:
+            try:
+                snapshot = SNAPSHOTS.get(team_doc)
+                stored = snapshot.to_dict() if snapshot else {}
+            except Exception as e:
+                store_log.error("Stream için iletilen takımın verisi alınamadı (%s): %s", team_doc, e)
+                stored = {}
+            for data_type, field in STREAM_FIELDS.items():
+                if field in stored:
+                    events.put({"event": "item", "team": team_doc, "type": data_type, "source": "remote",
+                                "data": stored[field]})
+        events.put({"event": "team_done", "team": team_doc, **({"error": error} if error else {})})
+
+    def produce():
+        errors, queued = [], []
+        try:
+            with profiled_thread(), page_memo():
+                pending = CLUSTER.dispatch_async(remote)
+                errors = [e for e in run_concurrently(run_team, local, workers=len(local)) if e]
+                remote_errors, fallback, queued = pending.result()
+                for team_doc, error in remote_errors.items():
+                    publish_remote(team_doc, error, team_doc in queued)
+                errors.extend(e for e in remote_errors.values() if e)
+                errors.extend(e for e in run_concurrently(run_team, fallback, workers=len(fallback)) if e)
+        except Exception as e:
+            errors.append(f"Stream işlenirken hata oluştu: {str(e)}")
+        finally:
+            status = "partial_success" if errors else ("queued" if queued else "success")
+            events.put({"event": "done", "status": status, "errors": errors,
+                        **({"queued": queued} if queued else {})})
+            events.put(finished)
+
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+
+    def body():
+        while True:
+            event = events.get()
+            if event is finished:
+                return
+            yield format_event(event, mode)
+
+    return Response(body(), mimetype=STREAM_MIMETYPES[mode],
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.before_request
+def set_fetch_context():
+    """
+    İstek başına fetch ayarları: X-Fetch-Priority: background ile gelen istekler (ör. toplu
+    yenilemeler) interaktif isteklerin arkasında bekler; upstream süre bütçesi REQUEST_BUDGET.
+    Katalog dosyası değiştiyse burada yeniden yüklenir; TTL override'ı CachePolicy'ye iletilir.
+    """
+    maybe_reload_catalog()
+    _ttl_override.set(requested_ttl_override())
+    header = request.headers.get("X-Fetch-Priority", "").lower()
+    _fetch_priority.set(BACKGROUND if header == "background" else INTERACTIVE)
+    _request_deadline.set(time.monotonic() + REQUEST_BUDGET)
+
+    # Thread'ler istekler arasında yeniden kullanıldığından profil durumu her istekte sıfırlanır;
+    # aksi halde profillenmeyen istekler durdurulmuş profile span/worker eklemeye devam eder
+    mode = requested_profile_mode()
+    g.profiler = RequestProfiler(mode) if mode else None
+    _profile_spans.set(g.profiler.spans if mode else None)
+    _profiler.set(g.profiler)
+
+@app.after_request
+def finish_profile(response: Response) -> Response:
+    """Profillenen isteğin profilini saklar ve kimliğini X-Profile-Id başlığında döner."""
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    record = profiler.stop()
+    record.update(method=request.method, path=request.path, status=response.status_code)
+    if response.is_streamed:
+        record["note"] = "stream yanıtı: profil yanıt başlayana kadar olan kısmı kapsar"
+    response.headers["X-Profile-Id"] = PROFILES.add(record)
+    api_log.info("Profil kaydedildi: %s %s %.0f ms (%s)", request.method, request.path,
+                 record["duration_ms"], ", ".join(record["teams"]) or "-")
+    return response
+
+@app.teardown_request
+def abort_profile(error=None):
+    """after_request'e ulaşmayan (hata) isteklerde profilleyiciyi durdurur."""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
 
 @app.route("/")
 def index():
     return "API çalışıyor"
 
+# ?parts= ile istenebilecek veri tipi -> team_data dokümanındaki alan
+PROJECTION_FIELDS = {k: v for k, v in _SNAPSHOT_KEYS.items() if k not in ("team", "last_checked")}
+
+@app.route("/team/<team_key>")
+def team_data_api(team_key: str):
+    """
+    Takımın kayıtlı verisini önceden encode edilmiş (ve sıkıştırılmış) gövdeyle döner.
+    ?parts=injuries,suspensions ile sadece istenen veri tipleri döner (sharded düzende sadece
+    o parça dokümanları okunur).
+    """
+    try:
+        team_doc = get_team_info(team_key)["name"].lower()
+    except ValueError:
+        return jsonify({"error": f"{team_key} takımı bulunamadı."}), 404
+
+    parts = [p for p in request.args.get("parts", "").split(",") if p]
+    unknown = [p for p in parts if p not in PROJECTION_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Bilinmeyen veri tipi: {', '.join(unknown)}"}), 400
+
+    try:
+        if parts:
+            body = SNAPSHOTS.projection(team_doc, [PROJECTION_FIELDS[p] for p in parts])
+        else:
+            snapshot = SNAPSHOTS.get(team_doc)
+            body = snapshot.body() if snapshot is not None else None
+    except Exception as e:
+        store_log.error("Takım verisi okunamadı (%s): %s", team_doc, e)
+        return jsonify({"error": "Takım verisi okunamadı"}), 503
+    if body is None:
+        return jsonify({"error": f"{team_doc} için kayıtlı veri yok."}), 404
+
+    if body.etag in request.if_none_match:
+        res = Response(status=304)
+    else:
+        payload, encoding = body.negotiate(request.headers.get("Accept-Encoding", ""))
+        res = Response(payload, mimetype="application/json")
+        if encoding:
+            res.headers["Content-Encoding"] = encoding
+    res.set_etag(body.etag)
+    res.vary.add("Accept-Encoding")
+    return res
+
+def _history_query():
+    """history/changes endpoint'leri için ortak parametreler: (veri tipleri, sezon)."""
+    types = [t for t in request.args.get("types", "").split(",") if t] or list(HISTORY_FIELDS)
+    unknown = [t for t in types if t not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen veri tipi: {', '.join(unknown)}")
+    season = request.args.get("season")
+    return types, int(season) if season else None
+
+@app.route("/team/<team_key>/history")
+def team_history_api(team_key: str):
+    """?at=<ISO zaman> anındaki kayıtlı değerler (varsayılan: şimdi); types=injuries,suspensions ile daraltılabilir."""
+    try:
+        team_doc = get_team_info(team_key)["name"].lower()
+        types, season_id = _history_query()
+        at = request.args.get("at") or datetime.now(timezone.utc).isoformat()
+        state = {t: HISTORY.state_at(team_doc, t, at, season_id) for t in types}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        store_log.error("Geçmiş okunamadı (%s): %s", team_key, e)
+        return jsonify({"error": "Geçmiş okunamadı"}), 503
+    return jsonify({"team": team_doc, "at": at, "data": state})
+
+@app.route("/team/<team_key>/changes")
+def team_changes_api(team_key: str):
+    """?since=<ISO zaman> sonrasındaki değişiklikler (eklenen/çıkan oyuncular, değişen alanlar)."""
+    since = request.args.get("since")
+    if not since:
+        return jsonify({"error": "since parametresi gerekli"}), 400
+    try:
+        team_doc = get_team_info(team_key)["name"].lower()
+        types, season_id = _history_query()
+        changes = {t: HISTORY.changes_since(team_doc, t, since, season_id) for t in types}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        store_log.error("Geçmiş okunamadı (%s): %s", team_key, e)
+        return jsonify({"error": "Geçmiş okunamadı"}), 503
+    return jsonify({"team": team_doc, "since": since, "changes": {t: c for t, c in changes.items() if c}})
+
+@app.route("/metrics")
+def metrics():
+    return jsonify({
+        "circuit_breakers": breaker_snapshot(),
+        "rate_limiter": RATE_LIMITER.snapshot(),
+        "proxies": PROXY_POOL.snapshot(),
+        "snapshots": len(SNAPSHOTS),
+        "team_store": TEAM_STORE.snapshot(),
+        "change_feed": CHANGE_FEED.snapshot(),
+        "parse_pool": PARSE_POOL.snapshot() if PARSE_POOL else None,
+        "browser_pool": BROWSER_POOL.snapshot() if BROWSER_POOL else None,
+        "fetch_tiers": FETCH_TIERS.snapshot(),
+        "cluster": CLUSTER.snapshot(),
+    })
+
+@app.route("/cluster")
+def cluster_api():
+    """Küme üyeleri ve düğüm başına sahip olunan katalog takımı sayısı."""
+    return jsonify({**CLUSTER.snapshot(), "owned_teams": CLUSTER.owned_teams()})
+
+@app.route("/cluster/refresh", methods=["POST"])
+def cluster_refresh_api():
+    """
+    Başka bir düğümün ilettiği takımları (bu düğüm sahibi) işler. Gövde: {"jobs": [{team, league_key, kickoff}]}
+    Sadece küme modu açık ve CLUSTER_TOKEN tanımlıyken, doğru X-Cluster-Token ile kabul edilir.
+    """
+    token = request.headers.get("X-Cluster-Token", "")
+    if not (CLUSTER_MODE and CLUSTER_TOKEN and hmac.compare_digest(token, CLUSTER_TOKEN)):
+        return jsonify({"error": "Yetkisiz"}), 403
+    jobs = (request.get_json(silent=True) or {}).get("jobs")
+    if not isinstance(jobs, list) or not all(isinstance(j, dict) for j in jobs):
+        return jsonify({"error": "jobs listesi gerekli"}), 400
+    return jsonify({"errors": dict(run_jobs(jobs))})
+
+def _admin_authorized() -> bool:
+    return bool(PROFILE_TOKEN) and request.headers.get("X-Admin-Token") == PROFILE_TOKEN
+
+@app.route("/admin/profile", methods=["POST"])
+def admin_profile_api():
+    """Sonraki istekleri profillemek üzere işaretler. Gövde: {"count": 1, "mode": "cprofile"|"sample", "path": "/generate-json"}"""
+    if not _admin_authorized():
+        return jsonify({"error": "Yetkisiz"}), 403
+    body = request.get_json(silent=True) or {}
+    mode = body.get("mode", "cprofile")
+    count = body.get("count", 1)
+    if mode not in PROFILE_MODES or not isinstance(count, int) or not 1 <= count <= 100:
+        return jsonify({"error": f"mode {PROFILE_MODES} içinden, count 1-100 olmalı"}), 400
+    PROFILES.arm(count, mode, body.get("path"))
+    return jsonify({"status": "armed", "count": count, "mode": mode, "path": body.get("path")})
+
+@app.route("/admin/profiles")
+def admin_profiles_api():
+    """Saklanan en yavaş isteklerin profil özetleri (süreye göre azalan)."""
+    if not _admin_authorized():
+        return jsonify({"error": "Yetkisiz"}), 403
+    return jsonify({"profiles": PROFILES.list()})
+
+@app.route("/admin/profiles/<profile_id>")
+def admin_profile_detail_api(profile_id: str):
+    """Profil çıktısı: ?format=json (varsayılan), pstats (metin) veya collapsed (flamegraph.pl/speedscope girdisi)."""
+    if not _admin_authorized():
+        return jsonify({"error": "Yetkisiz"}), 403
+    record = PROFILES.get(profile_id)
+    if record is None:
+        return jsonify({"error": f"{profile_id} profili bulunamadı"}), 404
+    fmt = request.args.get("format", "json")
+    if fmt in ("pstats", "collapsed"):
+        if record.get(fmt) is None:
+            return jsonify({"error": f"Bu profilde {fmt} çıktısı yok ({record['mode']} modu)"}), 404
+        return Response(record[fmt], mimetype="text/plain")
+    return jsonify(record)
+
 @app.route("/generate-json", methods=["POST"])
 def generate_json_api():
+    # İstek boyunca aynı sayfa bir kez çekilir (cache hash kontrolü, extract ve iki takımın ortak
+    # lig tabloları aynı HTML'i kullanır); stream modu kendi PageMemo'sunu açar
+    with page_memo():
+        return _generate_json()
+
+def _generate_json():
     # Hata toplama ve raporlama için bir listesi
     errors = []
 
@@ -1053,53 +4464,80 @@ def generate_json_api():
         body = request.get_json()
         home_key = body.get("home_team")
         away_key = body.get("away_team")
-        league_key = body.get("league_key")
+        # league_key verilmezse iki takımın ortak liginden çıkarılır
+        league_key = body.get("league_key") or (infer_league(home_key, away_key) if home_key and away_key else None)
 
         if not home_key or not away_key or not league_key:
             return jsonify({"error": "Eksik parametreler"}), 400
 
         home_info = get_team_info(home_key)
         away_info = get_team_info(away_key)
+        note_fixture([home_info, away_info], body.get("kickoff"))
 
         cache_mgr = CacheManager(DB)
 
+        # Çok düğümlü modda sahibi başka düğüm olan takımlar (yerel takımlarla eşzamanlı) ona iletilir
+        local, remote = CLUSTER.route([(home_info, league_key), (away_info, league_key)])
+
+        # Stream modu: her veri tipi hazır olduğunda NDJSON/SSE olarak gönderilir
+        stream_mode = requested_stream_mode()
+        if stream_mode:
+            return stream_team_data(local, remote, cache_mgr, stream_mode)
+
+        pending = CLUSTER.dispatch_async(remote)
+        local_docs = {info["name"].lower() for info, _ in local}
+
         # --- EV SAHİBİ TAKIM İŞLEMİ (İzolasyon Bloğu) ---
         home_data = None
         home_stats = None
         home_doc = home_info['name'].lower()
-        try:
-            home_data, home_stats, home_doc = generate_team_data(home_info, league_key, cache_mgr)
-            if home_data:
-                save_team_data(home_doc, home_data, home_stats)
-            else:
-                errors.append(
-                    f"Ev sahibi takım ({home_info['name']}) için ana veri çekilemedi ve Firestore'a kaydedilemedi.")
+        if home_doc in local_docs:
+            try:
+                home_data, home_stats, home_doc = generate_team_data(home_info, league_key, cache_mgr)
+                if home_data:
+                    save_team_data(home_doc, home_data, home_stats)
+                else:
+                    errors.append(
+                        f"Ev sahibi takım ({home_info['name']}) için ana veri çekilemedi ve Firestore'a kaydedilemedi.")
 
-        except Exception as e:
-            # Sadece bu takıma özel hataları yakala ve devam et
-            error_msg = f"Ev sahibi takım ({home_info['name']}) işlenirken kritik hata oluştu: {str(e)}"
-            print(f"[HATA İZOLASYONU] {error_msg}", file=sys.stderr)
-            errors.append(error_msg)
+            except Exception as e:
+                # Sadece bu takıma özel hataları yakala ve devam et
+                error_msg = f"Ev sahibi takım ({home_info['name']}) işlenirken kritik hata oluştu: {str(e)}"
+                api_log.error("Hata izolasyonu: %s", error_msg)
+                errors.append(error_msg)
 
         # --- DEPLASMAN TAKIMI İŞLEMİ (İzolasyon Bloğu) ---
         away_data = None
         away_stats = None
         away_doc = away_info['name'].lower()
-        try:
-            away_data, away_stats, away_doc = generate_team_data(away_info, league_key, cache_mgr)
-            if away_data:
-                save_team_data(away_doc, away_data, away_stats)
-            else:
-                errors.append(
-                    f"Deplasman takımı ({away_info['name']}) için ana veri çekilemedi ve Firestore'a kaydedilemedi.")
+        if away_doc in local_docs:
+            try:
+                away_data, away_stats, away_doc = generate_team_data(away_info, league_key, cache_mgr)
+                if away_data:
+                    save_team_data(away_doc, away_data, away_stats)
+                else:
+                    errors.append(
+                        f"Deplasman takımı ({away_info['name']}) için ana veri çekilemedi ve Firestore'a kaydedilemedi.")
 
-        except Exception as e:
-            # Sadece bu takıma özel hataları yakala ve devam et
-            error_msg = f"Deplasman takımı ({away_info['name']}) işlenirken kritik hata oluştu: {str(e)}"
-            print(f"[HATA İZOLASYONU] {error_msg}", file=sys.stderr)
-            errors.append(error_msg)
+            except Exception as e:
+                # Sadece bu takıma özel hataları yakala ve devam et
+                error_msg = f"Deplasman takımı ({away_info['name']}) işlenirken kritik hata oluştu: {str(e)}"
+                api_log.error("Hata izolasyonu: %s", error_msg)
+                errors.append(error_msg)
+
+        # --- İLETİLEN TAKIMLAR (sahibine ulaşılamazsa burada işlenir) ---
+        remote_errors, fallback, queued = pending.result()
+        errors.extend(e for e in remote_errors.values() if e)
+        errors.extend(e for e in (process_team(info, lk, cache_mgr) for info, lk in fallback) if e)
 
         # --- SONUÇ RAPORLAMA ---
+        if not errors and queued:
+            # Kuyruğa yazılan takımlar sahibi düğüm işleyene kadar güncellenmiş sayılmaz
+            return jsonify({
+                "status": "queued",
+                "message": f"{', '.join(queued)} sahibi düğümün kuyruğuna alındı; veriler henüz güncellenmedi.",
+                "queued": queued
+            }), 200
         if not errors:
             return jsonify({
                 "status": "success",
@@ -1111,7 +4549,8 @@ def generate_json_api():
             return jsonify({
                 "status": "partial_success",
                 "message": "İstek işlendi ancak bazı takım verileri çekilemedi/kaydedilemedi.",
-                "errors": errors
+                "errors": errors,
+                **({"queued": queued} if queued else {})
             }), 200  # 200 (OK) ile döndürerek genel bir API hatasını (500) önlüyoruz
 
     except Exception as e:
@@ -1119,8 +4558,97 @@ def generate_json_api():
         # get_team_info (takım adı bulunamadı) gibi, maçın başlamasını engelleyen
         # hataları yakalar ve 500/400 döndürür.
         error_message = f"Maç ön kontrol hatası: {str(e)}"
-        print(f"[KRİTİK HATA] API Başlangıç Hatası: {error_message}", file=sys.stderr)
+        api_log.critical("API Başlangıç Hatası: %s", error_message)
         return jsonify({"status": "fatal_error", "message": error_message})
         
+@app.route("/generate-json-batch", methods=["POST"])
+def generate_json_batch_api():
+    """
+    Bir maç gününün tüm maçlarını tek istekte işler.
+
+    Gövde: {"fixtures": [{"home_team": ..., "away_team": ..., "league_key": ..., "kickoff": ISO}, ...]}
+    Takımlar ve ligler tekilleştirilir, gereken sayfalar bir kez ve eşzamanlı (rate limiter altında)
+    çekilir, ardından her takım bir kez işlenip maç bazında sonuç döner.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        fixtures = body.get("fixtures")
+        if not isinstance(fixtures, list) or not fixtures:
+            return jsonify({"status": "fatal_error", "message": "fixtures listesi gerekli"}), 400
+
+        results, teams = plan_batch(fixtures)
+        cache_mgr = CacheManager(DB)
+
+        # Çok düğümlü modda sahibi başka düğüm olan takımlar (eşzamanlı) ona iletilir, sayfaları burada çekilmez
+        local, remote = CLUSTER.route([(info, key[1]) for key, info in teams.items()])
+        local_keys = {(info["name"].lower(), league_key) for info, league_key in local}
+        # Sadece TTL'i dolmuş verilerin sayfaları ön-yüklenir; taze veriler için upstream'e gidilmez
+        urls = stale_page_urls(local, cache_mgr)
+
+        with request_budget(BATCH_BUDGET), page_memo() as memo:
+            # İletme de batch bütçesiyle sınırlıdır (dispatch çağıranın context'ini kopyalar)
+            pending = CLUSTER.dispatch_async(remote)
+
+            # 1. Bayat sayfaları eşzamanlı ön-yükle (hatalar memo'da saklanır, takım işlenirken görülür)
+            def prefetch(url):
+                try:
+                    memo.get(url, _fetcher)
+                except Exception as e:
+                    scrape_log.warning("Batch ön-yükleme başarısız (%s): %s", url, e)
+
+            run_concurrently(prefetch, urls)
+
+            # 2. Her tekil takımı bir kez işle (sayfalar memo'dan gelir)
+            team_keys = [key for key in teams if key in local_keys]
+            team_errors = dict(zip(team_keys, run_concurrently(
+                lambda key: process_team(teams[key], key[1], cache_mgr), team_keys)))
+
+            # 3. İletilen takımların sonuçları; sahibine ulaşılamayanlar burada işlenir
+            remote_errors, fallback, queued = pending.result()
+            team_errors.update({key: remote_errors.get(key[0]) for key in teams if key not in local_keys})
+            fallback_keys = [(info["name"].lower(), league_key) for info, league_key in fallback]
+            team_errors.update(zip(fallback_keys, run_concurrently(
+                lambda key: process_team(teams[key], key[1], cache_mgr), fallback_keys)))
+
+        for result in results:
+            fixture_teams = result.pop("teams", [])
+            result["errors"].extend(team_errors[key] for key in fixture_teams if team_errors[key])
+            # Sadece kuyruğa yazılan takımı olan maç "queued": veriler sahibi düğüm işleyince güncellenir
+            result["status"] = "error" if result["errors"] else (
+                "queued" if any(doc in queued for doc, _ in fixture_teams) else "success")
+
+        failed = sum(1 for r in results if r["errors"])
+        status = "success" if not failed else ("partial_success" if failed < len(results) else "error")
+        if status == "success" and queued:
+            status = "queued"
+        return jsonify({
+            "status": status,
+            "fixtures": results,
+            "stats": {
+                "fixtures": len(results),
+                "teams": len(teams),
+                "leagues": len({key[1] for key in teams}),
+                "pages_planned": len(urls),
+                "upstream_fetches": memo.fetches,
+                "memo_hits": memo.hits,
+                "forwarded_teams": len(teams) - len(local_keys) - len(fallback) - len(queued),
+                "queued_teams": len(queued),
+            },
+        }), 200
+
+    except Exception as e:
+        error_message = f"Batch ön kontrol hatası: {str(e)}"
+        api_log.critical("Batch API Hatası: %s", error_message)
+        return jsonify({"status": "fatal_error", "message": error_message}), 500
+
+if PARSE_WORKERS and not IN_PARSE_WORKER:
+    start_parse_pool()
+
+if CLUSTER_MODE and not IN_PARSE_WORKER:
+    start_cluster()
+
+if BROWSER_FALLBACK and not IN_PARSE_WORKER:
+    start_browser_pool()
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=10000)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=10000)
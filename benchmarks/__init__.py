@@ -0,0 +1,6 @@
+"""
+Ağ bağlantısı gerektirmeyen benchmark ve yük testi araçları.
+
+Kaydedilmiş transfermarkt HTML'leri (benchmarks/fixtures) app.set_fetcher ile
+get_soup'a verilir, Firestore yerine bellek içi stub kullanılır.
+"""
@@ -0,0 +1,156 @@
+"""
+Kaydedilmiş HTML fixture'ları üzerinde extractor benchmark'ı (ağ gerektirmez).
+
+Kullanım:
+    python -m benchmarks.bench_scrape                      # tüm benchmark'lar
+    python -m benchmarks.bench_scrape -n 50 --json out.json
+    python -m benchmarks.bench_scrape --baseline out.json  # %25'ten fazla yavaşlamada exit 1
+    python -m benchmarks.bench_scrape --record             # fixture'ları canlı siteden yenile
+    python -m benchmarks.bench_scrape --parse-workers 4    # parse süreç havuzunda
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import app
+from benchmarks.stubs import FIXTURE_DIR, FixtureFetcher, InMemoryFirestore, page_type
+
+
+def fixture_urls(team_info: dict, league_key: str) -> dict:
+    """--record için her sayfa tipinin canlı URL'si."""
+    urls = [*app.team_page_urls(team_info), app.get_league_url(league_key), app.get_form_url(league_key)]
+    return {page_type(url): url for url in urls}
+
+
+def record(team_info: dict, league_key: str, fixture_dir: str = FIXTURE_DIR):
+    """Fixture'ları canlı transfermarkt sayfalarından (http_fetch ile) yeniden kaydeder."""
+    for name, url in fixture_urls(team_info, league_key).items():
+        html = app.http_fetch(url)
+        with open(os.path.join(fixture_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"kaydedildi: {name}.html ({len(html) // 1024} KiB) ← {url}")
+
+
+def build_cases(team_info: dict, league_key: str) -> dict:
+    """Benchmark adı -> argümansız çağrılabilir fonksiyon."""
+    name, slug, team_id = team_info["name"], team_info["slug"], team_info["id"]
+    squad = app.scrape_squad(slug, team_id)
+
+    def team_data(db, policy=None):
+        # /generate-json'daki tek takım yolu: cache-aware scrape + Firestore'a kayıt
+        app.DB = db
+        data, stats, doc = app.generate_team_data(team_info, league_key, app.CacheManager(db, policy))
+        app.save_team_data(doc, data, stats)
+        return data
+
+    # warm: TTL 0 ile her veri hash ile yeniden doğrulanır; fresh: varsayılan politika (TTL içinde fetch yok)
+    revalidate = app.CachePolicy({data_type: 0 for data_type in app.CachePolicy.BASE_TTLS})
+    warm_db = InMemoryFirestore()
+    fresh_db = InMemoryFirestore()
+
+    return {
+        "scrape_squad": lambda: app.scrape_squad(slug, team_id),
+        "scrape_stats": lambda: app.scrape_stats(slug, team_id),
+        "scrape_suspensions": lambda: app.scrape_suspensions(slug, team_id, squad),
+        "scrape_injuries": lambda: app.scrape_injuries(slug, team_id, squad),
+        "scrape_suspensions_kader": lambda: app.scrape_suspensions_kader(slug, team_id),
+        "get_league_position": lambda: app.get_league_position(name, league_key),
+        "get_recent_form": lambda: app.get_recent_form(name, league_key),
+        "generate_team_data_cold": lambda: team_data(InMemoryFirestore()),
+        "generate_team_data_warm": lambda: team_data(warm_db, revalidate),
+        "generate_team_data_fresh": lambda: team_data(fresh_db),
+    }
+
+
+def run_case(fn, fetcher: FixtureFetcher, repeat: int) -> dict:
+    """Bir benchmark'ı repeat kez çalıştırır; süre, throughput, fetch ve bellek ölçer."""
+    result = fn()  # ısınma (warm senaryosunda cache'i de doldurur)
+    if result in (None, [], {}):
+        raise RuntimeError("Extractor boş sonuç döndü; fixture'lar seçicilerle uyuşmuyor olabilir.")
+
+    timings = []
+    fetcher.reset()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    fetches = fetcher.total / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean = statistics.fmean(timings)
+    return {
+        "mean_ms": mean * 1000,
+        "p50_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "ops_per_s": 1 / mean if mean else 0.0,
+        "fetches_per_call": fetches,
+        "peak_alloc_kib": peak / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Baseline'a göre tolerance oranından fazla yavaşlayan benchmark'ları döner."""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base and res["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: {base['p50_ms']:.2f} ms → {res['p50_ms']:.2f} ms")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--team", default="galatasaray")
+    parser.add_argument("--league", default="tr1")
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument("-k", "--filter", default="", help="sadece adında bu metin geçen benchmark'lar")
+    parser.add_argument("--json", help="sonuçları bu dosyaya yaz")
+    parser.add_argument("--baseline", help="karşılaştırılacak önceki --json çıktısı")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--record", action="store_true", help="fixture'ları canlı siteden kaydet ve çık")
+    parser.add_argument("--parse-workers", type=int, default=0, help="parse'ı bu kadar worker'lı süreç havuzunda yap")
+    args = parser.parse_args(argv)
+
+    team_info = app.get_team_info(args.team)
+    if args.record:
+        record(team_info, args.league)
+        return 0
+
+    app.log.setLevel(logging.ERROR)
+    app.start_parse_pool(args.parse_workers)
+    fetcher = FixtureFetcher()
+    app.set_fetcher(fetcher)
+
+    results = {}
+    print(f"{'benchmark':<28}{'p50 ms':>10}{'mean ms':>10}{'ops/s':>10}{'fetch':>8}{'peak KiB':>10}")
+    for name, fn in build_cases(team_info, args.league).items():
+        if args.filter not in name:
+            continue
+        res = results[name] = run_case(fn, fetcher, args.repeat)
+        print(f"{name:<28}{res['p50_ms']:>10.2f}{res['mean_ms']:>10.2f}{res['ops_per_s']:>10.1f}"
+              f"{res['fetches_per_call']:>8.1f}{res['peak_alloc_kib']:>10.0f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"[REGRESYON] {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+/generate-json için yük testi: fixture isteklerini ayarlanabilir eşzamanlılıkla tekrar oynatır.
+
+Varsayılan mod süreç içidir: transfermarkt fetcher'ı ve Firestore, gecikmesi ayarlanabilen
+yerel stub'larla değiştirilir ve Flask test client'ı kullanılır. --url verilirse istekler
+çalışan bir sunucuya HTTP ile gönderilir (upstream fetch sayısı bu modda ölçülemez).
+
+Kullanım:
+    python -m benchmarks.loadtest -c 4 -n 40 --fetch-latency 0.3 --db-latency 0.02
+    python -m benchmarks.loadtest --url http://localhost:10000 -c 8 -n 100
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+from benchmarks.stubs import FIXTURE_DIR, FixtureFetcher, InMemoryFirestore
+
+DEFAULT_REQUESTS = os.path.join(FIXTURE_DIR, "requests.jsonl")
+ENDPOINT = "/generate-json"
+
+
+def load_requests(path: str) -> list[dict]:
+    """requests.jsonl biçimindeki (satır başına bir JSON gövde) dosyayı okur."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Sıralı olmayan listeden en yakın sıra yöntemiyle yüzdelik değer."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class InProcessTarget:
+    """Flask test client'ı ile uygulamaya doğrudan istek atar (thread başına bir client)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def post(self, body: dict) -> tuple[int, dict]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = app.app.test_client()
+        res = client.post(ENDPOINT, json=body)
+        return res.status_code, res.get_json(silent=True) or {}
+
+
+class HttpTarget:
+    """Çalışan bir sunucuya urllib ile istek atar."""
+
+    def __init__(self, base_url: str, timeout: float = 120):
+        self.url = base_url.rstrip("/") + ENDPOINT
+        self.timeout = timeout
+
+    def post(self, body: dict) -> tuple[int, dict]:
+        req = urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as res:
+                return res.status, json.loads(res.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            return e.code, {}
+
+
+def run(target, bodies: list[dict], total: int, concurrency: int, fetcher: FixtureFetcher | None) -> dict:
+    """total adet isteği concurrency thread ile gönderir ve özet metrikleri döner."""
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def one(i: int):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        try:
+            status, payload = target.post(body)
+            outcome = f"{status} {payload.get('status', '')}".strip()
+        except Exception as e:
+            outcome = f"exception {type(e).__name__}"
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            outcomes[outcome] += 1
+
+    if fetcher:
+        fetcher.reset()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+
+    report = {
+        "requests": total,
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "throughput_rps": total / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "outcomes": dict(outcomes),
+    }
+    if fetcher:
+        report["upstream_fetches"] = fetcher.total
+        report["fetches_per_request"] = fetcher.total / total if total else 0.0
+        report["fetches_by_page"] = dict(fetcher.counts)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-r", "--requests", default=DEFAULT_REQUESTS, help="requests.jsonl biçiminde istek dosyası")
+    parser.add_argument("-n", "--total", type=int, default=0, help="toplam istek (varsayılan: dosyadaki satır sayısı)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--fetch-latency", type=float, default=0.0, help="stub upstream fetch gecikmesi (sn)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="stub Firestore işlem gecikmesi (sn)")
+    parser.add_argument("--url", help="süreç içi yerine bu adresteki sunucuya HTTP ile gönder")
+    parser.add_argument("--json", help="raporu bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    bodies = load_requests(args.requests)
+    total = args.total or len(bodies)
+
+    fetcher = None
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        app.log.setLevel(logging.ERROR)
+        fetcher = FixtureFetcher(latency=args.fetch_latency)
+        app.set_fetcher(fetcher)
+        app.DB = InMemoryFirestore(latency=args.db_latency)
+        target = InProcessTarget()
+
+    report = run(target, bodies, total, args.concurrency, fetcher)
+
+    print(f"istek: {report['requests']}  eşzamanlılık: {report['concurrency']}  süre: {report['wall_s']:.2f} sn")
+    print(f"throughput: {report['throughput_rps']:.2f} istek/sn")
+    print(f"gecikme ms  p50: {report['p50_ms']:.1f}  p95: {report['p95_ms']:.1f}  "
+          f"p99: {report['p99_ms']:.1f}  ort: {report['mean_ms']:.1f}")
+    if fetcher:
+        print(f"upstream fetch: {report['upstream_fetches']} ({report['fetches_per_request']:.1f}/istek) "
+              f"{report['fetches_by_page']}")
+    print(f"sonuçlar: {report['outcomes']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Benchmark ve yük testleri için fetcher ve Firestore yerine geçen yerel sınıflar."""
+import copy
+import os
+import threading
+import time
+from collections import Counter
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# URL yolundaki segment -> fixture dosyası (formtabelle, tabelle'den önce kontrol edilmeli)
+PAGE_TYPES = [
+    ("/formtabelle/", "formtabelle"),
+    ("/tabelle/", "tabelle"),
+    ("/startseite/", "startseite"),
+    ("/leistungsdaten/", "leistungsdaten"),
+    ("/sperrenundverletzungen/", "sperrenundverletzungen"),
+    ("/kader/", "kader"),
+]
+
+
+def page_type(url: str) -> str:
+    """URL'nin hangi transfermarkt sayfa tipine ait olduğunu döner."""
+    for segment, name in PAGE_TYPES:
+        if segment in url:
+            return name
+    raise ValueError(f"Bilinmeyen sayfa tipi: {url}")
+
+
+class FixtureFetcher:
+    """
+    app.set_fetcher ile kullanılacak, kaydedilmiş HTML döndüren fetcher.
+
+    Her sayfa tipi için benchmarks/fixtures/<tip>.html okunur (takımdan bağımsız).
+    İsteğe bağlı sabit gecikme ile upstream süresi simüle edilir.
+    """
+
+    def __init__(self, fixture_dir: str = FIXTURE_DIR, latency: float = 0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.pages = {}
+        for _, name in PAGE_TYPES:
+            with open(os.path.join(fixture_dir, f"{name}.html"), "r", encoding="utf-8") as f:
+                self.pages[name] = f.read()
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> str:
+        name = page_type(url)
+        with self._lock:
+            self.counts[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.pages[name]
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.counts.values())
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+def _deep_merge(target: dict, data: dict):
+    """Firestore set(merge=True) davranışı: iç içe map'ler alan bazında birleşir."""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class _Snapshot:
+    def __init__(self, doc_id: str, data: dict | None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class _DocumentRef:
+    def __init__(self, store: "InMemoryFirestore", collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self) -> _Snapshot:
+        self._store._wait()
+        with self._store._lock:
+            data = self._store.data.get(self._collection, {}).get(self.id)
+            self._store.reads += 1
+            return _Snapshot(self.id, copy.deepcopy(data) if data is not None else None)
+
+    def set(self, data: dict, merge: bool = False):
+        self._store._wait()
+        with self._store._lock:
+            docs = self._store.data.setdefault(self._collection, {})
+            if merge and self.id in docs:
+                _deep_merge(docs[self.id], data)
+            else:
+                docs[self.id] = copy.deepcopy(data)
+            self._store.writes += 1
+
+    def delete(self):
+        self._store._wait()
+        with self._store._lock:
+            self._store.data.get(self._collection, {}).pop(self.id, None)
+            self._store.writes += 1
+
+    def collection(self, name: str) -> "_CollectionRef":
+        """Alt koleksiyon; "<koleksiyon>/<doküman>/<ad>" yolunda ayrı bir koleksiyon olarak tutulur."""
+        return _CollectionRef(self._store, f"{self._collection}/{self.id}/{name}")
+
+
+class _CollectionRef:
+    def __init__(self, store: "InMemoryFirestore", name: str):
+        self._store = store
+        self._name = name
+
+    def document(self, doc_id: str) -> _DocumentRef:
+        return _DocumentRef(self._store, self._name, doc_id)
+
+    def stream(self):
+        # Firestore gibi doküman kimliğine göre sıralı döner
+        with self._store._lock:
+            items = sorted(self._store.data.get(self._name, {}).items())
+        for doc_id, data in items:
+            yield _Snapshot(doc_id, copy.deepcopy(data))
+
+
+class InMemoryFirestore:
+    """firestore.client() yerine geçen, thread-safe bellek içi stub (collection/document/get/set)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data = {}
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name: str) -> _CollectionRef:
+        return _CollectionRef(self, name)
+
+    def get_all(self, refs):
+        """Client.get_all gibi birden çok dokümanı tek çağrıda okur (tek gecikme)."""
+        self._wait()
+        with self._lock:
+            snapshots = []
+            for ref in refs:
+                data = self.data.get(ref._collection, {}).get(ref.id)
+                self.reads += 1
+                snapshots.append(_Snapshot(ref.id, copy.deepcopy(data) if data is not None else None))
+        yield from snapshots
@@ -0,0 +1,35 @@
+"""
+Lig tablolarından takım kataloğunu (catalog.json) günceller.
+
+Kullanım:
+    python discover_teams.py               # tüm ligler
+    python discover_teams.py tr1 pt1       # sadece verilen ligler
+    python discover_teams.py --dry-run     # dosyaya yazmadan değişiklikleri göster
+
+Çalışan sunucular değişikliği CATALOG_RELOAD_INTERVAL içinde kendiliğinden yükler.
+"""
+import argparse
+import sys
+
+import app
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("leagues", nargs="*", help="taranacak lig anahtarları (varsayılan: hepsi)")
+    parser.add_argument("--catalog", default=app.CATALOG_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="dosyaya yazma")
+    args = parser.parse_args(argv)
+
+    report = app.discover_catalog(args.leagues or None, path=args.catalog, write=not args.dry_run)
+    for key in report["added"]:
+        print(f"[EKLENDİ] {key}")
+    for key in report["updated"]:
+        print(f"[GÜNCELLENDİ] {key}")
+    for league, error in report["failed"].items():
+        print(f"[HATA] {league}: {error}", file=sys.stderr)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
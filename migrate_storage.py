@@ -0,0 +1,45 @@
+"""
+team_data/new_data dokümanlarını sharded düzene (team_summary + team_parts) taşır.
+
+Kullanım:
+    python migrate_storage.py                      # tüm takımlar
+    python migrate_storage.py galatasaray          # sadece verilen takım dokümanları
+    python migrate_storage.py --dry-run            # yazmadan boyut raporu
+    python migrate_storage.py --delete-legacy      # taşıdıktan sonra team_data/new_data'yı sil
+
+Sıra: taşı → STORAGE_LAYOUT=dual ile deploy (eski okuyucular team_data'yı okumaya devam eder) →
+okuyucular geçince STORAGE_LAYOUT=sharded → isteğe bağlı --delete-legacy.
+"""
+import argparse
+import sys
+
+import app
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("teams", nargs="*", help="taşınacak takım dokümanları (varsayılan: team_data'daki hepsi)")
+    parser.add_argument("--dry-run", action="store_true", help="yazma, sadece boyutları raporla")
+    parser.add_argument("--delete-legacy", action="store_true", help="taşınan team_data/new_data dokümanlarını sil")
+    args = parser.parse_args(argv)
+
+    if app.DB is None:
+        print("Firestore bağlantısı yok (FIRESTORE_KEY)", file=sys.stderr)
+        return 1
+    if args.delete_legacy and args.dry_run:
+        parser.error("--delete-legacy ile --dry-run birlikte kullanılamaz")
+
+    report = app.TeamStore("sharded").migrate(args.teams or None, dry_run=args.dry_run,
+                                             delete_legacy=args.delete_legacy)
+    for team_doc in report["migrated"]:
+        sizes = report["sizes"][team_doc]
+        query = sizes["summary"] + sizes.get("injuries", 0) + sizes.get("suspensions", 0)
+        print(f"[{'RAPOR' if args.dry_run else 'TAŞINDI'}] {team_doc}: legacy {sizes['legacy']} B → "
+              f"özet {sizes['summary']} B, injuries+suspensions sorgusu {query} B")
+    for team_doc in report["missing"]:
+        print(f"[YOK] {team_doc}", file=sys.stderr)
+    return 1 if report["missing"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Testler için ortak fixture'lar: app modülünü bellek içi Firestore ile çalıştırır."""
+import pytest
+
+import app
+from benchmarks.stubs import InMemoryFirestore
+
+
+@pytest.fixture
+def db(monkeypatch):
+    store = InMemoryFirestore()
+    monkeypatch.setattr(app, "DB", store)
+    return store
+
+
+@pytest.fixture
+def change_events(monkeypatch):
+    """CHANGE_FEED'e yayınlanan olayları toplayan QueueSink."""
+    sink = app.QueueSink()
+    monkeypatch.setattr(app, "CHANGE_FEED", app.ChangeFeed([sink]))
+    return sink
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app
+
+
+NOW = datetime(2025, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def policy():
+    return app.CachePolicy()
+
+
+@pytest.fixture
+def league(monkeypatch):
+    """cache_factor'ı ayarlanabilen test ligi."""
+    leagues = dict(app.LEAGUES, xx1={"name": "Test", "slug": "test", "code": "XX1"})
+    monkeypatch.setattr(app, "LEAGUES", leagues)
+    return leagues["xx1"]
+
+
+def test_base_ttl_without_kickoff(policy):
+    assert policy.ttl("squad", now=NOW)[0] == 1440
+    assert policy.ttl("injuries", now=NOW)[0] == 360
+
+
+@pytest.mark.parametrize("hours, expected", [(1, 15), (3, 15), (10, 60), (48, 180), (100, 360)])
+def test_pre_match_bands(policy, hours, expected):
+    assert policy.ttl("injuries", kickoff=NOW + timedelta(hours=hours), now=NOW)[0] == expected
+
+
+def test_post_match_ttl_only_for_result_driven_types(policy):
+    kickoff = NOW - timedelta(hours=2)
+    assert policy.ttl("position", kickoff=kickoff, now=NOW)[0] == 30
+    assert policy.ttl("squad", kickoff=kickoff, now=NOW)[0] == 1440
+
+
+def test_quiet_period_extends_ttl(policy):
+    assert policy.ttl("stats", kickoff=NOW + timedelta(days=10), now=NOW)[0] == 720 * policy.QUIET_FACTOR
+
+
+def test_league_factor_cannot_stretch_pre_match_band(policy, league):
+    league["cache_factor"] = 4
+    assert policy.ttl("injuries", "xx1", now=NOW)[0] == 360 * 4
+    assert policy.ttl("injuries", "xx1", kickoff=NOW + timedelta(hours=1), now=NOW)[0] == 15
+
+
+def test_request_override_wins(policy):
+    assert policy.ttl("injuries", override={"*": 0}, now=NOW) == (0.0, "istek override")
+    assert policy.ttl("squad", override={"injuries": 5}, now=NOW)[0] == 1440
+
+
+@pytest.mark.parametrize("kickoff", [1760000000, 12.5, ["2025-10-01"], "yarın"])
+def test_invalid_kickoff_is_ignored(monkeypatch, kickoff):
+    calendar = app.FixtureCalendar()
+    monkeypatch.setattr(app, "FIXTURES", calendar)
+    app.note_fixture([{"name": "Team"}], kickoff)
+    assert calendar.next_kickoff("team") is None
+
+
+def test_naive_kickoff_is_treated_as_utc(monkeypatch):
+    calendar = app.FixtureCalendar()
+    monkeypatch.setattr(app, "FIXTURES", calendar)
+    kickoff = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    app.note_fixture([{"name": "Team"}], kickoff.replace(tzinfo=None).isoformat())
+    assert calendar.next_kickoff("team") == kickoff
+
+
+def test_batch_prefetch_skips_pages_whose_data_is_fresh(db):
+    info = app.get_team_info("galatasaray")
+    just_now = {"last_validated": datetime.now(timezone.utc)}
+    cache_mgr = app.CacheManager(db)
+
+    assert len(app.stale_page_urls([(info, "tr1")], cache_mgr)) == 6
+
+    fresh = {t: just_now for t in ("squad", "suspensions", "stats", "injuries", "suspensions_kader", "position")}
+    db.collection("cache_metadata").document(info["name"].lower()).set(fresh)
+    assert app.stale_page_urls([(info, "tr1")], app.CacheManager(db)) == [app.get_form_url("tr1")]
+
+    db.collection("cache_metadata").document(info["name"].lower()).set(dict(fresh, form=just_now))
+    assert app.stale_page_urls([(info, "tr1")], app.CacheManager(db)) == []
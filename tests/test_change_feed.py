@@ -0,0 +1,27 @@
+import time
+
+import app
+
+
+class FailingSink(app.WebhookSink):
+    """Her gönderimi başarısız sayan, denemeleri sayan webhook sink'i."""
+
+    posts = 0
+
+    def _post(self, batch):
+        self.posts += 1
+        return False
+
+
+def test_failing_webhook_backs_off_and_drops_after_max_attempts():
+    sink = FailingSink("https://hooks.test/changes", batch_size=1, interval=0.01,
+                       max_backoff=0.05, max_attempts=3)
+    for i in range(5):
+        sink.emit({"event": i})
+    time.sleep(0.5)
+    sink.close()
+
+    # Geri çekilmesiz döngü bu sürede binlerce POST yapıyordu; 0.01+0.02+0.04+0.05+... ile ~12
+    assert sink.posts <= 15
+    assert sink.dropped >= 3
+    assert sink.snapshot()["consecutive_failures"] == sink.posts
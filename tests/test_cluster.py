@@ -0,0 +1,111 @@
+from collections import Counter
+
+import pytest
+
+import app
+
+
+KEYS = [f"team:{i}" for i in range(2000)]
+
+
+def test_ring_is_deterministic_and_total():
+    ring = app.HashRing(["a", "b", "c"])
+    assert [ring.owner(k) for k in KEYS] == [app.HashRing(["c", "a", "b"]).owner(k) for k in KEYS]
+    assert app.HashRing([]).owner("team:x") is None
+
+
+def test_join_only_moves_keys_to_new_node():
+    before, after = app.HashRing(["a", "b", "c"]), app.HashRing(["a", "b", "c", "d"])
+    moved = [k for k in KEYS if before.owner(k) != after.owner(k)]
+    assert all(after.owner(k) == "d" for k in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_leave_only_moves_keys_of_departed_node():
+    before, after = app.HashRing(["a", "b", "c", "d"]), app.HashRing(["a", "b", "d"])
+    moved = [k for k in KEYS if before.owner(k) != after.owner(k)]
+    assert moved and all(before.owner(k) == "c" for k in moved)
+
+
+def test_ring_spreads_keys():
+    counts = Counter(app.HashRing(["a", "b", "c", "d"]).owner(k) for k in KEYS)
+    assert min(counts.values()) > len(KEYS) / 4 * 0.6
+
+
+def test_resolve_job_uses_catalog():
+    key, info = next(iter(app.TEAMS.items()))
+    assert app.resolve_job({"team": info["id"], "league_key": info["league"].upper()}) == (info, info["league"])
+    with pytest.raises(ValueError):
+        app.resolve_job({"team": "yok-boyle-takim", "league_key": info["league"]})
+    with pytest.raises(ValueError):
+        app.resolve_job({"team": info["id"], "league_key": "zz9"})
+
+
+@pytest.mark.parametrize("mode, token, header, status", [
+    (False, "s", "s", 403),
+    (True, "", "", 403),
+    (True, "s", "yanlis", 403),
+    (True, "s", "s", 400),
+])
+def test_refresh_endpoint_requires_cluster_mode_and_token(monkeypatch, mode, token, header, status):
+    monkeypatch.setattr(app, "CLUSTER_MODE", mode)
+    monkeypatch.setattr(app, "CLUSTER_TOKEN", token)
+    res = app.app.test_client().post("/cluster/refresh", json={"jobs": "x"}, headers={"X-Cluster-Token": header})
+    assert res.status_code == status
+
+
+@pytest.fixture
+def two_nodes(db, monkeypatch):
+    """A (bu süreç) ve B düğümlü küme; A'nın ve B'nin sahibi olduğu birer tr1 takımı."""
+    node_a, node_b = app.ClusterNode(db, "A", "http://a"), app.ClusterNode(db, "B", "http://b")
+    node_a.enabled = node_b.enabled = True
+    node_a.heartbeat(), node_b.heartbeat(), node_a.heartbeat()
+    monkeypatch.setattr(app, "CLUSTER", node_a)
+    tr1 = [info for info in app.TEAMS.values() if info["league"] == "tr1"]
+    mine = next(info for info in tr1 if node_a.owner(info, "tr1") == "A")
+    theirs = next(info for info in tr1 if node_a.owner(info, "tr1") == "B")
+    return node_a, mine, theirs
+
+
+def test_enqueued_teams_are_reported_as_queued(two_nodes, monkeypatch):
+    node_a, mine, theirs = two_nodes
+    node_a.dispatch_mode = "enqueue"
+    monkeypatch.setattr(app, "generate_team_data", lambda info, *args, **kwargs: ({"ok": 1}, [], info["name"].lower()))
+    monkeypatch.setattr(app, "save_team_data", lambda *args: None)
+
+    res = app.app.test_client().post("/generate-json", json={"home_team": mine["id"], "away_team": theirs["id"],
+                                                            "league_key": "tr1"})
+
+    assert res.json["status"] == "queued"
+    assert res.json["queued"] == [theirs["name"].lower()]
+
+
+def test_stream_only_scrapes_local_teams(two_nodes, monkeypatch):
+    node_a, mine, theirs = two_nodes
+    node_a.dispatch_mode = "enqueue"
+    processed = []
+    monkeypatch.setattr(app, "process_team", lambda info, *args, **kwargs: processed.append(info["name"]))
+
+    res = app.app.test_client().post("/generate-json?stream=ndjson", json={
+        "home_team": mine["id"], "away_team": theirs["id"], "league_key": "tr1"})
+    res.get_data()
+
+    assert processed == [mine["name"]]
+
+
+def test_forward_wait_is_limited_by_remaining_budget(two_nodes, monkeypatch):
+    node_a, mine, theirs = two_nodes
+    timeouts = []
+
+    def timing_out(url, data, headers, timeout):
+        timeouts.append(timeout)
+        raise app.requests.exceptions.Timeout("timed out")
+
+    monkeypatch.setattr(app.requests, "post", timing_out)
+    with app.request_budget(5):
+        results, fallback, queued = node_a.dispatch({"B": [(theirs, "tr1")]})
+
+    assert timeouts and timeouts[0] <= 5
+    # Bütçe yüzünden kesilen bekleme düğümü düşürmez ve takım yerelde tekrar işlenmez
+    assert "süre bütçesi" in results[theirs["name"].lower()] and fallback == [] and queued == []
+    assert "B" in node_a.members
@@ -0,0 +1,100 @@
+import pytest
+
+import app
+
+
+SQUAD = [
+    {"name": "A", "position": "GK", "market_value": "1m"},
+    {"name": "B", "position": "CB", "market_value": "2m"},
+    {"name": "C", "position": "ST", "market_value": "3m"},
+]
+
+
+@pytest.mark.parametrize("old, new", [
+    (SQUAD, list(reversed(SQUAD))),
+    (SQUAD, SQUAD + [SQUAD[0]]),
+    (SQUAD + [SQUAD[0]], SQUAD),
+    (SQUAD, [SQUAD[1], {"name": "D", "position": "LW", "market_value": "4m"}, SQUAD[0]]),
+    ([], SQUAD),
+    (SQUAD, []),
+    ({"wins": 1, "draws": 2}, {"wins": 2, "losses": 0}),
+])
+def test_delta_round_trip(old, new):
+    assert app.apply_delta(old, app.make_delta(old, new)) == new
+
+
+def test_state_at_returns_recorded_value(db):
+    store = app.HistoryStore()
+    values = [SQUAD, list(reversed(SQUAD)), SQUAD[:2] + SQUAD[:1], SQUAD]
+    for day, value in enumerate(values, start=1):
+        at = f"2025-09-0{day}T12:00:00+00:00"
+        assert store.record("team", "squad", value, at)
+        assert store.state_at("team", "squad", at)["value"] == value
+
+
+def test_restart_does_not_record_spurious_version(db, change_events):
+    app.HistoryStore().record("team", "squad", SQUAD, "2025-09-01T12:00:00+00:00")
+    app.HistoryStore().record("team", "squad", list(reversed(SQUAD)), "2025-09-02T12:00:00+00:00")
+
+    restarted = app.HistoryStore()
+    assert not restarted.record("team", "squad", list(reversed(SQUAD)), "2025-09-03T12:00:00+00:00")
+    assert change_events.queue.qsize() == 1
+
+
+def test_changes_since_lists_added_and_removed(db):
+    store = app.HistoryStore()
+    store.record("team", "squad", SQUAD, "2025-09-01T12:00:00+00:00")
+    store.record("team", "squad", SQUAD[1:] + [{"name": "D"}], "2025-09-02T12:00:00+00:00")
+
+    changes = store.changes_since("team", "squad", "2025-09-01T18:00:00+00:00", season_id=2025)
+    assert changes == [{"scraped_at": "2025-09-02T12:00:00+00:00", "added": [{"name": "D"}], "removed": [SQUAD[0]]}]
+
+
+def test_changes_since_walks_seasons_from_since(db):
+    store = app.HistoryStore()
+    store.record("team", "squad", SQUAD, "2025-03-01T12:00:00+00:00")  # 2024 sezonu
+    store.record("team", "squad", SQUAD[:2], "2025-04-01T12:00:00+00:00")
+    store.record("team", "squad", SQUAD, "2025-09-01T12:00:00+00:00")  # 2025 sezonu
+
+    changes = store.changes_since("team", "squad", "2025-03-15T00:00:00+00:00")
+    assert [c["scraped_at"] for c in changes] == ["2025-04-01T12:00:00+00:00", "2025-09-01T12:00:00+00:00"]
+    assert changes[0]["removed"] == [SQUAD[2]] and changes[1]["full"] == SQUAD
+    assert len(store.changes_since("team", "squad", "2025-03-15T00:00:00+00:00", season_id=2025)) == 1
+
+
+def test_each_version_is_a_separate_document(db):
+    store = app.HistoryStore()
+    for day in range(1, 6):
+        store.record("team", "stats", [{"name": "A", "minutes_played": day * 90}], f"2025-09-0{day}T12:00:00+00:00")
+
+    head = db.data["team_history"]["team__stats__2025"]
+    assert head["count"] == 5 and "versions" not in head
+    assert len(db.data["team_history/team__stats__2025/versions"]) == 5
+    assert app.HistoryStore().state_at("team", "stats", "2025-09-03T13:00:00+00:00")["value"] == [
+        {"name": "A", "minutes_played": 270}]
+
+
+def test_only_bounded_head_state_is_kept_in_memory(db, change_events):
+    store = app.HistoryStore(max_docs=2)
+    for team in ("a", "b", "c"):
+        store.record(team, "squad", SQUAD, "2025-09-01T12:00:00+00:00")
+    assert list(store._state) == ["b__squad__2025", "c__squad__2025"]
+    assert all("versions" not in state for state in store._state.values())
+
+    # Bellekten düşen doküman Firestore'dan yeniden kurulur: aynı değer yeni sürüm yazmaz, farklısı delta olur
+    assert not store.record("a", "squad", SQUAD, "2025-09-02T12:00:00+00:00")
+    assert store.record("a", "squad", SQUAD[:2], "2025-09-03T12:00:00+00:00")
+    assert "delta" in db.data["team_history/a__squad__2025/versions"]["000001"]
+    assert store.state_at("a", "squad", "2025-09-02T18:00:00+00:00")["value"] == SQUAD
+    assert change_events.queue.qsize() == 1
+
+
+def test_season_override_is_used_for_record_and_queries(db, monkeypatch):
+    monkeypatch.setattr(app, "SEASON_ID", "2024")
+    store = app.HistoryStore()
+    store.record("team", "squad", SQUAD, "2025-09-01T12:00:00+00:00")
+    store.record("team", "squad", SQUAD[:1], "2025-09-02T12:00:00+00:00")
+
+    assert "team__squad__2024" in db.data["team_history"]
+    assert len(store.changes_since("team", "squad", "2025-09-01T18:00:00+00:00")) == 1
+    assert store.state_at("team", "squad", "2025-09-02T18:00:00+00:00")["value"] == SQUAD[:1]
@@ -0,0 +1,83 @@
+import contextvars
+import threading
+import time
+
+import app
+
+
+def _spin_worker(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return seconds
+
+
+def _spin_outsider(stop):
+    # Başka (profillenmeyen) bir isteğin worker'ı: app.py frame'leri olan bir thread'de döner
+    while not stop.is_set():
+        pass
+
+
+def _profiled(mode, fn):
+    profiler = app.RequestProfiler(mode)
+    ctx = contextvars.copy_context()
+    ctx.run(app._profiler.set, profiler)
+    try:
+        ctx.run(fn)
+    finally:
+        record = profiler.stop()
+    return record
+
+
+def test_cprofile_covers_request_thread_and_samples_workers():
+    def request():
+        _spin_worker(0.01)
+        app.run_concurrently(_spin_worker, [0.2, 0.2], workers=2)
+
+    record = _profiled("cprofile", request)
+
+    assert record["mode"] == "cprofile"
+    assert "_spin_worker" in record["pstats"]  # istek thread'i (deterministik)
+    assert "_spin_worker" in record["collapsed"]  # worker'lar (örnekleme)
+
+
+class _BusyProfile:
+    """Python 3.12+'da başka bir profilleyici etkinken cProfile.Profile.enable davranışı."""
+
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+
+def test_cprofile_falls_back_to_sampling_when_another_profiler_is_active(monkeypatch):
+    monkeypatch.setattr(app.cProfile, "Profile", _BusyProfile)
+    record = _profiled("cprofile", lambda: app.run_concurrently(_spin_worker, [0.2], workers=1))
+
+    assert record["mode"] == "sample" and "already active" in record["fallback"]
+    assert record["pstats"] is None
+    assert "_spin_worker" in record["collapsed"]
+
+
+def test_sampler_only_collects_threads_of_the_profiled_request():
+    stop = threading.Event()
+    outsider = threading.Thread(target=app.run_concurrently, args=(_spin_outsider, [stop]), daemon=True)
+    outsider.start()
+    try:
+        record = _profiled("sample", lambda: app.run_concurrently(_spin_worker, [0.2, 0.2], workers=2))
+    finally:
+        stop.set()
+        outsider.join()
+
+    assert "_spin_worker" in record["collapsed"]
+    assert "_spin_outsider" not in record["collapsed"]
+
+
+def test_unprofiled_request_does_not_inherit_previous_profile(monkeypatch):
+    monkeypatch.setattr(app, "PROFILE_TOKEN", "secret")
+    client = app.app.test_client()
+
+    client.get("/", headers={"X-Profile": "sample", "X-Admin-Token": "secret"})
+    client.get("/")
+
+    # test_client istekleri aynı thread'de (ve context'te) çalışır, tıpkı yeniden kullanılan worker thread'leri gibi
+    assert app._profiler.get() is None
+    assert app._profile_spans.get() is None
@@ -0,0 +1,174 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+import app
+
+
+URL = "https://example.test/page"
+
+
+def test_rate_limiter_serves_interactive_before_background():
+    limiter = app.RateLimiter(rate=20, burst=1)
+    limiter.acquire(URL, priority=app.INTERACTIVE)  # tek token harcanır, sonrakiler bekler
+    order = []
+
+    def waiter(priority, name):
+        limiter.acquire(URL, priority=priority, timeout=5)
+        order.append(name)
+
+    threads = [threading.Thread(target=waiter, args=(app.BACKGROUND, f"background-{i}")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    threads.append(threading.Thread(target=waiter, args=(app.INTERACTIVE, "interactive")))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "background-0", "background-1"]
+
+
+def test_rate_limiter_backs_off_and_recovers():
+    limiter = app.RateLimiter(rate=4, burst=2, backoff=0.5, recovery=0.25, penalty=0)
+    limiter.record(URL, 429)
+    assert limiter.snapshot()["example.test"]["rate"] == 2
+    limiter.record(URL, 200)
+    limiter.record(URL, 200)
+    assert limiter.snapshot()["example.test"]["rate"] == 4
+
+
+def test_rate_limiter_timeout():
+    limiter = app.RateLimiter(rate=1, burst=1)
+    limiter.acquire(URL)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(URL, timeout=0.05)
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    breaker = app.CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # half_open: tek deneme
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.allow()
+
+
+def test_circuit_breaker_failed_probe_reopens():
+    breaker = app.CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+
+
+def test_half_open_probe_survives_exhausted_budget(monkeypatch):
+    breaker = app.CircuitBreaker("budget.test", failure_threshold=1, reset_timeout=0.01)
+    monkeypatch.setitem(app._breakers, "budget.test", breaker)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    ctx = contextvars.copy_context()
+    ctx.run(app._request_deadline.set, time.monotonic() - 1)
+    with pytest.raises(app.BudgetExceededError):
+        ctx.run(app.http_fetch, "https://budget.test/page")
+
+    assert breaker.allow()  # half-open deneme hakkı bütçe hatasında harcanmadı
+
+
+def test_circuit_breaker_probe_times_out_or_is_released():
+    breaker = app.CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01, probe_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()  # sonuçlanmayan deneme probe_timeout sonra yenilenir
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("€5,00 mil.", 5_000_000),
+    ("500 bin €", 500_000),
+    ("€1,20 mlr.", 1_200_000_000),
+    ("€15.00m", 15_000_000),
+    ("€800k", 800_000),
+    ("€ 25.000", 25_000),
+    ("-", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_market_value(text, expected):
+    assert app.parse_market_value(text) == expected
+
+
+def test_clearance_cookies_are_scoped_to_the_proxy_that_earned_them():
+    jar = app.ClearanceJar()
+    jar.update("example.test", "http://p1:8080", [{"name": "cf_clearance", "value": "abc", "expires": -1},
+                                                 {"name": "old", "value": "x", "expires": time.time() - 1}])
+
+    assert jar.get("example.test", "http://p1:8080") == {"cf_clearance": "abc"}
+    assert jar.get("example.test", "http://p2:8080") is None
+    assert jar.get("example.test", None) is None
+    assert jar.proxies("example.test") == {"http://p1:8080"}
+    assert jar.proxies("other.test") == set()
+
+
+def test_proxy_pool_prefers_proxy_with_clearance_unless_it_is_blocked():
+    pool = app.ProxyPool(["http://p1:8080", "http://p2:8080"])
+    p1, p2 = pool._proxies
+    p1.latency, p2.latency = 5.0, 0.1
+
+    chosen = pool.acquire(prefer={"http://p1:8080"})
+    assert chosen is p1
+    pool.release(chosen, True, 5.0)
+
+    p1.blocked_until = time.monotonic() + 60
+    chosen = pool.acquire(prefer={"http://p1:8080"})
+    assert chosen is p2
+    pool.release(chosen, True, 0.1)
+
+
+def test_proxy_sessions_are_shared_across_threads():
+    pool = app.ProxyPool(["http://p1:8080"], max_idle=1)
+    proxy = pool._proxies[0]
+    used = []
+
+    def borrow():
+        with pool.session(proxy) as session:
+            used.append(session)
+
+    for _ in range(2):
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join()
+    assert used[0] is used[1]  # ikinci istek (başka thread) aynı bağlantıyı kullanır
+
+    with pool.session(proxy) as first, pool.session(proxy) as second:
+        assert first is not second  # eşzamanlı kullanımda Session paylaşılmaz
+    assert len(pool._idle[proxy.url]) == 1  # max_idle üstü kapatılır
+
+
+def test_proxy_pool_prefers_warm_proxy_when_scores_are_close():
+    pool = app.ProxyPool(["http://p1:8080", "http://p2:8080"])
+    p1, p2 = pool._proxies
+    p1.latency, p2.latency = 1.0, 1.5
+    with pool.session(p2):
+        pass
+
+    chosen = pool.acquire()
+    assert chosen is p2
+    pool.release(chosen, True, 1.5)
+
+    p2.latency = 5.0  # belirgin biçimde kötüyse sıcak bağlantı tercih edilmez
+    assert pool.acquire() is p1